@@ -0,0 +1,183 @@
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Deque, Dict, Optional
+from fastapi import HTTPException
+from .config import settings
+from .metrics import ADMISSION_IN_FLIGHT, ADMISSION_QUEUE_SECONDS, ADMISSION_REJECTIONS
+from .principals import current_principal
+
+INTERACTIVE = "interactive"
+BULK = "bulk"
+CLASSES = (INTERACTIVE, BULK)
+
+# Latency-sensitive reads; every other client method (upsert, delete, scroll, ...) is bulk
+INTERACTIVE_METHODS = frozenset({
+    "search", "search_batch", "query_points", "query_batch_points", "recommend", "retrieve", "count",
+    "get_collection", "get_collections", "collection_exists",
+})
+
+def priority_class(method: str) -> str:
+    return INTERACTIVE if method in INTERACTIVE_METHODS else BULK
+
+def _overloaded(detail: str) -> HTTPException:
+    return HTTPException(
+        status_code=503,
+        detail=detail,
+        headers={"Retry-After": str(settings.ADMISSION_RETRY_AFTER)},
+    )
+
+class _Gate:
+    """
+    Concurrency gate for one collection. At most `limit` Qdrant calls run at once, of
+    which at most `bulk_limit` may be bulk, so bulk work can never take the slots
+    interactive searches need. Freed slots go to queued interactive calls first.
+    """
+
+    def __init__(self, limit: int, bulk_limit: int):
+        self.limit = limit
+        self.bulk_limit = bulk_limit
+        self.active = {INTERACTIVE: 0, BULK: 0}
+        self.waiters: Dict[str, Deque[asyncio.Future]] = {cls: deque() for cls in CLASSES}
+        self.service_time = {cls: 0.01 for cls in CLASSES}  # EWMA of call duration, seconds
+
+    def idle(self) -> bool:
+        return not (self.active[INTERACTIVE] or self.active[BULK] or self.waiters[INTERACTIVE] or self.waiters[BULK])
+
+    def _has_slot(self, cls: str) -> bool:
+        if self.active[INTERACTIVE] + self.active[BULK] >= self.limit:
+            return False
+        return cls == INTERACTIVE or self.active[BULK] < self.bulk_limit
+
+    def _queued_ahead(self, cls: str) -> int:
+        return len(self.waiters[INTERACTIVE]) + (len(self.waiters[BULK]) if cls == BULK else 0)
+
+    def estimated_wait(self, cls: str) -> float:
+        slots = self.limit if cls == INTERACTIVE else self.bulk_limit
+        return (self._queued_ahead(cls) + 1) * self.service_time[cls] / max(slots, 1)
+
+    async def acquire(self, cls: str, timeout: float) -> None:
+        if not self._queued_ahead(cls) and self._has_slot(cls):
+            self.active[cls] += 1
+            return
+        # Refuse at once when the queue ahead cannot drain before the deadline
+        if self.estimated_wait(cls) > timeout:
+            raise _overloaded("Qdrant is overloaded for this collection, retry shortly") from None
+        future = asyncio.get_running_loop().create_future()
+        self.waiters[cls].append(future)
+        try:
+            await asyncio.wait_for(asyncio.shield(future), timeout)
+        except BaseException as e:
+            if future.done() and not future.cancelled():
+                # The slot was handed over just as we gave up: pass it on
+                self.release(cls, None)
+            else:
+                future.cancel()
+                try:
+                    self.waiters[cls].remove(future)
+                except ValueError:
+                    pass
+            if isinstance(e, asyncio.TimeoutError):
+                raise _overloaded("Timed out waiting for Qdrant capacity, retry shortly") from None
+            raise
+
+    def release(self, cls: str, elapsed: Optional[float]) -> None:
+        self.active[cls] -= 1
+        if elapsed is not None:
+            self.service_time[cls] = 0.8 * self.service_time[cls] + 0.2 * elapsed
+        for waiting_cls in CLASSES:
+            queue = self.waiters[waiting_cls]
+            while queue and self._has_slot(waiting_cls):
+                future = queue.popleft()
+                if future.done():
+                    continue
+                self.active[waiting_cls] += 1
+                future.set_result(None)
+
+class AdmissionController:
+    """
+    Admission control in front of Qdrant, applied by the client proxy to every call
+    that names a collection.
+
+    Each collection has its own gate (see _Gate), kept only while calls are running or
+    queued on it, so arbitrary collection names in requests cannot grow it; calls wait for a slot up to a
+    per-class deadline and are rejected with 503 + Retry-After when the deadline
+    passes or cannot be met. Each user may additionally have at most `user_limit`
+    Qdrant calls in flight per worker; beyond that calls get 429 straight away.
+    The user is taken from the request's authenticated principal.
+    """
+
+    def __init__(self, enabled: bool, collection_limit: int, bulk_limit: int, user_limit: int,
+                 interactive_timeout: float, bulk_timeout: float):
+        self.enabled = enabled
+        self.collection_limit = collection_limit
+        self.bulk_limit = bulk_limit
+        self.user_limit = user_limit
+        self.timeouts = {INTERACTIVE: interactive_timeout, BULK: bulk_timeout}
+        self._gates: Dict[str, _Gate] = {}
+        self._users: Dict[int, int] = {}
+
+    def _gate(self, collection: str) -> _Gate:
+        gate = self._gates.get(collection)
+        if gate is None:
+            gate = self._gates[collection] = _Gate(self.collection_limit, self.bulk_limit)
+        return gate
+
+    def _discard_if_idle(self, collection: str, gate: _Gate) -> None:
+        if gate.idle() and self._gates.get(collection) is gate:
+            del self._gates[collection]
+
+    @asynccontextmanager
+    async def admit(self, method: str, collection: Optional[str]) -> AsyncIterator[None]:
+        if not self.enabled or collection is None:
+            yield
+            return
+        cls = priority_class(method)
+        principal = current_principal.get()
+        user_id = principal.id if principal is not None else None
+        if user_id is not None and self._users.get(user_id, 0) >= self.user_limit:
+            ADMISSION_REJECTIONS.labels(cls, "user_limit").inc()
+            raise HTTPException(
+                status_code=429,
+                detail="Too many concurrent Qdrant operations for this user",
+                headers={"Retry-After": str(settings.ADMISSION_RETRY_AFTER)},
+            )
+
+        gate = self._gate(collection)
+        queued = time.perf_counter()
+        try:
+            await gate.acquire(cls, self.timeouts[cls])
+        except HTTPException:
+            ADMISSION_REJECTIONS.labels(cls, "deadline").inc()
+            self._discard_if_idle(collection, gate)
+            raise
+        except BaseException:
+            self._discard_if_idle(collection, gate)
+            raise
+        started = time.perf_counter()
+        ADMISSION_QUEUE_SECONDS.labels(cls).observe(started - queued)
+        ADMISSION_IN_FLIGHT.labels(cls).inc()
+        if user_id is not None:
+            self._users[user_id] = self._users.get(user_id, 0) + 1
+        try:
+            yield
+        finally:
+            gate.release(cls, time.perf_counter() - started)
+            self._discard_if_idle(collection, gate)
+            ADMISSION_IN_FLIGHT.labels(cls).dec()
+            if user_id is not None:
+                remaining = self._users[user_id] - 1
+                if remaining:
+                    self._users[user_id] = remaining
+                else:
+                    del self._users[user_id]
+
+admission = AdmissionController(
+    enabled=settings.ADMISSION_ENABLED,
+    collection_limit=settings.ADMISSION_COLLECTION_LIMIT,
+    bulk_limit=settings.ADMISSION_BULK_LIMIT,
+    user_limit=settings.ADMISSION_USER_LIMIT,
+    interactive_timeout=settings.ADMISSION_INTERACTIVE_TIMEOUT_MS / 1000,
+    bulk_timeout=settings.ADMISSION_BULK_TIMEOUT_MS / 1000,
+)
@@ -1,18 +1,301 @@
+import glob
+import json
+import os
+import queue
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from sqlalchemy import insert
+from sqlalchemy.dialects import mysql, sqlite
 from sqlalchemy.orm import Session
-from .models import AuditLog, User
+from .config import settings
+from .db import SessionLocal
+from .models import AuditHourlyCount, AuditLog
+from .principals import Principal
+from .metrics import AUDIT_EVENTS, AUDIT_QUEUE_DEPTH, AUDIT_WRITE_SECONDS, Timer
 from fastapi import HTTPException
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 
-def audit(db: Session, actor: User, action: str, resource: str, payload: Optional[Dict[str, Any]] = None) -> None:
+OVERFLOW_POLICIES = ("block", "drop", "spill")
+
+def record_hourly_counts(db: Session, rows: List[Dict[str, Any]]) -> None:
+    """
+    Add `rows` to the per-hour counters in the caller's transaction, so the counts
+    commit (or roll back) together with the audit rows themselves. Keys are written in
+    a fixed order so concurrent flushers upserting overlapping keys lock rows in the
+    same order and cannot deadlock each other.
+    """
+    counts = Counter(
+        ((row.get("created_at") or datetime.utcnow()).replace(minute=0, second=0, microsecond=0),
+         row["user_id"], row["action"], row["resource"])
+        for row in rows
+    )
+    values = [
+        {"hour": hour, "user_id": user_id, "action": action, "resource": resource, "count": n}
+        for (hour, user_id, action, resource), n in sorted(counts.items())
+    ]
+    if db.get_bind().dialect.name == "mysql":
+        stmt = mysql.insert(AuditHourlyCount)
+        stmt = stmt.on_duplicate_key_update(count=AuditHourlyCount.count + stmt.inserted["count"])
+    else:
+        stmt = sqlite.insert(AuditHourlyCount)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["hour", "user_id", "action", "resource"],
+            set_={"count": AuditHourlyCount.count + stmt.excluded["count"]},
+        )
+    db.execute(stmt, values)
+
+class AuditSink:
+    """
+    Write-behind audit pipeline.
+
+    Events are queued in memory and a background thread writes them to `AuditLog`
+    with multi-row inserts, whenever `batch_size` events are pending or
+    `flush_interval` seconds have passed. The queue is bounded; when it is full the
+    overflow policy decides whether to block the caller, drop the event or spill it
+    to a local JSON-lines file that is replayed on the next start. Replay is at least
+    once: a file left behind by a worker that died while replaying it is replayed
+    again, and unreadable lines (e.g. cut short by a crash) are skipped and counted.
+    """
+
+    def __init__(
+        self,
+        max_size: int,
+        batch_size: int,
+        flush_interval: float,
+        overflow: str = "block",
+        block_timeout: float = 1.0,
+        spill_path: Optional[str] = None,
+    ):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown audit overflow policy: {overflow}")
+        self.queue: "queue.Queue[Dict[str, Any]]" = queue.Queue(maxsize=max_size)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.overflow = overflow
+        self.block_timeout = block_timeout
+        self.spill_path = spill_path
+        self._spill_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.enqueued = 0
+        self.written = 0
+        self.dropped = 0
+        self.spilled = 0
+        self.corrupt_spill_lines = 0
+        self.failed_flushes = 0
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="audit-sink", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Stop the flusher after draining everything still queued."""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def submit(self, row: Dict[str, Any]) -> None:
+        try:
+            if self.overflow == "block":
+                self.queue.put(row, timeout=self.block_timeout)
+            else:
+                self.queue.put_nowait(row)
+            self.enqueued += 1
+            AUDIT_QUEUE_DEPTH.inc()
+        except queue.Full:
+            if self.overflow == "spill" and self.spill_path:
+                self._spill([row])
+            else:
+                self.dropped += 1
+                AUDIT_EVENTS.labels("dropped").inc()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "mode": settings.AUDIT_MODE,
+            "queue_depth": self.queue.qsize(),
+            "queue_capacity": self.queue.maxsize,
+            "enqueued": self.enqueued,
+            "written": self.written,
+            "dropped": self.dropped,
+            "spilled": self.spilled,
+            "corrupt_spill_lines": self.corrupt_spill_lines,
+            "failed_flushes": self.failed_flushes,
+            "last_flush_ms": round(self.last_flush_ms, 3),
+            "max_flush_ms": round(self.max_flush_ms, 3),
+        }
+
+    def _run(self) -> None:
+        # Replayed here rather than in start(), so a large spill never holds up worker startup
+        self._replay_spill()
+        while True:
+            batch = self._collect()
+            if batch:
+                self._flush(batch)
+            elif self._stop.is_set():
+                return
+
+    def _collect(self) -> List[Dict[str, Any]]:
+        batch: List[Dict[str, Any]] = []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if self._stop.is_set():
+                remaining = 0
+            try:
+                if remaining > 0:
+                    batch.append(self.queue.get(timeout=remaining))
+                else:
+                    batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        if batch:
+            AUDIT_QUEUE_DEPTH.dec(len(batch))
+        return batch
+
+    def _flush(self, batch: List[Dict[str, Any]]) -> None:
+        start = time.perf_counter()
+        db = SessionLocal()
+        try:
+            db.execute(insert(AuditLog), batch)
+            record_hourly_counts(db, batch)
+            db.commit()
+            self.written += len(batch)
+            AUDIT_EVENTS.labels("written").inc(len(batch))
+        except Exception as e:
+            db.rollback()
+            self.failed_flushes += 1
+            print("Warning: audit flush failed:", e)
+            if self.spill_path:
+                self._spill(batch)
+            else:
+                self.dropped += len(batch)
+                AUDIT_EVENTS.labels("dropped").inc(len(batch))
+        finally:
+            db.close()
+            elapsed = time.perf_counter() - start
+            AUDIT_WRITE_SECONDS.labels("async").observe(elapsed)
+            self.last_flush_ms = elapsed * 1000
+            self.max_flush_ms = max(self.max_flush_ms, self.last_flush_ms)
+
+    def _spill(self, rows: List[Dict[str, Any]]) -> None:
+        with self._spill_lock:
+            try:
+                with open(self.spill_path, "a", encoding="utf-8") as f:
+                    for row in rows:
+                        f.write(json.dumps(row, default=str) + "\n")
+                self.spilled += len(rows)
+                AUDIT_EVENTS.labels("spilled").inc(len(rows))
+            except OSError as e:
+                print("Warning: could not spill audit events:", e)
+                self.dropped += len(rows)
+                AUDIT_EVENTS.labels("dropped").inc(len(rows))
+
+    @staticmethod
+    def _pid_alive(pid: int) -> bool:
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except OSError:
+            return True
+        return True
+
+    def _replay_spill(self) -> None:
+        """Write events spilled by a previous run straight to the database in batches,
+        bypassing the bounded queue. Files are claimed by renaming them first, so only one
+        worker replays each; batches that fail again are spilled anew. Replay files left
+        by workers that died mid-replay are picked up before the spill file itself."""
+        if not self.spill_path:
+            return
+        claimed = f"{self.spill_path}.{os.getpid()}.replay"
+        for path in sorted(glob.glob(f"{glob.escape(self.spill_path)}.*.replay")):
+            pid = path[len(self.spill_path) + 1:-len(".replay")]
+            # Another live worker is still replaying this one
+            if not pid.isdigit() or (int(pid) != os.getpid() and self._pid_alive(int(pid))):
+                continue
+            try:
+                os.rename(path, claimed)
+            except OSError:
+                continue
+            self._replay_file(claimed)
+        try:
+            os.rename(self.spill_path, claimed)
+        except OSError:
+            return
+        self._replay_file(claimed)
+
+    def _replay_file(self, path: str) -> None:
+        batch: List[Dict[str, Any]] = []
+        corrupt = 0
+        with open(path, encoding="utf-8", errors="replace") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    row = json.loads(line)
+                    if not isinstance(row, dict) or not {"user_id", "action", "resource"} <= row.keys():
+                        raise ValueError("not an audit event")
+                    if row.get("created_at"):
+                        row["created_at"] = datetime.fromisoformat(row["created_at"])
+                except (ValueError, TypeError):
+                    corrupt += 1
+                    continue
+                batch.append(row)
+                if len(batch) >= self.batch_size:
+                    self._flush(batch)
+                    batch = []
+        if batch:
+            self._flush(batch)
+        if corrupt:
+            self.corrupt_spill_lines += corrupt
+            self.dropped += corrupt
+            AUDIT_EVENTS.labels("dropped").inc(corrupt)
+            print(f"Warning: skipped {corrupt} unreadable audit spill lines in {path}")
+        os.remove(path)
+
+audit_sink = AuditSink(
+    max_size=settings.AUDIT_QUEUE_SIZE,
+    batch_size=settings.AUDIT_BATCH_SIZE,
+    flush_interval=settings.AUDIT_FLUSH_INTERVAL_MS / 1000,
+    overflow=settings.AUDIT_OVERFLOW,
+    block_timeout=settings.AUDIT_BLOCK_TIMEOUT_MS / 1000,
+    spill_path=settings.AUDIT_SPILL_PATH or None,
+)
+
+def audit(db: Session, actor: Principal, action: str, resource: str, payload: Optional[Dict[str, Any]] = None) -> None:
     """
     Log an audit event for a user action.
+
+    In the default "async" mode the event is handed to the write-behind sink and
+    the request does not wait for the database; "sync" mode commits on `db`.
     """
     if not action or len(action) > 128 or not resource or len(resource) > 255:
         raise HTTPException(status_code=400, detail="Invalid action or resource")
+    if settings.AUDIT_MODE != "sync":
+        audit_sink.submit({
+            "user_id": actor.id,
+            "action": action,
+            "resource": resource,
+            "payload": payload,
+            "created_at": datetime.utcnow(),
+        })
+        return
     try:
-        log = AuditLog(user_id=actor.id, action=action, resource=resource, payload=payload)
-        db.add(log)
-        db.commit()
+        with Timer(AUDIT_WRITE_SECONDS.labels("sync")):
+            row = {"user_id": actor.id, "action": action, "resource": resource, "payload": payload,
+                   "created_at": datetime.utcnow()}
+            db.execute(insert(AuditLog), [row])
+            record_hourly_counts(db, [row])
+            db.commit()
+        AUDIT_EVENTS.labels("written").inc()
     except Exception:
         db.rollback()
-        raise HTTPException(status_code=500, detail="Audit logging failed")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail="Audit logging failed")
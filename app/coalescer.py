@@ -0,0 +1,125 @@
+import asyncio
+from typing import Dict, List, Optional, Tuple
+from qdrant_client.models import PointStruct
+from .config import settings
+from .metrics import COALESCED_BATCH_SIZE, COALESCER_FALLBACKS
+from .principals import current_principal
+from .qdrant import get_client
+from .search_cache import search_cache
+from .replica import replicas
+
+_Key = Tuple[str, bool]
+
+class _Batch:
+    __slots__ = ("points", "futures", "timer")
+
+    def __init__(self):
+        self.points: List[PointStruct] = []
+        self.futures: List[asyncio.Future] = []
+        self.timer: Optional[asyncio.TimerHandle] = None
+
+class UpsertCoalescer:
+    """
+    Merges single-point upserts to the same collection into one Qdrant upsert.
+
+    The first point for a (collection, wait) pair opens a batch that is flushed after
+    `window_ms` or as soon as it holds `max_batch` points, whichever comes first. Every
+    caller awaits its own future, so success and failure are still reported per point:
+    if the merged upsert fails, the batch is retried point by point, at most
+    `fallback_concurrency` at a time so the retry neither fills the bulk admission gate
+    nor bursts at a struggling Qdrant, and only the points that fail again raise.
+    `wait=True` acknowledges once Qdrant has applied the write, `wait=False` once
+    Qdrant has accepted it.
+    """
+
+    def __init__(self, enabled: bool, window_ms: int, max_batch: int, wait: bool, fallback_concurrency: int = 4):
+        self.enabled = enabled
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+        self.wait = wait
+        self.fallback_concurrency = fallback_concurrency
+        self._batches: Dict[_Key, _Batch] = {}
+        self._inflight: set = set()
+
+    async def upsert(self, collection: str, point: PointStruct, wait: Optional[bool] = None) -> None:
+        wait = self.wait if wait is None else wait
+        if not self.enabled:
+            try:
+                await get_client().upsert(collection_name=collection, points=[point], wait=wait)
+            except Exception:
+                # The write may have been applied before the error reached us
+                replicas.invalidate(collection)
+                search_cache.invalidate(collection)
+                raise
+            replicas.upsert(collection, [point])
+            search_cache.invalidate(collection)
+            return
+
+        loop = asyncio.get_running_loop()
+        key = (collection, wait)
+        batch = self._batches.get(key)
+        if batch is None:
+            batch = self._batches[key] = _Batch()
+            batch.timer = loop.call_later(self.window, self._flush_later, key)
+        future = loop.create_future()
+        batch.points.append(point)
+        batch.futures.append(future)
+        if len(batch.points) >= self.max_batch:
+            self._flush_later(key)
+        await future
+
+    def _flush_later(self, key: _Key) -> None:
+        batch = self._batches.pop(key, None)
+        if batch is None:
+            return
+        if batch.timer is not None:
+            batch.timer.cancel()
+        task = asyncio.get_running_loop().create_task(self._flush(key, batch))
+        self._inflight.add(task)
+        task.add_done_callback(self._inflight.discard)
+
+    async def _flush(self, key: _Key, batch: _Batch) -> None:
+        collection, wait = key
+        # A merged write belongs to no single caller; keep it out of the per-user admission cap
+        current_principal.set(None)
+        COALESCED_BATCH_SIZE.observe(len(batch.points))
+        client = get_client()
+        try:
+            # Qdrant applies the list in order, so a repeated id keeps its last vector as it would serially
+            await client.upsert(collection_name=collection, points=batch.points, wait=wait)
+            results = [None] * len(batch.points)
+        except Exception:
+            COALESCER_FALLBACKS.inc()
+            gate = asyncio.Semaphore(self.fallback_concurrency)
+
+            async def single(point: PointStruct) -> None:
+                async with gate:
+                    await client.upsert(collection_name=collection, points=[point], wait=wait)
+
+            results = await asyncio.gather(*(single(p) for p in batch.points), return_exceptions=True)
+        replicas.upsert(collection, [p for p, r in zip(batch.points, results) if not isinstance(r, BaseException)])
+        if any(isinstance(r, BaseException) for r in results):
+            # A failed point may still have been applied
+            replicas.invalidate(collection)
+        search_cache.invalidate(collection)
+        for future, result in zip(batch.futures, results):
+            if future.done():
+                continue
+            if isinstance(result, BaseException):
+                future.set_exception(result)
+            else:
+                future.set_result(None)
+
+    async def drain(self) -> None:
+        """Flush open batches and wait for in-flight flushes (used at shutdown)."""
+        for key in list(self._batches):
+            self._flush_later(key)
+        if self._inflight:
+            await asyncio.gather(*self._inflight, return_exceptions=True)
+
+upsert_coalescer = UpsertCoalescer(
+    enabled=settings.UPSERT_COALESCE_ENABLED,
+    window_ms=settings.UPSERT_COALESCE_WINDOW_MS,
+    max_batch=settings.UPSERT_COALESCE_MAX_BATCH,
+    wait=settings.UPSERT_COALESCE_ACK == "durable",
+)
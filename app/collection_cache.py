@@ -0,0 +1,244 @@
+import asyncio
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Set, Tuple
+from fastapi import HTTPException
+from qdrant_client.models import VectorParams
+from .config import settings
+from .invalidation import SharedVersion
+from .metrics import COLLECTION_CACHE_REFRESHES
+from .qdrant import get_client
+
+@dataclass(frozen=True)
+class CollectionInfo:
+    name: str
+    vector_size: Optional[int]  # None for named vectors or when the schema could not be read
+    distance: Optional[str]
+    points_count: Optional[int]
+    indexed_fields: Tuple[str, ...] = ()  # payload fields with an index
+
+class CollectionCache:
+    """
+    Per-worker view of which collections exist and of their vector size, distance,
+    point count and indexed payload fields, so requests can be validated and
+    collections listed without a Qdrant call.
+
+    The background task reloads the names with one list call every `refresh_interval`
+    seconds and then describes collections whose details are older than that, at most
+    `describe_concurrency` at a time. Create and delete (and payload index changes) bump
+    a shared version token: the next lookup reloads the names synchronously, marks the
+    details outdated and has them described again in the background. Listing only reads
+    the snapshot. A lookup that needs details the snapshot lacks (or only has outdated)
+    describes that one collection. A name missing from the snapshot is checked against
+    Qdrant before answering 404, so collections created elsewhere (scripts, jobs, other
+    hosts) are found straight away; a negative answer is remembered for `miss_ttl` seconds.
+    """
+
+    MAX_MISSES = 1024
+
+    def __init__(self, refresh_interval: int, describe_concurrency: int = 8, miss_ttl: float = 5.0):
+        self.refresh_interval = refresh_interval
+        self.describe_concurrency = describe_concurrency
+        self.miss_ttl = miss_ttl
+        self._names: Set[str] = set()
+        self._details: Dict[str, Tuple[float, CollectionInfo]] = {}
+        self._describing: Dict[str, asyncio.Task] = {}
+        self._misses: "OrderedDict[str, float]" = OrderedDict()
+        self._version = None
+        self._loaded_at = 0.0
+        self._shared = SharedVersion("collections")
+        self._refreshing: Optional[asyncio.Task] = None
+        self._redescribing: Optional[asyncio.Task] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def _max_age(self) -> float:
+        # Details stay usable for lookups until well past the background cycle
+        return 3 * self.refresh_interval
+
+    @staticmethod
+    async def _describe(name: str) -> Optional[CollectionInfo]:
+        try:
+            info = await get_client().get_collection(name)
+        except Exception:
+            # Listed but not describable (e.g. dropped meanwhile): skip dimension checks
+            return None
+        params = info.config.params.vectors
+        indexed = tuple(sorted(info.payload_schema or {}))
+        if isinstance(params, VectorParams):
+            return CollectionInfo(name, params.size, params.distance.value, info.points_count, indexed)
+        return CollectionInfo(name, None, None, info.points_count, indexed)
+
+    async def _reload_names(self) -> None:
+        # Read the token first so a bump during the reload leaves the snapshot stale
+        version = self._shared.current()
+        names = {c.name for c in (await get_client().get_collections()).collections}
+        details = {name: entry for name, entry in self._details.items() if name in names}
+        if version != self._version:
+            # Something changed a collection's schema or indexes: keep the details for
+            # listing, but outdated, so lookups and the next describe pass reload them
+            details = {name: (0.0, info) for name, (_, info) in details.items()}
+        self._details = details
+        self._names = names
+        self._version = version
+        self._loaded_at = time.monotonic()
+        COLLECTION_CACHE_REFRESHES.inc()
+
+    async def _describe_stale(self) -> None:
+        now = time.monotonic()
+        stale = [
+            name for name in sorted(self._names)
+            if name not in self._details or now - self._details[name][0] >= self.refresh_interval
+        ]
+        gate = asyncio.Semaphore(self.describe_concurrency)
+
+        async def describe(name: str) -> None:
+            async with gate:
+                await self._info(name, max_age=self.refresh_interval)
+
+        await asyncio.gather(*(describe(name) for name in stale))
+
+    async def refresh(self) -> None:
+        """Reload the names, then describe every collection whose details are stale."""
+        await self._reload_names()
+        await self._describe_stale()
+
+    def _stale(self) -> bool:
+        # The age limit only matters if the background task is not running (scripts, tests)
+        return (
+            self._version != self._shared.current()
+            or time.monotonic() - self._loaded_at > self._max_age
+        )
+
+    async def _ensure_fresh(self) -> None:
+        if not self._stale():
+            return
+        task = self._refreshing
+        # Concurrent requests share one reload
+        if task is None or task.done() or task.get_loop() is not asyncio.get_running_loop():
+            task = self._refreshing = asyncio.ensure_future(self._reload_names())
+            task.add_done_callback(self._redescribe)
+        await asyncio.shield(task)
+
+    def _redescribe(self, reload: asyncio.Task) -> None:
+        # Outdated details are described again off the request path
+        if reload.cancelled() or reload.exception() is not None:
+            return
+        if self._redescribing is None or self._redescribing.done():
+            self._redescribing = asyncio.ensure_future(self._describe_stale())
+            self._redescribing.add_done_callback(_log_describe_failure)
+
+    async def _load_details(self, name: str) -> CollectionInfo:
+        try:
+            info = await self._describe(name)
+        finally:
+            self._describing.pop(name, None)
+        if info is None:
+            info = CollectionInfo(name, None, None, None)
+            # Not describable: lookups skip dimension checks and retry after miss_ttl
+            self._details[name] = (time.monotonic() - self._max_age + self.miss_ttl, info)
+            return info
+        self._details[name] = (time.monotonic(), info)
+        return info
+
+    async def _info(self, name: str, max_age: Optional[float] = None) -> CollectionInfo:
+        entry = self._details.get(name)
+        if entry is not None and time.monotonic() - entry[0] < (self._max_age if max_age is None else max_age):
+            return entry[1]
+        task = self._describing.get(name)
+        # Concurrent lookups of one collection share one describe call
+        if task is None or task.done() or task.get_loop() is not asyncio.get_running_loop():
+            task = self._describing[name] = asyncio.ensure_future(self._load_details(name))
+        return await asyncio.shield(task)
+
+    async def list(self) -> List[CollectionInfo]:
+        """Every collection in the snapshot; details not described yet are None."""
+        await self._ensure_fresh()
+        infos = []
+        for name in sorted(self._names):
+            entry = self._details.get(name)
+            infos.append(entry[1] if entry is not None else CollectionInfo(name, None, None, None))
+        return infos
+
+    def _missed(self, name: str) -> bool:
+        at = self._misses.get(name)
+        return at is not None and time.monotonic() - at < self.miss_ttl
+
+    def _remember_miss(self, name: str) -> None:
+        now = time.monotonic()
+        self._misses.pop(name, None)
+        self._misses[name] = now
+        # Oldest first: drop expired entries, and the oldest beyond the cap (names come from clients)
+        while self._misses:
+            oldest, at = next(iter(self._misses.items()))
+            if now - at < self.miss_ttl and len(self._misses) <= self.MAX_MISSES:
+                break
+            del self._misses[oldest]
+
+    async def get(self, name: str) -> Optional[CollectionInfo]:
+        """Info for `name`; raises 404 if Qdrant does not have it, None if Qdrant is unreachable."""
+        try:
+            await self._ensure_fresh()
+        except Exception as e:
+            if self._version is None:
+                print("Warning: collection cache unavailable, skipping local checks:", e)
+                return None
+        if name not in self._names:
+            if self._missed(name):
+                raise HTTPException(status_code=404, detail=f"Collection '{name}' not found")
+            # Not in the snapshot is not proof of absence: it may have been created since
+            try:
+                exists = await get_client().collection_exists(name)
+            except Exception:
+                return None
+            if not exists:
+                self._remember_miss(name)
+                raise HTTPException(status_code=404, detail=f"Collection '{name}' not found")
+            self._names.add(name)
+        return await self._info(name)
+
+    def invalidate(self) -> None:
+        """Force a reload here and in every other worker (after create or delete)."""
+        self._version = None
+        self._misses.clear()
+        self._shared.bump()
+
+    async def _refresh_loop(self) -> None:
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                print("Warning: collection cache refresh failed:", e)
+            await asyncio.sleep(self.refresh_interval)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._refresh_loop())
+
+    async def stop(self) -> None:
+        if self._redescribing is not None and not self._redescribing.done():
+            self._redescribing.cancel()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+def _log_describe_failure(task: asyncio.Task) -> None:
+    if not task.cancelled() and task.exception() is not None:
+        print("Warning: collection cache describe failed:", task.exception())
+
+collection_cache = CollectionCache(refresh_interval=settings.COLLECTION_CACHE_REFRESH)
+
+async def check_collection(collection: str, dim: Optional[int] = None) -> Optional[CollectionInfo]:
+    """Fail fast with 404 for unknown collections and 400 for a vector dimension mismatch."""
+    info = await collection_cache.get(collection)
+    if dim is not None and info is not None and info.vector_size is not None and info.vector_size != dim:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Vector dimension {dim} does not match collection '{collection}' vector_size {info.vector_size}",
+        )
+    return info
@@ -1,4 +1,5 @@
 import os
+import tempfile
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -9,6 +10,12 @@ def _int(env_name: str, default: int):
     except (TypeError, ValueError):
         return default
 
+def _bool(env_name: str, default: bool):
+    value = os.getenv(env_name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
 class Settings:
     # Database
     DB_USER = os.getenv("DB_USER", "root")
@@ -16,9 +23,90 @@ class Settings:
     DB_HOST = os.getenv("DB_HOST", "localhost")
     DB_PORT = _int("DB_PORT", 3306)
     DB_NAME = os.getenv("DB_NAME", "qdrant_manager")
+    DATABASE_URL = os.getenv("DATABASE_URL", "")
 
     # Qdrant
     QDRANT_URL = os.getenv("QDRANT_URL", "http://localhost:6333")
+    # Several endpoints of one cluster, comma-separated; the first takes writes. Overrides QDRANT_URL.
+    QDRANT_URLS = os.getenv("QDRANT_URLS", "")
+    QDRANT_EJECT_AFTER = _int("QDRANT_EJECT_AFTER", 3)  # consecutive node errors before ejection
+    QDRANT_EJECT_SECONDS = _int("QDRANT_EJECT_SECONDS", 30)
+    QDRANT_OUTLIER_FACTOR = _int("QDRANT_OUTLIER_FACTOR", 3)  # x median latency of the other nodes
+    QDRANT_HEDGE_AFTER_MS = _int("QDRANT_HEDGE_AFTER_MS", 100)  # 0 disables hedged searches
+    QDRANT_PREFER_GRPC = _bool("QDRANT_PREFER_GRPC", False)
+    QDRANT_GRPC_PORT = _int("QDRANT_GRPC_PORT", 6334)
+    QDRANT_TIMEOUT = _int("QDRANT_TIMEOUT", 10)
+    QDRANT_MAX_CONNECTIONS = _int("QDRANT_MAX_CONNECTIONS", 100)
+    QDRANT_MAX_KEEPALIVE = _int("QDRANT_MAX_KEEPALIVE", 20)
+    QDRANT_KEEPALIVE_EXPIRY = _int("QDRANT_KEEPALIVE_EXPIRY", 30)
+
+    # Admission control in front of Qdrant (limits are per worker)
+    ADMISSION_ENABLED = _bool("ADMISSION_ENABLED", True)
+    ADMISSION_COLLECTION_LIMIT = _int("ADMISSION_COLLECTION_LIMIT", 64)  # concurrent calls per collection
+    ADMISSION_BULK_LIMIT = _int("ADMISSION_BULK_LIMIT", 16)  # of which writes/scrolls at most
+    ADMISSION_USER_LIMIT = _int("ADMISSION_USER_LIMIT", 32)  # concurrent calls per user
+    ADMISSION_INTERACTIVE_TIMEOUT_MS = _int("ADMISSION_INTERACTIVE_TIMEOUT_MS", 500)
+    ADMISSION_BULK_TIMEOUT_MS = _int("ADMISSION_BULK_TIMEOUT_MS", 5000)
+    ADMISSION_RETRY_AFTER = _int("ADMISSION_RETRY_AFTER", 1)
+
+    # Collection metadata cache
+    COLLECTION_CACHE_REFRESH = _int("COLLECTION_CACHE_REFRESH", 30)  # seconds between background reloads
+
+    # Batch ingestion
+    INGEST_CHUNK_SIZE = _int("INGEST_CHUNK_SIZE", 256)
+    INGEST_MAX_CHUNK_SIZE = _int("INGEST_MAX_CHUNK_SIZE", 2048)
+    INGEST_PARALLELISM = _int("INGEST_PARALLELISM", 4)
+    INGEST_MAX_ERRORS = _int("INGEST_MAX_ERRORS", 100)
+
+    # Single-point upsert coalescing
+    UPSERT_COALESCE_ENABLED = _bool("UPSERT_COALESCE_ENABLED", False)
+    UPSERT_COALESCE_WINDOW_MS = _int("UPSERT_COALESCE_WINDOW_MS", 5)
+    UPSERT_COALESCE_MAX_BATCH = _int("UPSERT_COALESCE_MAX_BATCH", 256)
+    UPSERT_COALESCE_ACK = os.getenv("UPSERT_COALESCE_ACK", "durable")  # durable | accepted
+
+    # Collection export
+    EXPORT_PAGE_SIZE = _int("EXPORT_PAGE_SIZE", 512)
+
+    # Batch search
+    SEARCH_BATCH_MAX_QUERIES = _int("SEARCH_BATCH_MAX_QUERIES", 1000)
+
+    # Search result cache
+    SEARCH_CACHE_ENABLED = _bool("SEARCH_CACHE_ENABLED", False)
+    SEARCH_CACHE_MAX_BYTES = _int("SEARCH_CACHE_MAX_BYTES", 64 * 1024 * 1024)
+    SEARCH_CACHE_TTL = _int("SEARCH_CACHE_TTL", 30)
+    SEARCH_CACHE_TTLS = os.getenv("SEARCH_CACHE_TTLS", "")  # e.g. "products:300,events:0"
+    SEARCH_CACHE_QUANTIZE = _int("SEARCH_CACHE_QUANTIZE", -1)  # decimals to round vectors to, -1 = exact
+
+    # In-process replicas of small, hot collections, searched exactly with NumPy
+    REPLICA_COLLECTIONS = os.getenv("REPLICA_COLLECTIONS", "")  # comma-separated collection names
+    REPLICA_MAX_POINTS = _int("REPLICA_MAX_POINTS", 50000)
+    REPLICA_RESYNC_SECONDS = _int("REPLICA_RESYNC_SECONDS", 60)
+    REPLICA_SHARED = _bool("REPLICA_SHARED", False)  # one memory-mapped snapshot for all workers
+
+    # Coalescing of identical concurrent searches
+    SEARCH_SINGLEFLIGHT_ENABLED = _bool("SEARCH_SINGLEFLIGHT_ENABLED", True)
+
+    # Background jobs (each worker runs up to JOB_CONCURRENCY of them)
+    JOBS_ENABLED = _bool("JOBS_ENABLED", True)
+    JOB_CONCURRENCY = _int("JOB_CONCURRENCY", 1)
+    JOB_POLL_SECONDS = _int("JOB_POLL_SECONDS", 2)
+    JOB_LEASE_SECONDS = _int("JOB_LEASE_SECONDS", 60)  # a job whose worker stopped heartbeating this long is taken over
+    JOB_BATCH_SIZE = _int("JOB_BATCH_SIZE", 256)
+    JOB_MAX_BATCH_SIZE = _int("JOB_MAX_BATCH_SIZE", 2048)
+    JOB_PARALLELISM = _int("JOB_PARALLELISM", 2)  # chunks in flight per job
+    JOB_MAX_PARALLELISM = _int("JOB_MAX_PARALLELISM", 8)
+    JOB_MAX_POINTS_PER_SECOND = _int("JOB_MAX_POINTS_PER_SECOND", 0)  # cap for every job, 0 = none
+    JOB_CHUNK_RETRIES = _int("JOB_CHUNK_RETRIES", 3)
+    JOB_MAX_DELETE_IDS = _int("JOB_MAX_DELETE_IDS", 1000000)
+
+    # Audit (write-behind sink)
+    AUDIT_MODE = os.getenv("AUDIT_MODE", "async")  # async | sync
+    AUDIT_QUEUE_SIZE = _int("AUDIT_QUEUE_SIZE", 10000)
+    AUDIT_BATCH_SIZE = _int("AUDIT_BATCH_SIZE", 500)
+    AUDIT_FLUSH_INTERVAL_MS = _int("AUDIT_FLUSH_INTERVAL_MS", 1000)
+    AUDIT_OVERFLOW = os.getenv("AUDIT_OVERFLOW", "block")  # block | drop | spill
+    AUDIT_BLOCK_TIMEOUT_MS = _int("AUDIT_BLOCK_TIMEOUT_MS", 1000)
+    AUDIT_SPILL_PATH = os.getenv("AUDIT_SPILL_PATH", "audit_spill.jsonl")
 
     # JWT
     SECRET_KEY = os.getenv("SECRET_KEY", "change-me-to-a-long-random-string")
@@ -26,8 +114,25 @@ class Settings:
     ACCESS_TOKEN_EXPIRE_SECONDS = _int("ACCESS_TOKEN_EXPIRE_SECONDS", 1800)
     REFRESH_TOKEN_EXPIRE_SECONDS = _int("REFRESH_TOKEN_EXPIRE_SECONDS", 2592000)
 
+    # Password hashing pool (per gunicorn worker)
+    PASSWORD_HASH_WORKERS = _int("PASSWORD_HASH_WORKERS", 2)  # 0 = use the threadpool
+    PASSWORD_HASH_MAX_PENDING = _int("PASSWORD_HASH_MAX_PENDING", 32)
+    PASSWORD_HASH_RETRY_AFTER = _int("PASSWORD_HASH_RETRY_AFTER", 1)
+
+    # Principal cache (per worker, invalidated across workers via SHARED_STATE_DIR)
+    PRINCIPAL_CACHE_SIZE = _int("PRINCIPAL_CACHE_SIZE", 10000)
+    PRINCIPAL_CACHE_TTL = _int("PRINCIPAL_CACHE_TTL", 60)
+    SHARED_STATE_DIR = os.getenv("SHARED_STATE_DIR", os.path.join(tempfile.gettempdir(), "qdrant-manager"))
+
+    # Startup and readiness
+    AUTO_MIGRATE = _bool("AUTO_MIGRATE", False)  # create tables at worker startup instead of scripts/migrate.py
+    READY_CACHE_SECONDS = _int("READY_CACHE_SECONDS", 5)  # /ready reuses a dependency check this long
+    READY_TIMEOUT_MS = _int("READY_TIMEOUT_MS", 2000)  # per dependency check
+    READY_POOL_TIMEOUT_MS = _int("READY_POOL_TIMEOUT_MS", 250)  # wait for the probe's own DB connection
+
     # App
     CORS_ORIGINS = os.getenv("CORS_ORIGINS", "*")
     APP_NAME = os.getenv("APP_NAME", "Qdrant Admin API")
+    METRICS_ENABLED = _bool("METRICS_ENABLED", True)
 
 settings = Settings()
\ No newline at end of file
@@ -0,0 +1,16 @@
+import base64
+import binascii
+import json
+from typing import Any
+
+def encode_cursor(value: Any) -> str:
+    """Wrap a backend position (scroll offset, last id, ...) into an opaque URL-safe cursor."""
+    raw = json.dumps(value, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str) -> Any:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        return json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (binascii.Error, ValueError, UnicodeError):
+        raise ValueError("Invalid cursor")
@@ -1,24 +1,55 @@
 import pymysql
 pymysql.install_as_MySQLdb()
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.pool import QueuePool
 from .config import settings
+from .metrics import DB_POOL_WAIT_SECONDS, Timer
 
-DATABASE_URL = (
+# DATABASE_URL overrides the MySQL settings, e.g. sqlite:///bench.db for local benchmarks
+DATABASE_URL = settings.DATABASE_URL or (
     f"mysql+pymysql://{settings.DB_USER}:{settings.DB_PASSWORD}"
     f"@{settings.DB_HOST}:{settings.DB_PORT}/{settings.DB_NAME}"
     "?charset=utf8mb4"
 )
 
+class TimedQueuePool(QueuePool):
+    """QueuePool that records how long each connection checkout waits."""
+
+    def _do_get(self):
+        with Timer(DB_POOL_WAIT_SECONDS):
+            return super()._do_get()
+
 engine = create_engine(
     DATABASE_URL,
+    poolclass=TimedQueuePool,
     pool_pre_ping=True,
     pool_recycle=280,
     pool_size=5,
     max_overflow=10,
+    connect_args={"check_same_thread": False} if DATABASE_URL.startswith("sqlite") else {},
+)
+
+# /ready checks the database on its own single connection: a worker whose request pool is
+# busy is still healthy, and a probe stuck on a hung server holds one connection at most
+probe_engine = create_engine(
+    DATABASE_URL,
+    pool_pre_ping=True,
+    pool_recycle=280,
+    pool_size=1,
+    max_overflow=0,
+    pool_timeout=settings.READY_POOL_TIMEOUT_MS / 1000,
+    connect_args={"check_same_thread": False} if DATABASE_URL.startswith("sqlite") else {},
 )
 
+if engine.dialect.name == "mysql":
+    @event.listens_for(engine, "connect")
+    def _utc_session(dbapi_connection, connection_record):
+        # The app writes UTC timestamps (datetime.utcnow()); make NOW() and server defaults agree
+        with dbapi_connection.cursor() as cursor:
+            cursor.execute("SET time_zone = '+00:00'")
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
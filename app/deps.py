@@ -1,32 +1,60 @@
 from fastapi import Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from typing import Optional
 from sqlalchemy.orm import Session
 from .security import decode_token
-from .db import get_db
+from .db import SessionLocal
 from .models import User
+from .principals import Principal, current_principal, principal_cache
+from .metrics import JWT_DECODE_SECONDS, PRINCIPAL_LOOKUPS, USER_LOOKUP_SECONDS, Timer
 
 bearer = HTTPBearer(auto_error=True)
 
-def get_current_user(
+def find_user(db: Session, email: str) -> Optional[User]:
+    """User row by email, or None. Blocking; async callers run it in the threadpool."""
+    return db.query(User).filter(User.email == email).first()
+
+def _load_principal(email: str) -> Principal:
+    """Database lookup on a principal cache miss (runs in the threadpool)."""
+    db = SessionLocal()
+    try:
+        with Timer(USER_LOOKUP_SECONDS):
+            user = find_user(db, email)
+        if not user:
+            raise HTTPException(status_code=401, detail="User not found")
+        principal = Principal.from_user(user)
+    finally:
+        db.close()
+    principal_cache.put(principal)
+    return principal
+
+async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(bearer),
-    db: Session = Depends(get_db),
-) -> User:
+) -> Principal:
+    # Async so the principal set below is visible to the endpoint (sync dependencies run in a copied context)
     try:
-        payload = decode_token(credentials.credentials)
+        with Timer(JWT_DECODE_SECONDS):
+            payload = decode_token(credentials.credentials)
         email = payload.get("sub")
         typ = payload.get("typ")
         if not email or typ != "access":
             raise HTTPException(status_code=401, detail="Invalid token")
-        user = db.query(User).filter(User.email == email).first()
-        if not user:
-            raise HTTPException(status_code=401, detail="User not found")
-        return user
+        principal = principal_cache.get(email)
+        if principal is not None:
+            PRINCIPAL_LOOKUPS.labels("hit").inc()
+        else:
+            # Only a cache miss needs a database connection
+            PRINCIPAL_LOOKUPS.labels("miss").inc()
+            principal = await run_in_threadpool(_load_principal, email)
     except Exception:
         raise HTTPException(status_code=401, detail="Invalid or expired token")
+    current_principal.set(principal)
+    return principal
 
 def require_role(*roles):
-    def _inner(user: User = Depends(get_current_user)) -> User:
+    def _inner(user: Principal = Depends(get_current_user)) -> Principal:
         if user.role not in roles:
             raise HTTPException(status_code=403, detail="Forbidden")
         return user
-    return _inner
\ No newline at end of file
+    return _inner
@@ -10,4 +10,43 @@ class DistanceEnum(str, Enum):
     COSINE = "Cosine"
     DOT = "Dot"
     EUCLID = "Euclid"
-    MANHATTAN = "Manhattan"
\ No newline at end of file
+    MANHATTAN = "Manhattan"
+
+class QuantizationEnum(str, Enum):
+    """Enum for Qdrant vector quantization kinds; "disabled" removes it on update."""
+    SCALAR = "scalar"
+    PRODUCT = "product"
+    DISABLED = "disabled"
+
+class CompressionEnum(str, Enum):
+    """Enum for product quantization compression ratios."""
+    X4 = "x4"
+    X8 = "x8"
+    X16 = "x16"
+    X32 = "x32"
+    X64 = "x64"
+
+class JobTypeEnum(str, Enum):
+    """Enum for background job kinds."""
+    MIGRATE = "migrate"
+    DELETE = "delete"
+
+class JobStatusEnum(str, Enum):
+    """Enum for background job states; "cancelling" waits for the running chunk to finish."""
+    QUEUED = "queued"
+    RUNNING = "running"
+    CANCELLING = "cancelling"
+    CANCELLED = "cancelled"
+    FAILED = "failed"
+    SUCCEEDED = "succeeded"
+
+class PayloadSchemaEnum(str, Enum):
+    """Enum for Qdrant payload index types."""
+    KEYWORD = "keyword"
+    INTEGER = "integer"
+    FLOAT = "float"
+    GEO = "geo"
+    TEXT = "text"
+    BOOL = "bool"
+    DATETIME = "datetime"
+    UUID = "uuid"
@@ -0,0 +1,78 @@
+import json
+from collections import OrderedDict
+from typing import Any, List, Optional, Set
+from fastapi import HTTPException
+from pydantic import ValidationError
+from qdrant_client.models import FieldCondition, Filter, IsEmptyCondition, IsNullCondition, NestedCondition
+from .collection_cache import collection_cache
+from .metrics import FILTER_UNINDEXED
+
+# Field names come from client filters: remember the last few warned about, not all of them
+_WARNED_MAX = 1024
+_warned: "OrderedDict[tuple, None]" = OrderedDict()
+
+def parse_filter(raw: Optional[str]) -> Optional[Filter]:
+    """Filter from a JSON string (query parameter or header); 400 if it is not a valid Qdrant filter."""
+    if not raw:
+        return None
+    try:
+        return Filter.model_validate(json.loads(raw))
+    except (ValueError, ValidationError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid filter: {e}")
+
+def filter_key(query_filter: Optional[Filter]) -> Optional[str]:
+    """Canonical form of a filter for cache and single-flight keys."""
+    return query_filter.model_dump_json(exclude_none=True) if query_filter is not None else None
+
+def _conditions(value: Any) -> List[Any]:
+    if value is None:
+        return []
+    return value if isinstance(value, list) else [value]
+
+def filter_fields(query_filter: Filter, prefix: str = "") -> Set[str]:
+    """Payload keys a filter reads, with nested keys in index form ("diet[].food")."""
+    fields: Set[str] = set()
+    conditions = _conditions(query_filter.must) + _conditions(query_filter.should) + _conditions(query_filter.must_not)
+    if query_filter.min_should is not None:
+        conditions += query_filter.min_should.conditions
+    for condition in conditions:
+        if isinstance(condition, FieldCondition):
+            fields.add(prefix + condition.key)
+        elif isinstance(condition, IsEmptyCondition):
+            fields.add(prefix + condition.is_empty.key)
+        elif isinstance(condition, IsNullCondition):
+            fields.add(prefix + condition.is_null.key)
+        elif isinstance(condition, NestedCondition):
+            fields |= filter_fields(condition.nested.filter, f"{prefix}{condition.nested.key}[].")
+        elif isinstance(condition, Filter):
+            fields |= filter_fields(condition, prefix)
+    return fields
+
+async def unindexed_fields(collection: str, query_filter: Optional[Filter]) -> List[str]:
+    """
+    Fields in `query_filter` without a payload index on `collection`. The request is counted
+    in a per-collection metric and each field is logged once per worker (within a bounded
+    memory of recent warnings), so missing indexes show up before they hurt.
+    """
+    if query_filter is None:
+        return []
+    try:
+        info = await collection_cache.get(collection)
+    except HTTPException:
+        return []
+    if info is None:
+        return []
+    missing = sorted(filter_fields(query_filter) - set(info.indexed_fields))
+    if missing:
+        # Only existing collections get here, so the label stays bounded
+        FILTER_UNINDEXED.labels(collection).inc()
+    for field in missing:
+        key = (collection, field)
+        if key in _warned:
+            _warned.move_to_end(key)
+            continue
+        _warned[key] = None
+        if len(_warned) > _WARNED_MAX:
+            _warned.popitem(last=False)
+        print(f"Warning: filter on unindexed payload field {collection}.{field}")
+    return missing
@@ -0,0 +1,123 @@
+import asyncio
+import json
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+from fastapi import HTTPException, Request
+from pydantic import ValidationError
+from .schemas import PointIn
+
+NDJSON_CONTENT_TYPES = ("application/x-ndjson", "application/jsonl", "application/ndjson")
+
+async def iter_rows(request: Request) -> AsyncIterator[Tuple[int, Any]]:
+    """
+    Yield (row_number, decoded_row) pairs from a JSON array or a streamed NDJSON body.
+
+    NDJSON bodies are decoded line by line as the chunks arrive, so the full body is
+    never held in memory. Rows that are not valid JSON are yielded as the exception.
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    if content_type in NDJSON_CONTENT_TYPES:
+        row = 0
+        buffer = b""
+        async for chunk in request.stream():
+            buffer += chunk
+            *lines, buffer = buffer.split(b"\n")
+            for line in lines:
+                if not line.strip():
+                    continue
+                try:
+                    yield row, json.loads(line)
+                except ValueError as e:
+                    yield row, e
+                row += 1
+        if buffer.strip():
+            try:
+                yield row, json.loads(buffer)
+            except ValueError as e:
+                yield row, e
+        return
+
+    try:
+        rows = json.loads(await request.body())
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Body must be a JSON array or NDJSON")
+    if not isinstance(rows, list):
+        raise HTTPException(status_code=400, detail="Body must be a JSON array of points")
+    for row, obj in enumerate(rows):
+        yield row, obj
+
+async def ingest(
+    rows: AsyncIterator[Tuple[int, Any]],
+    upsert_chunk: Callable[[List[PointIn]], Awaitable[None]],
+    chunk_size: int,
+    parallelism: int,
+    max_errors: int,
+    dimension: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Validate rows incrementally, group them into chunks and upsert up to
+    `parallelism` chunks concurrently. Returns a per-chunk summary.
+    Rows whose vector length differs from `dimension` are rejected locally.
+    """
+    semaphore = asyncio.Semaphore(parallelism)
+    tasks: List[asyncio.Task] = []
+    errors: List[Dict[str, Any]] = []
+    invalid = 0
+    received = 0
+
+    async def _run(index: int, start_row: int, points: List[PointIn]) -> Dict[str, Any]:
+        try:
+            await upsert_chunk(points)
+            return {"index": index, "first_row": start_row, "count": len(points), "status": "success"}
+        except Exception as e:
+            return {"index": index, "first_row": start_row, "count": len(points), "status": "failed", "error": str(e)}
+        finally:
+            semaphore.release()
+
+    async def _flush(start_row: int, points: List[PointIn]) -> None:
+        # Acquire before scheduling so at most `parallelism` chunks are buffered in flight
+        await semaphore.acquire()
+        tasks.append(asyncio.create_task(_run(len(tasks), start_row, points)))
+
+    chunk: List[PointIn] = []
+    chunk_start = 0
+    try:
+        async for row, obj in rows:
+            received += 1
+            try:
+                if isinstance(obj, Exception):
+                    raise ValueError(f"Invalid JSON: {obj}")
+                point = PointIn.model_validate(obj)
+                if dimension is not None and len(point.vector) != dimension:
+                    raise ValueError(f"Vector dimension {len(point.vector)} does not match vector_size {dimension}")
+            except (ValidationError, ValueError, TypeError) as e:
+                invalid += 1
+                if len(errors) < max_errors:
+                    errors.append({"row": row, "error": str(e)})
+                continue
+            if not chunk:
+                chunk_start = row
+            chunk.append(point)
+            if len(chunk) >= chunk_size:
+                await _flush(chunk_start, chunk)
+                chunk = []
+        if chunk:
+            await _flush(chunk_start, chunk)
+    except BaseException:
+        # The body could not be read to the end (client gone, bad encoding): stop the chunks
+        # already sent instead of leaving them running with nobody to collect their errors
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+    chunks = list(await asyncio.gather(*tasks))
+    upserted = sum(c["count"] for c in chunks if c["status"] == "success")
+    failed = sum(c["count"] for c in chunks if c["status"] != "success")
+    return {
+        "received": received,
+        "upserted": upserted,
+        "failed": failed,
+        "invalid": invalid,
+        "errors": errors,
+        "chunks": chunks,
+    }
@@ -0,0 +1,33 @@
+import os
+import tempfile
+from typing import Tuple
+from .config import settings
+
+class SharedVersion:
+    """
+    A version token shared by every worker process on the host.
+
+    The token is the (inode, mtime) of a small file under SHARED_STATE_DIR, so reading
+    it is a single stat() call. `bump()` atomically replaces the file, which changes the
+    token for all workers; they compare it with the token they cached against.
+    """
+
+    def __init__(self, name: str):
+        self.path = os.path.join(settings.SHARED_STATE_DIR, f"{name}.version")
+
+    def current(self) -> Tuple[int, int]:
+        try:
+            st = os.stat(self.path)
+            return (st.st_ino, st.st_mtime_ns)
+        except OSError:
+            return (0, 0)
+
+    def bump(self) -> None:
+        try:
+            os.makedirs(settings.SHARED_STATE_DIR, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=settings.SHARED_STATE_DIR)
+            with os.fdopen(fd, "w") as f:
+                f.write(str(os.getpid()))
+            os.replace(tmp, self.path)
+        except OSError as e:
+            print("Warning: could not bump shared version:", self.path, e)
@@ -0,0 +1,449 @@
+import asyncio
+import os
+import socket
+import time
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+from fastapi.concurrency import run_in_threadpool
+from qdrant_client.models import Distance, PointIdsList, PointStruct, VectorParams
+from sqlalchemy import and_, or_, update
+from .config import settings
+from .db import SessionLocal
+from .enums import JobStatusEnum, JobTypeEnum
+from .metrics import JOB_EVENTS, JOB_POINTS, JOBS_RUNNING
+from .models import Job
+from .principals import Principal, current_principal
+from .qdrant import get_client
+from .replica import replicas
+from .schemas import JobDeleteIn, JobMigrateIn
+from .search_cache import search_cache
+from .collection_cache import collection_cache
+from .tuning import hnsw_config, optimizers_config, quantization_config
+
+# States a job can be resumed from, and states it can be cancelled from
+RESUMABLE = (JobStatusEnum.FAILED.value, JobStatusEnum.CANCELLED.value)
+ACTIVE = (JobStatusEnum.QUEUED.value, JobStatusEnum.RUNNING.value, JobStatusEnum.CANCELLING.value)
+SAVE_INTERVAL = 1.0  # seconds between progress writes
+
+class JobCancelled(Exception):
+    """The job was cancelled through the API."""
+
+class LeaseLost(Exception):
+    """Another worker took the job over after this one stopped heartbeating."""
+
+def job_dict(job: Job) -> Dict[str, Any]:
+    return {
+        "id": job.id,
+        "type": job.type,
+        "status": job.status,
+        "collection": job.collection,
+        "params": {k: v for k, v in (job.params or {}).items() if k != "ids"},
+        "total": job.total,
+        "done": job.done,
+        "progress": round(job.done / job.total, 4) if job.total else None,
+        "stats": job.stats,
+        "error": job.error,
+        "created_by": job.created_by,
+        "created_at": job.created_at,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at,
+    }
+
+def create_job(actor: Principal, type: JobTypeEnum, collection: str, params: Dict[str, Any]) -> Dict[str, Any]:
+    db = SessionLocal()
+    try:
+        job = Job(
+            type=type.value, status=JobStatusEnum.QUEUED.value, collection=collection, params=params,
+            created_by=actor.id,
+        )
+        db.add(job)
+        db.commit()
+        db.refresh(job)
+        JOB_EVENTS.labels(job.type, "submitted").inc()
+        return job_dict(job)
+    finally:
+        db.close()
+
+def _claim(owner: str, lease_seconds: int) -> Optional[Dict[str, Any]]:
+    """Atomically take one queued job, or one whose runner stopped heartbeating."""
+    db = SessionLocal()
+    try:
+        now = datetime.utcnow()
+        expired = Job.heartbeat_at < now - timedelta(seconds=lease_seconds)
+        # A cancel that arrived while its runner was dying completes here
+        db.execute(
+            update(Job)
+            .where(Job.status == JobStatusEnum.CANCELLING.value, expired)
+            .values(status=JobStatusEnum.CANCELLED.value, owner=None, finished_at=now)
+        )
+        db.commit()
+        claimable = or_(
+            Job.status == JobStatusEnum.QUEUED.value,
+            and_(Job.status == JobStatusEnum.RUNNING.value, expired),
+        )
+        for (job_id,) in db.query(Job.id).filter(claimable).order_by(Job.id).limit(5).all():
+            result = db.execute(
+                update(Job)
+                .where(Job.id == job_id, claimable)
+                .values(status=JobStatusEnum.RUNNING.value, owner=owner, heartbeat_at=now, started_at=now,
+                        finished_at=None, error=None)
+            )
+            db.commit()
+            if result.rowcount == 1:
+                job = db.get(Job, job_id)
+                return {
+                    "id": job.id, "type": job.type, "collection": job.collection, "params": job.params,
+                    "checkpoint": job.checkpoint, "total": job.total, "done": job.done,
+                }
+        return None
+    finally:
+        db.close()
+
+def _heartbeat(owner: str, job_ids: List[int]) -> None:
+    db = SessionLocal()
+    try:
+        db.execute(
+            update(Job).where(Job.id.in_(job_ids), Job.owner == owner).values(heartbeat_at=datetime.utcnow())
+        )
+        db.commit()
+    finally:
+        db.close()
+
+def _save(owner: str, job_id: int, values: Dict[str, Any]) -> Optional[str]:
+    """Write progress if we still own the job; returns its status, None if the lease was lost."""
+    db = SessionLocal()
+    try:
+        result = db.execute(
+            update(Job).where(Job.id == job_id, Job.owner == owner).values(heartbeat_at=datetime.utcnow(), **values)
+        )
+        db.commit()
+        if result.rowcount != 1:
+            return None
+        return db.query(Job.status).filter(Job.id == job_id).scalar()
+    finally:
+        db.close()
+
+def _finish(owner: str, job_id: int, status: JobStatusEnum, values: Dict[str, Any]) -> None:
+    db = SessionLocal()
+    try:
+        finished_at = None if status == JobStatusEnum.QUEUED else datetime.utcnow()
+        db.execute(
+            update(Job)
+            .where(Job.id == job_id, Job.owner == owner)
+            .values(status=status.value, owner=None, finished_at=finished_at, **values)
+        )
+        db.commit()
+    finally:
+        db.close()
+
+def _limit(requested: Optional[int], default: int, cap: int) -> int:
+    return max(1, min(requested or default, cap))
+
+class JobContext:
+    """
+    One run of a job: its parameters, effective limits and progress, and the chunk
+    pipeline handlers use. Progress (points done and a checkpoint to resume from) is
+    written at most once a second, which is also when cancellation is noticed; chunks
+    already in flight then finish, so their work is checkpointed rather than redone on
+    resume. A worker shutdown stops them at once and the job resumes from its last
+    checkpoint elsewhere.
+    """
+
+    def __init__(self, owner: str, job: Dict[str, Any]):
+        self.owner = owner
+        self.id = job["id"]
+        self.type = job["type"]
+        self.collection = job["collection"]
+        self.params = job["params"] or {}
+        self.checkpoint = job["checkpoint"]
+        self.total = job["total"]
+        self.done = job["done"] or 0
+        self.batch_size = _limit(self.params.get("batch_size"), settings.JOB_BATCH_SIZE, settings.JOB_MAX_BATCH_SIZE)
+        self.parallelism = _limit(self.params.get("parallelism"), settings.JOB_PARALLELISM, settings.JOB_MAX_PARALLELISM)
+        rate = self.params.get("max_points_per_second") or settings.JOB_MAX_POINTS_PER_SECOND
+        if settings.JOB_MAX_POINTS_PER_SECOND:
+            rate = min(rate, settings.JOB_MAX_POINTS_PER_SECOND)
+        self.rate = rate or None
+        self._started = time.monotonic()
+        self._done_at_start = self.done
+        self._saved_at = 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        elapsed = time.monotonic() - self._started
+        return {
+            "batch_size": self.batch_size,
+            "parallelism": self.parallelism,
+            "max_points_per_second": self.rate,
+            "points_per_second": round((self.done - self._done_at_start) / elapsed, 1) if elapsed > 0 else None,
+        }
+
+    def values(self) -> Dict[str, Any]:
+        return {"checkpoint": self.checkpoint, "done": self.done, "total": self.total, "stats": self.stats()}
+
+    async def save(self, force: bool = False) -> None:
+        if not force and time.monotonic() - self._saved_at < SAVE_INTERVAL:
+            return
+        self._saved_at = time.monotonic()
+        status = await run_in_threadpool(_save, self.owner, self.id, self.values())
+        if status is None:
+            raise LeaseLost()
+        if status == JobStatusEnum.CANCELLING:
+            raise JobCancelled()
+
+    async def retry(self, call: Callable[[], Awaitable[Any]]) -> Any:
+        """Await `call()`, retrying with backoff up to JOB_CHUNK_RETRIES times."""
+        for attempt in range(settings.JOB_CHUNK_RETRIES + 1):
+            try:
+                return await call()
+            except Exception as e:
+                if attempt == settings.JOB_CHUNK_RETRIES:
+                    raise
+                print(f"Warning: job {self.id} chunk failed (attempt {attempt + 1}), retrying:", e)
+                await asyncio.sleep(0.5 * 2 ** attempt)
+
+    async def run_chunks(
+        self,
+        chunks: AsyncIterator[Tuple[Any, List[Any]]],
+        apply: Callable[[List[Any]], Awaitable[None]],
+    ) -> None:
+        """
+        Apply `apply` to every (next_checkpoint, items) chunk with up to `parallelism`
+        chunks in flight, paced to `rate` points per second. The checkpoint only moves
+        past a chunk once it and every chunk before it have been applied, so a resumed
+        run may repeat a little work but never skips any. On cancel or failure the chunks
+        in flight are awaited before the error propagates.
+        """
+        semaphore = asyncio.Semaphore(self.parallelism)
+        order: deque = deque()  # [next_checkpoint, count, applied] in submission order
+        tasks: set = set()
+        failures: List[BaseException] = []
+        start, scheduled = time.monotonic(), 0
+
+        async def _run(entry: list, items: List[Any]) -> None:
+            try:
+                await self.retry(lambda: apply(items))
+                entry[2] = True
+                while order and order[0][2]:
+                    checkpoint, count, _ = order.popleft()
+                    self.checkpoint = checkpoint
+                    self.done += count
+                    JOB_POINTS.labels(self.type).inc(count)
+            except Exception as e:
+                failures.append(e)
+            finally:
+                semaphore.release()
+
+        try:
+            async for checkpoint, items in chunks:
+                if self.rate:
+                    delay = start + scheduled / self.rate - time.monotonic()
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                await semaphore.acquire()
+                if failures:
+                    semaphore.release()
+                    break
+                entry = [checkpoint, len(items), False]
+                order.append(entry)
+                scheduled += len(items)
+                task = asyncio.ensure_future(_run(entry, items))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+                await self.save()
+            if tasks:
+                await asyncio.gather(*tasks)
+        except asyncio.CancelledError:
+            for task in tasks:
+                task.cancel()
+            raise
+        except BaseException:
+            # Qdrant is already applying these; let them land and move the checkpoint
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+        if failures:
+            raise failures[0]
+        await self.save(force=True)
+
+async def run_migrate(ctx: JobContext) -> None:
+    """
+    Copy every point of `source` into `target`, creating `target` with the job's vector
+    settings. An existing target is only written to with `overwrite` and matching vectors.
+    """
+    data = JobMigrateIn.model_validate(ctx.params)
+    client = get_client()
+    info = await client.get_collection(data.source)
+    params = info.config.params.vectors
+    if not isinstance(params, VectorParams):
+        raise ValueError("only collections with a single unnamed vector can be migrated")
+    checkpoint = ctx.checkpoint or {}
+    distance = Distance(data.distance.value) if data.distance else params.distance
+    if await client.collection_exists(data.target):
+        # A run with a checkpoint has been through this check (or created the target) before
+        if not checkpoint and not data.overwrite:
+            raise ValueError(f"Target collection '{data.target}' already exists; set overwrite to copy into it")
+        target = (await client.get_collection(data.target)).config.params.vectors
+        if not isinstance(target, VectorParams) or target.size != params.size or target.distance != distance:
+            raise ValueError(f"Target collection '{data.target}' exists with different vector settings")
+    else:
+        await client.create_collection(
+            collection_name=data.target,
+            vectors_config=VectorParams(size=params.size, distance=distance, on_disk=data.on_disk),
+            on_disk_payload=data.on_disk_payload,
+            hnsw_config=hnsw_config(data.hnsw),
+            quantization_config=quantization_config(data.quantization),
+            optimizers_config=optimizers_config(data.optimizers),
+        )
+        replicas.drop(data.target)
+        collection_cache.invalidate()
+        # Record that the target is ours, so a resumed run does not take it for someone else's
+        ctx.checkpoint = checkpoint = {"offset": None}
+        await ctx.save(force=True)
+    ctx.total = info.points_count
+    if checkpoint.get("end"):
+        return
+
+    async def pages() -> AsyncIterator[Tuple[Any, List[Any]]]:
+        offset = checkpoint.get("offset")
+        while True:
+            points, offset = await ctx.retry(lambda: client.scroll(
+                collection_name=data.source, limit=ctx.batch_size, offset=offset, with_vectors=True, with_payload=True,
+            ))
+            yield ({"offset": offset, "end": offset is None}, points)
+            if offset is None:
+                return
+
+    async def copy(points: List[Any]) -> None:
+        if not points:
+            return
+        structs = [PointStruct(id=p.id, vector=p.vector, payload=p.payload) for p in points]
+        try:
+            await client.upsert(collection_name=data.target, points=structs, wait=True)
+        except Exception:
+            # Part of the chunk may have been applied
+            replicas.invalidate(data.target)
+            search_cache.invalidate(data.target)
+            raise
+        replicas.upsert(data.target, structs)
+        search_cache.invalidate(data.target)
+
+    await ctx.run_chunks(pages(), copy)
+
+async def run_delete(ctx: JobContext) -> None:
+    """Delete the job's ids from its collection in chunks."""
+    data = JobDeleteIn.model_validate(ctx.params)
+    client = get_client()
+    ids = data.ids
+    ctx.total = len(ids)
+
+    async def chunks() -> AsyncIterator[Tuple[Any, List[Any]]]:
+        for i in range((ctx.checkpoint or {}).get("index", 0), len(ids), ctx.batch_size):
+            yield ({"index": min(i + ctx.batch_size, len(ids))}, ids[i:i + ctx.batch_size])
+
+    async def delete(chunk: List[int]) -> None:
+        try:
+            await client.delete(collection_name=data.collection, points_selector=PointIdsList(points=chunk), wait=True)
+        except Exception:
+            replicas.invalidate(data.collection)
+            search_cache.invalidate(data.collection)
+            raise
+        replicas.delete(data.collection, chunk)
+        search_cache.invalidate(data.collection)
+
+    await ctx.run_chunks(chunks(), delete)
+
+HANDLERS: Dict[str, Callable[[JobContext], Awaitable[None]]] = {
+    JobTypeEnum.MIGRATE.value: run_migrate,
+    JobTypeEnum.DELETE.value: run_delete,
+}
+
+class JobRunner:
+    """
+    Per-worker background task that claims jobs from the `jobs` table and runs up to
+    `concurrency` of them at once.
+
+    Jobs are claimed with a conditional UPDATE, so each runs in exactly one worker; the
+    runner heartbeats the jobs it holds, and a job whose worker has not heartbeated for
+    `lease_seconds` (it crashed or was killed) is taken over by another worker and
+    resumed from its checkpoint. On a clean shutdown running jobs go back to the queue.
+    """
+
+    def __init__(self, enabled: bool, concurrency: int, poll_interval: int, lease_seconds: int):
+        self.enabled = enabled
+        self.concurrency = max(1, concurrency)
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self.owner = ""
+        self._running: Dict[int, asyncio.Task] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self, job: Dict[str, Any]) -> None:
+        ctx = JobContext(self.owner, job)
+        handler = HANDLERS.get(ctx.type)
+        # Job calls belong to no request; keep them out of the per-user admission cap
+        current_principal.set(None)
+        JOBS_RUNNING.inc()
+        JOB_EVENTS.labels(ctx.type, "started").inc()
+        try:
+            if handler is None:
+                raise ValueError(f"Unknown job type {ctx.type}")
+            await handler(ctx)
+            await run_in_threadpool(_finish, self.owner, ctx.id, JobStatusEnum.SUCCEEDED, ctx.values())
+            JOB_EVENTS.labels(ctx.type, "succeeded").inc()
+        except JobCancelled:
+            await run_in_threadpool(_finish, self.owner, ctx.id, JobStatusEnum.CANCELLED, ctx.values())
+            JOB_EVENTS.labels(ctx.type, "cancelled").inc()
+        except LeaseLost:
+            print(f"Warning: job {ctx.id} was taken over by another worker")
+        except asyncio.CancelledError:
+            # Worker shutdown: hand the job back so it resumes from its checkpoint
+            await asyncio.shield(run_in_threadpool(_finish, self.owner, ctx.id, JobStatusEnum.QUEUED, ctx.values()))
+            JOB_EVENTS.labels(ctx.type, "requeued").inc()
+            raise
+        except Exception as e:
+            print(f"Warning: job {ctx.id} failed:", e)
+            await run_in_threadpool(
+                _finish, self.owner, ctx.id, JobStatusEnum.FAILED, {**ctx.values(), "error": str(e)[:1024]}
+            )
+            JOB_EVENTS.labels(ctx.type, "failed").inc()
+        finally:
+            JOBS_RUNNING.dec()
+
+    def _launch(self, job: Dict[str, Any]) -> None:
+        task = asyncio.get_running_loop().create_task(self._run(job))
+        self._running[job["id"]] = task
+        task.add_done_callback(lambda _: self._running.pop(job["id"], None))
+
+    async def _loop(self) -> None:
+        while True:
+            try:
+                if self._running:
+                    await run_in_threadpool(_heartbeat, self.owner, list(self._running))
+                while len(self._running) < self.concurrency:
+                    job = await run_in_threadpool(_claim, self.owner, self.lease_seconds)
+                    if job is None:
+                        break
+                    self._launch(job)
+            except Exception as e:
+                print("Warning: job runner poll failed:", e)
+            await asyncio.sleep(self.poll_interval)
+
+    def start(self) -> None:
+        if self.enabled and self._task is None:
+            self.owner = f"{socket.gethostname()}:{os.getpid()}"
+            self._task = asyncio.get_running_loop().create_task(self._loop())
+
+    async def stop(self) -> None:
+        tasks = [t for t in (self._task, *self._running.values()) if t is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._task = None
+
+job_runner = JobRunner(
+    enabled=settings.JOBS_ENABLED,
+    concurrency=settings.JOB_CONCURRENCY,
+    poll_interval=settings.JOB_POLL_SECONDS,
+    lease_seconds=settings.JOB_LEASE_SECONDS,
+)
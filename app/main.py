@@ -1,8 +1,20 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from .config import settings
-from .db import Base, engine
-from .routes import auth, collections, points, search, users
+from .db import engine
+from .audit import audit_sink
+from .migrations import migrate
+from .readiness import readiness
+from .qdrant import close_client, node_stats
+from .password_pool import password_pool
+from .coalescer import upsert_coalescer
+from .collection_cache import collection_cache
+from .replica import replicas
+from .jobs import job_runner
+from .metrics import CONTENT_TYPE_LATEST, MetricsMiddleware, render as render_metrics
+from .routes import audit_logs, auth, collections, jobs, points, search, users
 
 app = FastAPI(title=settings.APP_NAME)
 
@@ -15,6 +27,8 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
 
 # Include routers
 app.include_router(auth.router)
@@ -22,16 +36,63 @@ app.include_router(collections.router)
 app.include_router(points.router)
 app.include_router(search.router)
 app.include_router(users.router)
+app.include_router(audit_logs.router)
+app.include_router(jobs.router)
 
 @app.on_event("startup")
 def startup():
-    # Create DB tables on startup
-    try:
-        Base.metadata.create_all(bind=engine)
-        print("DB tables ensured")
-    except Exception as e:
-        print("Warning: could not create DB tables at startup:", e)
+    # Schema setup normally runs once per deploy (python -m scripts.migrate), not per worker
+    if settings.AUTO_MIGRATE:
+        try:
+            migrate(engine)
+            print("DB tables ensured")
+        except Exception as e:
+            print("Warning: could not create DB tables at startup:", e)
+    if settings.AUDIT_MODE != "sync":
+        audit_sink.start()
+    collection_cache.start()
+    replicas.start()
+    job_runner.start()
+    # Pre-warm DB and Qdrant connections without holding up startup
+    readiness.start()
+
+@app.on_event("shutdown")
+async def shutdown():
+    await readiness.stop()
+    await collection_cache.stop()
+    await replicas.stop()
+    # Running jobs go back to the queue and resume from their checkpoint elsewhere
+    await job_runner.stop()
+    await upsert_coalescer.drain()
+    # Flush queued audit events before the worker exits, off the event loop
+    await run_in_threadpool(audit_sink.stop)
+    password_pool.shutdown()
+    await close_client()
 
 @app.get("/health")
 def health():
-    return {"status": "healthy"}
\ No newline at end of file
+    status = {"status": "healthy", "audit": audit_sink.stats()}
+    nodes = node_stats()
+    if nodes is not None:
+        status["qdrant_nodes"] = nodes
+    # Last /ready result, if any; /health itself never touches the dependencies
+    snapshot = readiness.snapshot()
+    if snapshot is not None:
+        status["ready"] = snapshot
+    return status
+
+@app.get("/ready")
+async def ready():
+    """
+    Database and Qdrant reachability with latencies; 503 while either is down or the
+    schema is not migrated. Results are cached for READY_CACHE_SECONDS.
+    """
+    result = await readiness.check()
+    return JSONResponse(result, status_code=200 if result["status"] == "ready" else 503)
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    """Prometheus text exposition, aggregated over all workers in multiprocess mode."""
+    if not settings.METRICS_ENABLED:
+        return Response(status_code=404)
+    return Response(render_metrics(), media_type=CONTENT_TYPE_LATEST)
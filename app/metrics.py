@@ -0,0 +1,198 @@
+import os
+import time
+from typing import Dict
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
+
+# With PROMETHEUS_MULTIPROC_DIR set (see gunicorn.conf.py) every gunicorn worker writes its
+# samples to files in that directory and /metrics aggregates all of them.
+MULTIPROCESS = bool(os.getenv("PROMETHEUS_MULTIPROC_DIR"))
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+FAST_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.1)
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route", ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+HTTP_IN_FLIGHT = Gauge(
+    "http_requests_in_flight", "Requests currently being served", multiprocess_mode="livesum",
+)
+QDRANT_CALL_SECONDS = Histogram(
+    "qdrant_call_duration_seconds", "Qdrant client call latency by operation", ["operation", "outcome"],
+    buckets=LATENCY_BUCKETS,
+)
+QDRANT_NODE_REQUESTS = Counter(
+    "qdrant_node_requests_total", "Routed Qdrant calls per node", ["node", "outcome"],
+)
+QDRANT_NODE_EJECTIONS = Counter(
+    "qdrant_node_ejections_total", "Qdrant nodes taken out of rotation", ["node", "reason"],
+)
+QDRANT_HEDGES = Counter(
+    "qdrant_hedged_requests_total", "Hedged search attempts sent, and those that answered first", ["outcome"],
+)
+ADMISSION_QUEUE_SECONDS = Histogram(
+    "qdrant_admission_queue_seconds", "Time Qdrant calls waited for an admission slot", ["priority"],
+    buckets=LATENCY_BUCKETS,
+)
+ADMISSION_REJECTIONS = Counter(
+    "qdrant_admission_rejections_total", "Qdrant calls rejected by admission control", ["priority", "reason"],
+)
+ADMISSION_IN_FLIGHT = Gauge(
+    "qdrant_admission_in_flight", "Admitted Qdrant calls in flight", ["priority"], multiprocess_mode="livesum",
+)
+DB_POOL_WAIT_SECONDS = Histogram(
+    "db_pool_checkout_wait_seconds", "Time spent waiting for a pooled DB connection", buckets=LATENCY_BUCKETS,
+)
+JWT_DECODE_SECONDS = Histogram(
+    "jwt_decode_duration_seconds", "Time spent decoding access tokens", buckets=FAST_BUCKETS,
+)
+PRINCIPAL_LOOKUPS = Counter(
+    "principal_lookups_total", "Principal resolutions by cache result", ["result"],
+)
+USER_LOOKUP_SECONDS = Histogram(
+    "user_lookup_duration_seconds", "Database lookup of a principal on cache miss", buckets=LATENCY_BUCKETS,
+)
+AUDIT_WRITE_SECONDS = Histogram(
+    "audit_write_duration_seconds", "Audit write latency (one flush or one sync commit)", ["mode"],
+    buckets=LATENCY_BUCKETS,
+)
+AUDIT_EVENTS = Counter(
+    "audit_events_total", "Audit events by outcome", ["outcome"],
+)
+AUDIT_QUEUE_DEPTH = Gauge(
+    "audit_queue_depth", "Audit events waiting to be flushed", multiprocess_mode="livesum",
+)
+SEARCH_CACHE_EVENTS = Counter(
+    "search_cache_events_total", "Search result cache events", ["event"],
+)
+SINGLEFLIGHT_EVENTS = Counter(
+    "search_singleflight_events_total", "Searches that started an upstream call (leader) or joined one (shared)", ["role"],
+)
+FILTER_UNINDEXED = Counter(
+    "filter_unindexed_fields_total", "Filtered requests that used a payload field without an index",
+    ["collection"],
+)
+REPLICA_SEARCHES = Counter(
+    "replica_searches_total", "Searches on replicated collections answered locally (hit) or sent to Qdrant (fallback)",
+    ["result"],
+)
+REPLICA_SYNCS = Counter(
+    "replica_syncs_total", "Full replica resyncs (ok, error) and shared snapshots mapped (loaded)", ["outcome"],
+)
+COLLECTION_CACHE_REFRESHES = Counter(
+    "collection_cache_refreshes_total", "Reloads of the per-worker collection metadata cache",
+)
+COALESCED_BATCH_SIZE = Histogram(
+    "upsert_coalesced_batch_size", "Points merged into one coalesced Qdrant upsert",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024),
+)
+COALESCER_FALLBACKS = Counter(
+    "upsert_coalescer_fallbacks_total", "Coalesced upserts that failed and were retried point by point",
+)
+JOB_EVENTS = Counter(
+    "job_events_total", "Background job lifecycle events", ["type", "event"],
+)
+JOB_POINTS = Counter(
+    "job_points_total", "Points processed by background jobs", ["type"],
+)
+JOBS_RUNNING = Gauge(
+    "jobs_running", "Background jobs currently running", multiprocess_mode="livesum",
+)
+PASSWORD_POOL_QUEUE_SECONDS = Histogram(
+    "password_pool_queue_seconds", "Time password work waited for a pool process", buckets=LATENCY_BUCKETS,
+)
+PASSWORD_WORK_SECONDS = Histogram(
+    "password_work_seconds", "bcrypt time per operation", ["operation"], buckets=LATENCY_BUCKETS,
+)
+PASSWORD_POOL_PENDING = Gauge(
+    "password_pool_pending", "Password operations queued or running", multiprocess_mode="livesum",
+)
+PASSWORD_POOL_REJECTIONS = Counter(
+    "password_pool_rejections_total", "Password operations rejected because the queue was full",
+)
+READY_CHECK_SECONDS = Histogram(
+    "ready_check_duration_seconds", "Readiness checks per dependency", ["dependency", "status"], buckets=LATENCY_BUCKETS,
+)
+LOGINS = Counter(
+    "logins_total", "Login attempts by outcome", ["outcome"],
+)
+
+class Timer:
+    """Tiny context manager that observes elapsed seconds into a histogram (or child)."""
+
+    __slots__ = ("metric", "start")
+
+    def __init__(self, metric):
+        self.metric = metric
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metric.observe(time.perf_counter() - self.start)
+        return False
+
+def render() -> bytes:
+    if MULTIPROCESS:
+        from prometheus_client import multiprocess
+
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry)
+    return generate_latest(REGISTRY)
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware recording per-route latency and in-flight requests.
+
+    Routes are labelled by their path template (e.g. /points/{collection}), looked up
+    from the endpoint the router resolved, so label cardinality stays bounded.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._routes: Dict[object, str] = {}
+
+    def _route_label(self, scope) -> str:
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return "unmatched"
+        label = self._routes.get(endpoint)
+        if label is None:
+            label = "unmatched"
+            for route in scope["app"].routes:
+                if getattr(route, "endpoint", None) is endpoint:
+                    label = route.path
+                    break
+            self._routes[endpoint] = label
+        return label
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        status = {"code": 500}
+
+        async def _send(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, _send)
+        finally:
+            HTTP_IN_FLIGHT.dec()
+            HTTP_REQUEST_SECONDS.labels(scope["method"], self._route_label(scope), str(status["code"])).observe(
+                time.perf_counter() - start
+            )
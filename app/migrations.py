@@ -0,0 +1,34 @@
+from typing import Dict, List, Union
+from sqlalchemy import inspect
+from sqlalchemy.engine import Connection, Engine
+from .db import Base
+from . import models  # noqa: F401  (registers every table on Base.metadata)
+
+def migrate(bind: Engine) -> None:
+    """
+    Create missing tables and indexes. Idempotent; runs once per deploy
+    (python -m scripts.migrate) instead of in every worker's startup.
+    """
+    Base.metadata.create_all(bind=bind)
+    # create_all() skips tables that already exist; add indexes introduced since
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=bind, checkfirst=True)
+
+def missing_tables(bind: Union[Engine, Connection]) -> List[str]:
+    """Tables the models define that the database does not have (one catalog query)."""
+    existing = set(inspect(bind).get_table_names())
+    return [table.name for table in Base.metadata.sorted_tables if table.name not in existing]
+
+def pending(bind: Engine) -> Dict[str, List[str]]:
+    """Tables and indexes migrate() would create."""
+    inspector = inspect(bind)
+    existing = set(inspector.get_table_names())
+    result: Dict[str, List[str]] = {"tables": [], "indexes": []}
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing:
+            result["tables"].append(table.name)
+            continue
+        have = {index["name"] for index in inspector.get_indexes(table.name)}
+        result["indexes"] += [index.name for index in table.indexes if index.name not in have]
+    return result
@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, String, DateTime, JSON, func
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, DateTime, JSON, Index, UniqueConstraint, func
 import enum
 from .db import Base
 
@@ -22,4 +23,55 @@ class AuditLog(Base):
     action = Column(String(128), nullable=False)
     resource = Column(String(255), nullable=False)
     payload = Column(JSON, nullable=True)
-    created_at = Column(DateTime, server_default=func.now(), index=True)
\ No newline at end of file
+    # Event time in UTC, stamped by the app (the write-behind sink inserts later); the
+    # server default only covers raw inserts and agrees because sessions run in UTC
+    created_at = Column(DateTime, default=datetime.utcnow, server_default=func.now(), index=True)
+
+    # Keyset pagination walks (created_at, id) newest first, optionally after an equality filter
+    __table_args__ = (
+        Index("ix_audit_logs_created_id", "created_at", "id"),
+        Index("ix_audit_logs_user_created_id", "user_id", "created_at", "id"),
+        Index("ix_audit_logs_action_created_id", "action", "created_at", "id"),
+        Index("ix_audit_logs_resource_created_id", "resource", "created_at", "id"),
+    )
+
+class AuditHourlyCount(Base):
+    """Audit events per hour, user, action and resource, maintained as events are written."""
+    __tablename__ = "audit_hourly_counts"
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    hour = Column(DateTime, nullable=False)
+    user_id = Column(Integer, nullable=False)
+    action = Column(String(128), nullable=False)
+    resource = Column(String(255), nullable=False)
+    count = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        UniqueConstraint("hour", "user_id", "action", "resource", name="uq_audit_hourly_counts_key"),
+        Index("ix_audit_hourly_counts_action_hour", "action", "hour"),
+    )
+
+class Job(Base):
+    """A long-running collection operation, run in chunks by the background job runner."""
+    __tablename__ = "jobs"
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    type = Column(String(32), nullable=False)
+    status = Column(String(16), nullable=False, default="queued")
+    collection = Column(String(255), nullable=False)
+    params = Column(JSON, nullable=False)
+    checkpoint = Column(JSON, nullable=True)  # where a resumed run picks up
+    total = Column(Integer, nullable=True)
+    done = Column(Integer, nullable=False, default=0)
+    stats = Column(JSON, nullable=True)  # effective limits and measured throughput of the last run
+    error = Column(String(1024), nullable=True)
+    created_by = Column(Integer, nullable=False)
+    owner = Column(String(128), nullable=True)  # worker running it
+    heartbeat_at = Column(DateTime, nullable=True)
+    created_at = Column(DateTime, server_default=func.now())
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+
+    __table_args__ = (
+        Index("ix_jobs_status_id", "status", "id"),
+        Index("ix_jobs_created_by_id", "created_by", "id"),
+    )
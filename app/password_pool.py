@@ -0,0 +1,99 @@
+import asyncio
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Optional, Tuple
+from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
+from .config import settings
+from .metrics import PASSWORD_POOL_PENDING, PASSWORD_POOL_QUEUE_SECONDS, PASSWORD_POOL_REJECTIONS, PASSWORD_WORK_SECONDS
+from .security import hash_password, verify_password
+
+def _timed(fn: Callable, submitted: float, *args) -> Tuple[float, float, Any]:
+    """Runs in the pool process; reports when the work started and how long it took."""
+    started = time.time()
+    result = fn(*args)
+    return started - submitted, time.time() - started, result
+
+class PasswordPool:
+    """
+    Runs bcrypt hashing and verification in a dedicated, size-limited process pool so
+    login bursts do not occupy the request threadpool or the event loop.
+
+    At most `max_pending` calls may be queued or running per worker process; beyond that
+    callers get an immediate 503 with Retry-After instead of waiting without limit.
+    With `workers=0` the work runs in the AnyIO threadpool (still admission-controlled).
+    If a pool process dies the executor is replaced and the call retried once.
+    """
+
+    def __init__(self, workers: int, max_pending: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.pending = 0
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn: forking a process that runs an event loop and background threads is unsafe
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
+
+    def _reset_executor(self, broken: ProcessPoolExecutor) -> None:
+        # Concurrent callers may all see the same broken pool; only the first replaces it
+        if self._executor is broken:
+            print("Warning: password pool process died, restarting the pool")
+            broken.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def _submit(self, fn: Callable, submitted: float, *args) -> Tuple[float, float, Any]:
+        loop = asyncio.get_running_loop()
+        for attempt in range(2):
+            executor = self._get_executor()
+            try:
+                return await loop.run_in_executor(executor, _timed, fn, submitted, *args)
+            except BrokenProcessPool:
+                self._reset_executor(executor)
+                if attempt:
+                    raise
+
+    async def _run(self, operation: str, fn: Callable, *args) -> Any:
+        if self.pending >= self.max_pending:
+            PASSWORD_POOL_REJECTIONS.inc()
+            raise HTTPException(
+                status_code=503,
+                detail="Too many concurrent password operations, retry shortly",
+                headers={"Retry-After": str(settings.PASSWORD_HASH_RETRY_AFTER)},
+            )
+        self.pending += 1
+        PASSWORD_POOL_PENDING.inc()
+        try:
+            submitted = time.time()
+            if self.workers > 0:
+                queued, worked, result = await self._submit(fn, submitted, *args)
+            else:
+                queued, worked, result = await run_in_threadpool(_timed, fn, submitted, *args)
+            PASSWORD_POOL_QUEUE_SECONDS.observe(max(queued, 0.0))
+            PASSWORD_WORK_SECONDS.labels(operation).observe(worked)
+            return result
+        finally:
+            self.pending -= 1
+            PASSWORD_POOL_PENDING.dec()
+
+    async def hash(self, password: str) -> str:
+        return await self._run("hash", hash_password, password)
+
+    async def verify(self, plain: str, hashed: str) -> bool:
+        return await self._run("verify", verify_password, plain, hashed)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+password_pool = PasswordPool(
+    workers=settings.PASSWORD_HASH_WORKERS,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING,
+)
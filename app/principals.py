@@ -0,0 +1,94 @@
+import threading
+import time
+from collections import OrderedDict
+from contextvars import ContextVar
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional, Tuple
+from .config import settings
+from .invalidation import SharedVersion
+from .models import User
+
+@dataclass(frozen=True)
+class Principal:
+    """Detached snapshot of an authenticated user, safe to share between requests."""
+    id: int
+    email: str
+    role: str
+    created_at: Optional[datetime]
+    updated_at: Optional[datetime]
+
+    @classmethod
+    def from_user(cls, user: User) -> "Principal":
+        return cls(
+            id=user.id,
+            email=user.email,
+            role=user.role,
+            created_at=user.created_at,
+            updated_at=user.updated_at,
+        )
+
+class PrincipalCache:
+    """
+    In-process TTL/LRU cache of resolved principals keyed by token subject (email).
+
+    Entries expire after `ttl` seconds. Changes made by any worker bump a shared
+    version token; when a worker sees a new token it drops its whole cache.
+    """
+
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.version = SharedVersion("principals")
+        self._entries: "OrderedDict[str, Tuple[float, Principal]]" = OrderedDict()
+        self._seen_version = self.version.current()
+        self._lock = threading.Lock()
+
+    def get(self, email: str) -> Optional[Principal]:
+        if self.max_size <= 0:
+            return None
+        now = time.monotonic()
+        current = self.version.current()
+        with self._lock:
+            if current != self._seen_version:
+                self._entries.clear()
+                self._seen_version = current
+                return None
+            entry = self._entries.get(email)
+            if entry is None:
+                return None
+            expires, principal = entry
+            if expires < now:
+                del self._entries[email]
+                return None
+            self._entries.move_to_end(email)
+            return principal
+
+    def put(self, principal: Principal) -> None:
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[principal.email] = (time.monotonic() + self.ttl, principal)
+            self._entries.move_to_end(principal.email)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, email: str) -> None:
+        """Drop a user's cached principal here and in every other worker.
+
+        Bumping the shared version makes other workers clear their caches; this worker
+        clears its own too, so changes bumped by others just before are not missed.
+        """
+        self.version.bump()
+        with self._lock:
+            self._entries.clear()
+            self._seen_version = self.version.current()
+
+principal_cache = PrincipalCache(
+    max_size=settings.PRINCIPAL_CACHE_SIZE,
+    ttl=settings.PRINCIPAL_CACHE_TTL,
+)
+
+# The authenticated principal of the request being served, for layers below the routes
+# (e.g. admission control in the Qdrant client proxy). Set by deps.get_current_user.
+current_principal: ContextVar[Optional[Principal]] = ContextVar("current_principal", default=None)
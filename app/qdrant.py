@@ -0,0 +1,116 @@
+import httpx
+import inspect
+import time
+from typing import Any, Dict, List, Optional, Union
+from qdrant_client import AsyncQdrantClient, QdrantClient
+from .config import settings
+from .admission import admission
+from .metrics import QDRANT_CALL_SECONDS
+from .qdrant_router import Node, QdrantRouter
+
+_client: Optional["InstrumentedClient"] = None
+
+def client_kwargs(prefer_grpc: Optional[bool] = None, url: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Connection settings shared by the async client and the sync client used by scripts.
+    A URL of ":memory:" selects qdrant-client's local in-memory mode.
+    """
+    url = url or settings.QDRANT_URL
+    if url == ":memory:":
+        return {"location": ":memory:"}
+    grpc = settings.QDRANT_PREFER_GRPC if prefer_grpc is None else prefer_grpc
+    kwargs: Dict[str, Any] = {
+        "url": url,
+        "prefer_grpc": grpc,
+        "grpc_port": settings.QDRANT_GRPC_PORT,
+        "timeout": settings.QDRANT_TIMEOUT,
+        "limits": httpx.Limits(
+            max_connections=settings.QDRANT_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.QDRANT_MAX_KEEPALIVE,
+            keepalive_expiry=settings.QDRANT_KEEPALIVE_EXPIRY,
+        ),
+    }
+    if grpc:
+        kwargs["grpc_options"] = {
+            "grpc.keepalive_time_ms": settings.QDRANT_KEEPALIVE_EXPIRY * 1000,
+            "grpc.keepalive_permit_without_calls": 1,
+        }
+    return kwargs
+
+class InstrumentedClient:
+    """
+    Thin proxy around AsyncQdrantClient (or a QdrantRouter) that passes every coroutine call through
+    admission control (see app/admission.py) and times it into
+    `qdrant_call_duration_seconds`, labelled by method name (search, upsert, scroll, ...).
+    Wrappers are built once per method and cached on the instance.
+    """
+
+    def __init__(self, client: Union[AsyncQdrantClient, QdrantRouter]):
+        self.raw = client
+
+    def __getattr__(self, name: str):
+        attr = getattr(self.raw, name)
+        if not inspect.iscoroutinefunction(attr):
+            return attr
+        ok = QDRANT_CALL_SECONDS.labels(name, "ok")
+        error = QDRANT_CALL_SECONDS.labels(name, "error")
+
+        async def timed(*args, **kwargs):
+            collection = kwargs.get("collection_name", args[0] if args and isinstance(args[0], str) else None)
+            async with admission.admit(name, collection):
+                start = time.perf_counter()
+                try:
+                    result = await attr(*args, **kwargs)
+                except Exception:
+                    error.observe(time.perf_counter() - start)
+                    raise
+                ok.observe(time.perf_counter() - start)
+                return result
+
+        self.__dict__[name] = timed
+        return timed
+
+def qdrant_urls() -> List[str]:
+    return [url.strip() for url in settings.QDRANT_URLS.split(",") if url.strip()]
+
+def build_router(urls: List[str]) -> QdrantRouter:
+    """One async client per endpoint; the first URL is the write primary."""
+    return QdrantRouter(
+        [Node(url, AsyncQdrantClient(**client_kwargs(url=url))) for url in urls],
+        eject_after=settings.QDRANT_EJECT_AFTER,
+        eject_seconds=settings.QDRANT_EJECT_SECONDS,
+        outlier_factor=settings.QDRANT_OUTLIER_FACTOR,
+        hedge_after=settings.QDRANT_HEDGE_AFTER_MS / 1000,
+    )
+
+def get_client() -> InstrumentedClient:
+    """
+    Return the worker-wide async Qdrant client, creating it on first use. With several
+    QDRANT_URLS it routes across the nodes (see app/qdrant_router.py).
+    """
+    global _client
+    if _client is None:
+        urls = qdrant_urls()
+        raw = build_router(urls) if len(urls) > 1 else AsyncQdrantClient(**client_kwargs(url=urls[0] if urls else None))
+        _client = InstrumentedClient(raw)
+    return _client
+
+def node_stats() -> Optional[List[Dict[str, Any]]]:
+    """Per-node routing health when routing over several nodes, else None."""
+    if _client is not None and isinstance(_client.raw, QdrantRouter):
+        return _client.raw.stats()
+    return None
+
+def get_sync_client(prefer_grpc: Optional[bool] = None, url: Optional[str] = None) -> QdrantClient:
+    """
+    Build a blocking client with the same settings, for scripts and benchmarks. Scripts
+    mostly write, so with several QDRANT_URLS it talks to the primary.
+    """
+    urls = qdrant_urls()
+    return QdrantClient(**client_kwargs(prefer_grpc, url or (urls[0] if urls else None)))
+
+async def close_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.raw.close()
+        _client = None
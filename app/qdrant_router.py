@@ -0,0 +1,216 @@
+import asyncio
+import inspect
+import statistics
+import time
+from typing import Any, Dict, List, Optional, Sequence
+from .metrics import QDRANT_HEDGES, QDRANT_NODE_EJECTIONS, QDRANT_NODE_REQUESTS
+
+# Served by any healthy node; every other method is a write or schema change for the primary
+READ_METHODS = frozenset({
+    "search", "search_batch", "query_points", "query_batch_points", "recommend", "retrieve", "count",
+    "scroll", "get_collection", "get_collections", "collection_exists",
+})
+# Reads slow enough to be worth a hedged second attempt
+HEDGED_METHODS = frozenset({"search", "search_batch", "query_points", "query_batch_points", "recommend"})
+
+def is_node_failure(exc: BaseException) -> bool:
+    """True for errors that say something about the node (connection, timeout, 5xx), not the request."""
+    status = getattr(exc, "status_code", None)
+    if isinstance(status, int):
+        return status >= 500
+    code = getattr(exc, "code", None)
+    if callable(code):  # grpc.RpcError
+        try:
+            return code().name in ("UNAVAILABLE", "DEADLINE_EXCEEDED", "INTERNAL", "UNKNOWN", "RESOURCE_EXHAUSTED")
+        except Exception:
+            return True
+    return not isinstance(exc, (ValueError, KeyError, TypeError))
+
+class Node:
+    """One Qdrant endpoint and its passively observed health."""
+
+    def __init__(self, name: str, client: Any):
+        self.name = name
+        self.client = client
+        self.outstanding = 0
+        self.latency = 0.0  # EWMA of successful call duration, seconds
+        self.samples = 0
+        self.consecutive_failures = 0
+        self.ejected_until = 0.0
+        self.ejections = 0
+        self.requests = 0
+        self.errors = 0
+
+    def available(self, now: float) -> bool:
+        return now >= self.ejected_until
+
+    def score(self) -> float:
+        # Latency-weighted least-outstanding-requests; unmeasured nodes look fast so they get sampled
+        return (self.outstanding + 1) * (self.latency or 0.001)
+
+    def stats(self, now: float) -> Dict[str, Any]:
+        return {
+            "node": self.name,
+            "available": self.available(now),
+            "outstanding": self.outstanding,
+            "latency_ms": round(self.latency * 1000, 3),
+            "requests": self.requests,
+            "errors": self.errors,
+            "ejections": self.ejections,
+            "ejected_for_s": round(max(self.ejected_until - now, 0.0), 1),
+        }
+
+class QdrantRouter:
+    """
+    Async Qdrant client facade over several endpoints of one cluster.
+
+    Reads go to the available node with the lowest (outstanding + 1) x latency score
+    and are retried once on another node when the first fails with a node error.
+    Searches that have not answered after `hedge_after` seconds are hedged: a second
+    attempt goes to another node and the first answer wins. Writes and schema changes
+    go to the primary (the first node) only.
+
+    Health is observed passively: `eject_after` consecutive node errors, or a latency
+    more than `outlier_factor` times the median of the other nodes, take a node out
+    of rotation for `eject_seconds` (doubling on repeated ejections, up to 8x). The
+    last available node is never ejected.
+    """
+
+    def __init__(
+        self,
+        nodes: Sequence[Node],
+        eject_after: int = 3,
+        eject_seconds: float = 30.0,
+        outlier_factor: float = 3.0,
+        hedge_after: float = 0.1,
+        min_samples: int = 20,
+    ):
+        if not nodes:
+            raise ValueError("QdrantRouter needs at least one node")
+        self.nodes: List[Node] = list(nodes)
+        self.primary = self.nodes[0]
+        self.eject_after = eject_after
+        self.eject_seconds = eject_seconds
+        self.outlier_factor = outlier_factor
+        self.hedge_after = hedge_after
+        self.min_samples = min_samples
+
+    def _pick(self, exclude: Sequence[Node] = ()) -> Node:
+        now = time.monotonic()
+        candidates = [n for n in self.nodes if n not in exclude and n.available(now)]
+        if candidates:
+            return min(candidates, key=Node.score)
+        # Everything else is out: prefer the node whose ejection ends first over failing outright
+        candidates = [n for n in self.nodes if n not in exclude] or self.nodes
+        return min(candidates, key=lambda n: n.ejected_until)
+
+    def _eject(self, node: Node, reason: str) -> None:
+        now = time.monotonic()
+        if not any(n.available(now) for n in self.nodes if n is not node):
+            return
+        node.ejections += 1
+        node.ejected_until = now + self.eject_seconds * min(2 ** (node.ejections - 1), 8)
+        node.consecutive_failures = 0
+        # Measure it afresh when it comes back
+        node.latency, node.samples = 0.0, 0
+        QDRANT_NODE_EJECTIONS.labels(node.name, reason).inc()
+        print(f"Warning: Qdrant node {node.name} ejected ({reason}) for {node.ejected_until - now:.0f}s")
+
+    def _succeeded(self, node: Node, elapsed: float) -> None:
+        node.consecutive_failures = 0
+        node.latency = elapsed if not node.samples else 0.8 * node.latency + 0.2 * elapsed
+        node.samples += 1
+        QDRANT_NODE_REQUESTS.labels(node.name, "ok").inc()
+        if node.samples < self.min_samples or len(self.nodes) < 2:
+            return
+        now = time.monotonic()
+        others = [
+            n.latency for n in self.nodes
+            if n is not node and n.samples >= self.min_samples and n.available(now)
+        ]
+        if others and node.latency > self.outlier_factor * statistics.median(others):
+            self._eject(node, "latency")
+
+    def _failed(self, node: Node) -> None:
+        node.errors += 1
+        node.consecutive_failures += 1
+        QDRANT_NODE_REQUESTS.labels(node.name, "error").inc()
+        if node.consecutive_failures >= self.eject_after:
+            self._eject(node, "errors")
+
+    async def _call(self, node: Node, name: str, args: tuple, kwargs: dict) -> Any:
+        node.outstanding += 1
+        node.requests += 1
+        start = time.perf_counter()
+        try:
+            result = await getattr(node.client, name)(*args, **kwargs)
+        except Exception as e:
+            if is_node_failure(e):
+                self._failed(node)
+            raise
+        finally:
+            node.outstanding -= 1
+        self._succeeded(node, time.perf_counter() - start)
+        return result
+
+    async def _retry_elsewhere(self, failed: Node, exc: Exception, name: str, args: tuple, kwargs: dict) -> Any:
+        if len(self.nodes) < 2 or not is_node_failure(exc):
+            raise exc
+        return await self._call(self._pick(exclude=(failed,)), name, args, kwargs)
+
+    async def _read(self, name: str, args: tuple, kwargs: dict) -> Any:
+        first = self._pick()
+        if name not in HEDGED_METHODS or self.hedge_after <= 0 or len(self.nodes) < 2:
+            try:
+                return await self._call(first, name, args, kwargs)
+            except Exception as e:
+                return await self._retry_elsewhere(first, e, name, args, kwargs)
+
+        attempts = {asyncio.ensure_future(self._call(first, name, args, kwargs)): first}
+        try:
+            done, _ = await asyncio.wait(attempts, timeout=self.hedge_after)
+            if done:
+                task = done.pop()
+                if task.exception() is None:
+                    return task.result()
+                return await self._retry_elsewhere(first, task.exception(), name, args, kwargs)
+
+            second = self._pick(exclude=(first,))
+            attempts[asyncio.ensure_future(self._call(second, name, args, kwargs))] = second
+            QDRANT_HEDGES.labels("sent").inc()
+            pending = set(attempts)
+            error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if attempts[task] is second:
+                            QDRANT_HEDGES.labels("won").inc()
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in attempts:
+                if not task.done():
+                    task.cancel()
+
+    def __getattr__(self, name: str):
+        attr = getattr(self.primary.client, name)
+        if not inspect.iscoroutinefunction(attr):
+            return attr
+
+        async def routed(*args, **kwargs):
+            if name in READ_METHODS:
+                return await self._read(name, args, kwargs)
+            return await self._call(self.primary, name, args, kwargs)
+
+        self.__dict__[name] = routed
+        return routed
+
+    async def close(self) -> None:
+        for node in self.nodes:
+            await node.client.close()
+
+    def stats(self) -> List[Dict[str, Any]]:
+        now = time.monotonic()
+        return [node.stats(now) for node in self.nodes]
@@ -0,0 +1,156 @@
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import text
+from .config import settings
+from .db import engine, probe_engine
+from .migrations import missing_tables
+from .metrics import READY_CHECK_SECONDS
+from .qdrant import get_client
+from .qdrant_router import QdrantRouter
+
+def _ms(seconds: float) -> float:
+    return round(seconds * 1000, 3)
+
+def warm_pool() -> None:
+    """
+    Open the request pool's `pool_size` connections together and hand them back, so the
+    first requests after startup do not pay for connecting. Run once, at startup.
+    """
+    connections = []
+    try:
+        for _ in range(engine.pool.size()):
+            connections.append(engine.connect())
+    finally:
+        for connection in connections:
+            connection.close()
+
+def _check_db() -> Dict[str, Any]:
+    """
+    SELECT 1 round trip and schema check on the probe's own connection, so a busy request
+    pool never makes a healthy worker look down.
+    """
+    with probe_engine.connect() as connection:
+        start = time.perf_counter()
+        connection.execute(text("SELECT 1"))
+        latency = time.perf_counter() - start
+        missing = missing_tables(connection)
+    result: Dict[str, Any] = {
+        "status": "ok", "latency_ms": _ms(latency),
+        "pool_size": engine.pool.size(), "pool_checked_out": engine.pool.checkedout(),
+    }
+    if missing:
+        result.update(status="error", error="schema not migrated (run python -m scripts.migrate)", missing_tables=missing)
+    return result
+
+class ReadinessProbe:
+    """
+    Cached readiness of this worker's dependencies (database and Qdrant), with latencies.
+
+    `start()` warms the database pool once; a check uses a single dedicated database
+    connection and opens a connection to every Qdrant endpoint.
+    Results are reused for `ttl` seconds and concurrent callers share one check, so a
+    load balancer polling every worker cannot pile up probes. `snapshot()` returns the
+    last result without any I/O.
+    """
+
+    def __init__(self, ttl: float, timeout: float):
+        self.ttl = ttl
+        self.timeout = timeout
+        self._result: Optional[Dict[str, Any]] = None
+        self._checked_at = 0.0
+        self._inflight: Optional[asyncio.Task] = None
+        self._warming: Optional[asyncio.Task] = None
+
+    async def _timed(self, dependency: str, check: Callable[[], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+        start = time.perf_counter()
+        try:
+            result = await asyncio.wait_for(check(), self.timeout)
+        except asyncio.TimeoutError:
+            result = {"status": "error", "error": f"timed out after {_ms(self.timeout)}ms"}
+        except Exception as e:
+            result = {"status": "error", "error": str(e)}
+        elapsed = time.perf_counter() - start
+        result.setdefault("latency_ms", _ms(elapsed))
+        READY_CHECK_SECONDS.labels(dependency, result["status"]).observe(elapsed)
+        return result
+
+    async def _database(self) -> Dict[str, Any]:
+        return await run_in_threadpool(_check_db)
+
+    async def _qdrant(self) -> Dict[str, Any]:
+        raw = get_client().raw
+        if not isinstance(raw, QdrantRouter):
+            start = time.perf_counter()
+            await raw.get_collections()
+            return {"status": "ok", "latency_ms": _ms(time.perf_counter() - start)}
+
+        async def node(n) -> Dict[str, Any]:
+            start = time.perf_counter()
+            try:
+                await n.client.get_collections()
+            except Exception as e:
+                return {"node": n.name, "status": "error", "error": str(e)}
+            return {"node": n.name, "status": "ok", "latency_ms": _ms(time.perf_counter() - start)}
+
+        nodes: List[Dict[str, Any]] = await asyncio.gather(*(node(n) for n in raw.nodes))
+        up = [n for n in nodes if n["status"] == "ok"]
+        # The router serves reads from any node, so one reachable node is enough to take traffic
+        status = "ok" if len(up) == len(nodes) else "degraded" if up else "error"
+        result: Dict[str, Any] = {"status": status, "nodes": nodes}
+        if up:
+            result["latency_ms"] = min(n["latency_ms"] for n in up)
+        return result
+
+    async def _check(self) -> Dict[str, Any]:
+        database, qdrant = await asyncio.gather(
+            self._timed("database", self._database), self._timed("qdrant", self._qdrant),
+        )
+        ready = database["status"] != "error" and qdrant["status"] != "error"
+        self._result = {"status": "ready" if ready else "not_ready", "database": database, "qdrant": qdrant}
+        self._checked_at = time.monotonic()
+        return self._result
+
+    async def check(self) -> Dict[str, Any]:
+        """Cached result if it is younger than `ttl`, else the result of a fresh (shared) check."""
+        if self._result is not None and time.monotonic() - self._checked_at < self.ttl:
+            return self.snapshot()
+        if self._inflight is None or self._inflight.done():
+            self._inflight = asyncio.get_running_loop().create_task(self._check())
+        await asyncio.shield(self._inflight)
+        return self.snapshot()
+
+    def snapshot(self) -> Optional[Dict[str, Any]]:
+        if self._result is None:
+            return None
+        return {**self._result, "age_s": round(time.monotonic() - self._checked_at, 3)}
+
+    async def _warm(self) -> None:
+        try:
+            await run_in_threadpool(warm_pool)
+        except Exception as e:
+            print(f"Warning: could not warm the database pool: {e}")
+
+    def start(self) -> None:
+        """Warm connections in the background so startup itself never waits on them."""
+        loop = asyncio.get_running_loop()
+        if self._warming is None:
+            self._warming = loop.create_task(self._warm())
+        if self._inflight is None:
+            self._inflight = loop.create_task(self._check())
+
+    async def stop(self) -> None:
+        for task in (self._warming, self._inflight):
+            if task is not None and not task.done():
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._warming = self._inflight = None
+
+readiness = ReadinessProbe(
+    ttl=settings.READY_CACHE_SECONDS,
+    timeout=settings.READY_TIMEOUT_MS / 1000,
+)
@@ -0,0 +1,507 @@
+import asyncio
+import fcntl
+import os
+import time
+import uuid
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import numpy as np
+import orjson
+from fastapi.concurrency import run_in_threadpool
+from qdrant_client.models import PointStruct, VectorParams
+from .config import settings
+from .enums import DistanceEnum
+from .invalidation import SharedVersion
+from .metrics import REPLICA_SEARCHES, REPLICA_SYNCS
+from .qdrant import get_client
+
+SCROLL_PAGE = 1024
+# Manhattan distances are computed in row blocks to bound the temporary |M - q| array
+MANHATTAN_BLOCK = 4096
+# Above this many matrix elements (~1 ms of work) a search leaves the event loop for a thread
+INLINE_ELEMENTS = 1 << 20
+
+def scores(distance: str, matrix: np.ndarray, sq_norms: np.ndarray, query: np.ndarray) -> np.ndarray:
+    """Qdrant's score of every row against `query` (rows are pre-normalized for Cosine)."""
+    if distance == DistanceEnum.COSINE:
+        norm = np.linalg.norm(query)
+        return matrix @ (query / norm if norm > 0 else query)
+    if distance == DistanceEnum.DOT:
+        return matrix @ query
+    if distance == DistanceEnum.EUCLID:
+        return np.sqrt(np.maximum(sq_norms - 2 * (matrix @ query) + query @ query, 0))
+    out = np.empty(len(matrix), dtype=np.float32)
+    for start in range(0, len(matrix), MANHATTAN_BLOCK):
+        out[start:start + MANHATTAN_BLOCK] = np.abs(matrix[start:start + MANHATTAN_BLOCK] - query).sum(axis=1)
+    return out
+
+def canonical_id(raw: Any) -> Any:
+    """Id as Qdrant stores it: UUID strings are canonicalised (lowercase, hyphenated)."""
+    if isinstance(raw, str):
+        try:
+            return str(uuid.UUID(raw))
+        except ValueError:
+            return raw
+    return raw
+
+def top_k(
+    distance: str, matrix: np.ndarray, sq_norms: np.ndarray, query: np.ndarray, limit: int,
+    score_threshold: Optional[float] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Exact top-`limit` rows and their scores, best first, in Qdrant's order for `distance`."""
+    if len(matrix) == 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+    s = scores(distance, matrix, sq_norms, query)
+    ascending = distance in (DistanceEnum.EUCLID, DistanceEnum.MANHATTAN)
+    key = s if ascending else -s
+    k = min(limit, len(s))
+    rows = np.argpartition(key, k - 1)[:k] if k < len(s) else np.arange(len(s))
+    rows = rows[np.argsort(key[rows], kind="stable")]
+    top = s[rows]
+    if distance == DistanceEnum.EUCLID:
+        # The expanded form loses precision for near neighbours; recompute the few returned
+        top = np.sqrt(((matrix[rows] - query) ** 2).sum(axis=1))
+    if score_threshold is not None:
+        keep = top <= score_threshold if ascending else top >= score_threshold
+        rows, top = rows[keep], top[keep]
+    return rows, top
+
+class LocalReplica:
+    """
+    In-process copy of one collection's vectors and payloads, searched exactly with NumPy.
+
+    The replica is only used while it is fresh: every write made through the API bumps a
+    version token shared by all workers, and the replica is fresh while that token still
+    matches the one it was last synced (or locally updated) against, and its last full
+    sync is no older than `max_age`. Writes made in this worker are applied in place;
+    writes made in another worker make this copy stale until the next resync.
+
+    With `shared` the synced matrix is written once under SHARED_STATE_DIR and memory
+    mapped read-only by every worker; writes then only mark it stale and one worker
+    rebuilds the snapshot, so shared replicas suit read-mostly collections.
+    """
+
+    def __init__(self, name: str, max_points: int, max_age: float, shared: bool):
+        self.name = name
+        self.max_points = max_points
+        self.max_age = max_age
+        self.shared = shared
+        self.distance: Optional[str] = None
+        self.matrix: Optional[np.ndarray] = None  # capacity rows; only the first `count` are live
+        self.sq_norms = np.empty(0, dtype=np.float32)
+        self.count = 0
+        self.ids: List[Any] = []
+        self.index: Dict[Any, int] = {}
+        self.payloads: List[Any] = []
+        self.mutations = 0  # bumped on every in-place change, so threaded searches can detect one
+        self.synced_token: Optional[Tuple[int, int]] = None
+        self.synced_at = 0.0
+        self.last_attempt = 0.0
+        self.error: Optional[str] = None
+        self._writes = SharedVersion(f"replica-{name}")
+        self._dir = os.path.join(settings.SHARED_STATE_DIR, "replicas")
+        self._meta_path = os.path.join(self._dir, f"{name}.meta.json")
+        self._meta_token: Optional[Tuple[int, int]] = None
+
+    def fresh(self) -> bool:
+        return (
+            self.matrix is not None
+            and self.synced_token == self._writes.current()
+            and time.monotonic() - self.synced_at <= self.max_age
+        )
+
+    async def search(
+        self, vector, limit: int, with_payload: bool, score_threshold: Optional[float], with_vectors: bool
+    ) -> Optional[List[Dict[str, Any]]]:
+        """Results shaped like `point_dict(hit)`, or None when the replica cannot answer."""
+        if not self.fresh():
+            REPLICA_SEARCHES.labels("fallback").inc()
+            return None
+        query = np.asarray(vector, dtype=np.float32)
+        if query.shape != (self.matrix.shape[1],):
+            REPLICA_SEARCHES.labels("fallback").inc()
+            return None
+        n = self.count
+        args = (self.distance, self.matrix[:n], self.sq_norms[:n], query, limit, score_threshold)
+        if n * query.size <= INLINE_ELEMENTS:
+            rows, top = top_k(*args)
+        else:
+            mutations = self.mutations
+            rows, top = await run_in_threadpool(top_k, *args)
+            # A local write moved rows while we were scoring; the row numbers may be wrong now
+            if mutations != self.mutations or not self.fresh():
+                REPLICA_SEARCHES.labels("fallback").inc()
+                return None
+        REPLICA_SEARCHES.labels("hit").inc()
+        return [
+            {
+                "id": self.ids[row],
+                # Point versions are not kept in the replica
+                "version": None,
+                "score": float(score),
+                "payload": self.payloads[row] if with_payload else None,
+                "vector": self.matrix[row].tolist() if with_vectors else None,
+                "shard_key": None,
+                "order_value": None,
+            }
+            for row, score in zip(rows.tolist(), top.tolist())
+        ]
+
+    # Writes made through the API
+
+    def _written(self, applied: bool) -> None:
+        self.mutations += 1
+        before = self._writes.current()
+        self._writes.bump()
+        # Only adopt the new token if no other worker had written since our last sync
+        if applied and before == self.synced_token:
+            self.synced_token = self._writes.current()
+
+    def upsert(self, points: Iterable[PointStruct]) -> None:
+        applied = self.matrix is not None and not self.shared
+        if applied:
+            for point in points:
+                if not isinstance(point.vector, list) or len(point.vector) != self.matrix.shape[1]:
+                    applied = False
+                    break
+                self._put(point.id, point.vector, point.payload or {})
+            if self.count > self.max_points:
+                self._clear(f"more than {self.max_points} points")
+                applied = False
+        self._written(applied)
+
+    def delete(self, ids: Iterable[Any]) -> None:
+        applied = self.matrix is not None and not self.shared
+        if applied:
+            for point_id in ids:
+                self._remove(point_id)
+        self._written(applied)
+
+    def invalidate(self) -> None:
+        """A write this replica cannot apply locally (e.g. delete by filter)."""
+        self._written(False)
+
+    def drop(self) -> None:
+        """The collection was deleted or recreated."""
+        self._clear(None)
+        self._written(False)
+
+    def _put(self, raw_id: Any, vector: List[float], payload: Any) -> None:
+        # "A1B2...", "{a1b2...}" and "a1b2-..." name the same point in Qdrant
+        point_id = canonical_id(raw_id)
+        row = self.index.get(point_id)
+        if row is None:
+            if self.count == len(self.matrix):
+                self._grow()
+            row = self.count
+            self.count += 1
+            self.index[point_id] = row
+            self.ids.append(point_id)
+            self.payloads.append(payload)
+        else:
+            self.payloads[row] = payload
+        vec = np.asarray(vector, dtype=np.float32)
+        if self.distance == DistanceEnum.COSINE:
+            norm = np.linalg.norm(vec)
+            if norm > 0:
+                vec = vec / norm
+        self.matrix[row] = vec
+        self.sq_norms[row] = vec @ vec
+
+    def _remove(self, raw_id: Any) -> None:
+        point_id = canonical_id(raw_id)
+        row = self.index.pop(point_id, None)
+        if row is None:
+            return
+        # Move the last row into the hole so live rows stay contiguous
+        last = self.count - 1
+        if row != last:
+            self.matrix[row] = self.matrix[last]
+            self.sq_norms[row] = self.sq_norms[last]
+            self.ids[row] = self.ids[last]
+            self.payloads[row] = self.payloads[last]
+            self.index[self.ids[row]] = row
+        self.ids.pop()
+        self.payloads.pop()
+        self.count = last
+
+    def _grow(self) -> None:
+        capacity = max(16, 2 * len(self.matrix))
+        matrix = np.empty((capacity, self.matrix.shape[1]), dtype=np.float32)
+        matrix[:self.count] = self.matrix[:self.count]
+        sq_norms = np.empty(capacity, dtype=np.float32)
+        sq_norms[:self.count] = self.sq_norms[:self.count]
+        self.matrix, self.sq_norms = matrix, sq_norms
+
+    def _clear(self, error: Optional[str]) -> None:
+        self.matrix, self.sq_norms, self.count = None, np.empty(0, dtype=np.float32), 0
+        self.mutations += 1
+        self.ids, self.index, self.payloads = [], {}, []
+        self.synced_token = None
+        self.error = error
+        if error:
+            print(f"Warning: replica of {self.name} disabled: {error}")
+
+    def _install(self, distance: str, matrix: np.ndarray, ids: List[Any], payloads: List[Any], token) -> None:
+        self.distance = distance
+        self.matrix = matrix
+        self.mutations += 1
+        self.sq_norms = np.einsum("ij,ij->i", matrix, matrix).astype(np.float32)
+        self.count = len(ids)
+        self.ids = ids
+        self.index = {point_id: row for row, point_id in enumerate(ids)}
+        self.payloads = payloads
+        self.synced_token = tuple(token)
+        self.synced_at = time.monotonic()
+        self.error = None
+
+    # Full resync from Qdrant
+
+    async def _fetch(self) -> Tuple[str, np.ndarray, List[Any], List[Any]]:
+        client = get_client()
+        info = await client.get_collection(self.name)
+        params = info.config.params.vectors
+        if not isinstance(params, VectorParams):
+            raise ValueError("only collections with a single unnamed vector can be replicated")
+        if (info.points_count or 0) > self.max_points:
+            raise ValueError(f"more than {self.max_points} points")
+        ids: List[Any] = []
+        payloads: List[Any] = []
+        vectors: List[List[float]] = []
+        offset = None
+        while True:
+            points, offset = await client.scroll(
+                collection_name=self.name, limit=SCROLL_PAGE, offset=offset, with_vectors=True, with_payload=True,
+            )
+            for point in points:
+                ids.append(point.id)
+                payloads.append(point.payload or {})
+                vectors.append(point.vector)
+            if len(ids) > self.max_points:
+                raise ValueError(f"more than {self.max_points} points")
+            if offset is None:
+                break
+        matrix = np.asarray(vectors, dtype=np.float32).reshape(len(vectors), params.size)
+        distance = params.distance.value
+        if distance == DistanceEnum.COSINE:
+            norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+            matrix = matrix / np.where(norms > 0, norms, 1)
+        return distance, matrix, ids, payloads
+
+    async def resync(self) -> None:
+        self.last_attempt = time.monotonic()
+        if self.shared:
+            await self._resync_shared()
+            return
+        # Read the token first so a write during the scroll leaves the replica stale
+        token = self._writes.current()
+        try:
+            distance, matrix, ids, payloads = await self._fetch()
+        except ValueError as e:
+            self._clear(str(e))
+            REPLICA_SYNCS.labels("error").inc()
+            return
+        self._install(distance, matrix, ids, payloads, token)
+        REPLICA_SYNCS.labels("ok").inc()
+
+    def _read_meta_token(self) -> Optional[Tuple[int, int]]:
+        try:
+            st = os.stat(self._meta_path)
+            return (st.st_ino, st.st_mtime_ns)
+        except OSError:
+            return None
+
+    def _load_snapshot(self) -> Optional[Dict[str, Any]]:
+        with open(self._meta_path, "rb") as f:
+            meta = orjson.loads(f.read())
+        if not meta.get("error"):
+            meta["matrix"] = np.load(os.path.join(self._dir, meta["file"]), mmap_mode="r")
+        return meta
+
+    async def load_shared(self) -> None:
+        """Map the snapshot another worker wrote, if it changed since we last looked."""
+        token = self._read_meta_token()
+        if token is None or token == self._meta_token:
+            return
+        try:
+            meta = await run_in_threadpool(self._load_snapshot)
+        except (OSError, ValueError) as e:
+            # Replaced under us; the next pass picks up the new one
+            print(f"Warning: could not load replica snapshot of {self.name}: {e}")
+            return
+        self._meta_token = token
+        if meta.get("error"):
+            self._clear(meta["error"])
+            return
+        self._install(meta["distance"], meta["matrix"], meta["ids"], meta["payloads"], meta["token"])
+        # The snapshot's age, not the time we mapped it, bounds how stale it can be
+        self.synced_at = time.monotonic() - max(time.time() - meta["built_at"], 0)
+        REPLICA_SYNCS.labels("loaded").inc()
+
+    def _write_snapshot(self, meta: Dict[str, Any], matrix: Optional[np.ndarray]) -> None:
+        os.makedirs(self._dir, exist_ok=True)
+        previous = None
+        try:
+            with open(self._meta_path, "rb") as f:
+                previous = orjson.loads(f.read()).get("file")
+        except (OSError, ValueError):
+            pass
+        if matrix is not None:
+            meta["file"] = f"{self.name}.{time.time_ns()}.npy"
+            np.save(os.path.join(self._dir, meta["file"]), matrix)
+        tmp = f"{self._meta_path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(orjson.dumps(meta))
+        os.replace(tmp, self._meta_path)
+        # Workers that already mapped the old matrix keep it until they remap
+        if previous:
+            try:
+                os.remove(os.path.join(self._dir, previous))
+            except OSError:
+                pass
+
+    async def _resync_shared(self) -> None:
+        os.makedirs(self._dir, exist_ok=True)
+        lock = open(os.path.join(self._dir, f"{self.name}.lock"), "w")
+        try:
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                return  # another worker is building it
+            # Another worker may have built a current snapshot while we waited for the lock
+            await self.load_shared()
+            if self.fresh() and time.monotonic() - self.synced_at < self.max_age / 3:
+                return
+            token = self._writes.current()
+            meta: Dict[str, Any] = {"token": list(token), "built_at": time.time()}
+            try:
+                distance, matrix, ids, payloads = await self._fetch()
+            except ValueError as e:
+                meta["error"] = str(e)
+                await run_in_threadpool(self._write_snapshot, meta, None)
+                REPLICA_SYNCS.labels("error").inc()
+            else:
+                meta.update(distance=distance, ids=ids, payloads=payloads)
+                await run_in_threadpool(self._write_snapshot, meta, matrix)
+                REPLICA_SYNCS.labels("ok").inc()
+            await self.load_shared()
+        finally:
+            lock.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "collection": self.name,
+            "shared": self.shared,
+            "fresh": self.fresh(),
+            "points": self.count,
+            "distance": self.distance,
+            "age_s": round(time.monotonic() - self.synced_at, 1) if self.matrix is not None else None,
+            "error": self.error,
+        }
+
+class ReplicaManager:
+    """
+    Local replicas of the collections listed in REPLICA_COLLECTIONS, plus the background
+    task that keeps them synced: a full resync every `resync_interval` seconds, and
+    sooner once a write made elsewhere left one stale. Catch-up resyncs start `min_gap`
+    seconds apart and back off (doubling, up to `resync_interval`) while writes keep
+    arriving, so a steady write load from other workers does not turn every worker into
+    a full scroll per second; the gap resets once a replica stays fresh. Run with
+    REPLICA_SHARED for write-heavy collections on several workers.
+    """
+
+    def __init__(self, collections: List[str], max_points: int, resync_interval: int, shared: bool, min_gap: float = 1.0):
+        self.resync_interval = resync_interval
+        self.min_gap = min_gap
+        self.replicas: Dict[str, LocalReplica] = {
+            name: LocalReplica(name, max_points, max_age=3 * resync_interval, shared=shared) for name in collections
+        }
+        self._stale_gaps: Dict[str, float] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def get(self, collection: str) -> Optional[LocalReplica]:
+        return self.replicas.get(collection)
+
+    async def search(
+        self, collection: str, vector, limit: int, with_payload: bool, score_threshold: Optional[float],
+        with_vectors: bool = False,
+    ) -> Optional[List[Dict[str, Any]]]:
+        replica = self.replicas.get(collection)
+        if replica is None:
+            return None
+        return await replica.search(vector, limit, with_payload, score_threshold, with_vectors)
+
+    def upsert(self, collection: str, points: Iterable[PointStruct]) -> None:
+        replica = self.replicas.get(collection)
+        if replica is not None:
+            replica.upsert(points)
+
+    def delete(self, collection: str, ids: Iterable[Any]) -> None:
+        replica = self.replicas.get(collection)
+        if replica is not None:
+            replica.delete(ids)
+
+    def invalidate(self, collection: str) -> None:
+        replica = self.replicas.get(collection)
+        if replica is not None:
+            replica.invalidate()
+
+    def drop(self, collection: str) -> None:
+        replica = self.replicas.get(collection)
+        if replica is not None:
+            replica.drop()
+
+    async def _maintain(self, replica: LocalReplica) -> None:
+        if replica.shared:
+            await replica.load_shared()
+        now = time.monotonic()
+        if now - replica.last_attempt < self.min_gap:
+            return
+        # A replica disabled by an error (e.g. grown past max_points) is retried once per interval
+        last = replica.last_attempt if replica.error else replica.synced_at
+        if now - last >= self.resync_interval:
+            await replica.resync()
+            return
+        if replica.error is not None or replica.fresh():
+            self._stale_gaps.pop(replica.name, None)
+            return
+        gap = self._stale_gaps.get(replica.name, self.min_gap)
+        if now - replica.last_attempt >= gap:
+            await replica.resync()
+            # Still being written to: wait longer before the next catch-up scroll
+            self._stale_gaps[replica.name] = min(2 * gap, self.resync_interval)
+
+    async def _loop(self) -> None:
+        while True:
+            for replica in self.replicas.values():
+                try:
+                    await self._maintain(replica)
+                except Exception as e:
+                    # Retried once per interval (or right after a write) like a disabled replica
+                    replica.last_attempt = time.monotonic()
+                    replica.error = str(e)
+                    REPLICA_SYNCS.labels("error").inc()
+                    print(f"Warning: replica resync of {replica.name} failed:", e)
+            await asyncio.sleep(min(self.min_gap, self.resync_interval))
+
+    def start(self) -> None:
+        if self.replicas and self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> List[Dict[str, Any]]:
+        return [replica.stats() for replica in self.replicas.values()]
+
+replicas = ReplicaManager(
+    collections=[c.strip() for c in settings.REPLICA_COLLECTIONS.split(",") if c.strip()],
+    max_points=settings.REPLICA_MAX_POINTS,
+    resync_interval=settings.REPLICA_RESYNC_SECONDS,
+    shared=settings.REPLICA_SHARED,
+)
@@ -0,0 +1,98 @@
+from datetime import datetime
+from typing import List, Optional
+from fastapi import APIRouter, HTTPException, Depends, Query
+from sqlalchemy import and_, func, or_
+from sqlalchemy.orm import Session
+from ..deps import require_role
+from ..models import AuditHourlyCount, AuditLog
+from ..principals import Principal
+from ..cursors import encode_cursor, decode_cursor
+from ..db import get_db
+
+router = APIRouter(prefix="/audit-logs", tags=["audit"])
+
+COUNT_DIMENSIONS = ("user_id", "action", "resource")
+
+@router.get("")
+def list_audit_logs(
+    user_id: Optional[int] = None,
+    action: Optional[str] = Query(None, max_length=128),
+    resource: Optional[str] = Query(None, max_length=255),
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    with_payload: bool = False,
+    current_user: Principal = Depends(require_role("ADMIN")),
+    db: Session = Depends(get_db)
+):
+    """
+    Query audit logs newest first (admin only). Filters combine with AND; `since` is
+    inclusive and `until` exclusive. Pages are keyset-paginated on (created_at, id):
+    pass `next_cursor` back as `cursor`. Payloads can be large and are only returned
+    with `with_payload=true`.
+    """
+    columns = [AuditLog.id, AuditLog.user_id, AuditLog.action, AuditLog.resource, AuditLog.created_at]
+    if with_payload:
+        columns.append(AuditLog.payload)
+    query = db.query(*columns)
+    if user_id is not None:
+        query = query.filter(AuditLog.user_id == user_id)
+    if action:
+        query = query.filter(AuditLog.action == action)
+    if resource:
+        query = query.filter(AuditLog.resource == resource)
+    if since:
+        query = query.filter(AuditLog.created_at >= since)
+    if until:
+        query = query.filter(AuditLog.created_at < until)
+    if cursor:
+        try:
+            created_at, last_id = decode_cursor(cursor)
+            created_at = datetime.fromisoformat(created_at)
+        except (TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        query = query.filter(or_(
+            AuditLog.created_at < created_at,
+            and_(AuditLog.created_at == created_at, AuditLog.id < last_id),
+        ))
+    rows = query.order_by(AuditLog.created_at.desc(), AuditLog.id.desc()).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor([rows[-1].created_at.isoformat(), rows[-1].id])
+    return {"logs": [row._asdict() for row in rows], "next_cursor": next_cursor}
+
+@router.get("/counts")
+def audit_log_counts(
+    since: datetime,
+    until: Optional[datetime] = None,
+    user_id: Optional[int] = None,
+    action: Optional[str] = Query(None, max_length=128),
+    resource: Optional[str] = Query(None, max_length=255),
+    group_by: List[str] = Query([]),
+    current_user: Principal = Depends(require_role("ADMIN")),
+    db: Session = Depends(get_db)
+):
+    """
+    Hourly audit event counts from the pre-aggregated table (admin only), so
+    dashboards never scan the raw log. Counts are summed per hour and per any
+    `group_by` dimensions (user_id, action, resource).
+    """
+    unknown = set(group_by) - set(COUNT_DIMENSIONS)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Cannot group by: {', '.join(sorted(unknown))}")
+    dimensions = [getattr(AuditHourlyCount, name) for name in COUNT_DIMENSIONS if name in group_by]
+    query = db.query(AuditHourlyCount.hour, *dimensions, func.sum(AuditHourlyCount.count).label("count"))
+    query = query.filter(AuditHourlyCount.hour >= since.replace(minute=0, second=0, microsecond=0))
+    if until:
+        query = query.filter(AuditHourlyCount.hour < until)
+    if user_id is not None:
+        query = query.filter(AuditHourlyCount.user_id == user_id)
+    if action:
+        query = query.filter(AuditHourlyCount.action == action)
+    if resource:
+        query = query.filter(AuditHourlyCount.resource == resource)
+    rows = query.group_by(AuditHourlyCount.hour, *dimensions).order_by(AuditHourlyCount.hour, *dimensions).all()
+    return {"counts": [{**row._asdict(), "count": int(row.count)} for row in rows]}
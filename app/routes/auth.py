@@ -1,20 +1,31 @@
 from fastapi import APIRouter, HTTPException, Depends
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from ..db import get_db
-from ..models import User
+from ..principals import Principal
 from ..schemas import LoginIn, TokenOut, RefreshIn
-from ..security import verify_password, create_access_token, create_refresh_token, decode_token
-from ..deps import get_current_user
+from ..security import create_access_token, create_refresh_token, decode_token
+from ..password_pool import password_pool
+from ..metrics import LOGINS
+from ..deps import find_user, get_current_user
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
 @router.post("/login", response_model=TokenOut)
-def login(login_data: LoginIn, db: Session = Depends(get_db)):
+async def login(login_data: LoginIn, db: Session = Depends(get_db)):
     """Authenticate user and return JWT tokens."""
-    user = db.query(User).filter(User.email == login_data.email).first()
+    user = await run_in_threadpool(find_user, db, login_data.email)
     
-    if not user or not verify_password(login_data.password, user.hashed_password):
+    # bcrypt runs in the bounded password pool; a full queue answers 503 right away
+    try:
+        valid = bool(user) and await password_pool.verify(login_data.password, user.hashed_password)
+    except HTTPException:
+        LOGINS.labels("rejected").inc()
+        raise
+    if not valid:
+        LOGINS.labels("invalid").inc()
         raise HTTPException(status_code=401, detail="Invalid credentials")
+    LOGINS.labels("success").inc()
     
     access_token = create_access_token(user.email, user.role)
     refresh_token = create_refresh_token(user.email, user.role)
@@ -50,7 +61,7 @@ def refresh_token(data: RefreshIn):
         raise HTTPException(status_code=401, detail=str(e))
 
 @router.get("/me")
-def get_current_user_info(user: User = Depends(get_current_user)):
+def get_current_user_info(user: Principal = Depends(get_current_user)):
     """Get current user information."""
     return {
         "id": user.id,
@@ -1,37 +1,46 @@
+from dataclasses import asdict
 from fastapi import APIRouter, HTTPException, Depends
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-from qdrant_client import QdrantClient
-from qdrant_client.models import VectorParams, Distance
-from ..config import settings
-from ..schemas import CollectionCreateIn
+from qdrant_client.models import CollectionParamsDiff, PayloadSchemaType, VectorParams, VectorParamsDiff, Distance
+from ..schemas import CollectionCreateIn, CollectionUpdateIn, PayloadIndexIn
 from ..deps import get_current_user, require_role
-from ..models import User  # Add this import
+from ..principals import Principal
 from ..audit import audit
 from ..db import get_db
+from ..search_cache import search_cache
+from ..replica import replicas
+from ..qdrant import get_client
+from ..collection_cache import collection_cache, check_collection
+from ..tuning import hnsw_config, optimizers_config, quantization_config
 
 router = APIRouter(prefix="/collections", tags=["collections"])
-client = QdrantClient(url=settings.QDRANT_URL, prefer_grpc=False)
 
 @router.get("")
-def list_collections(
-    current_user: User = Depends(get_current_user),
+async def list_collections(
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """List all Qdrant collections."""
+    """List all Qdrant collections (served from the per-worker collection cache)."""
     try:
-        collections = client.get_collections().collections
-        audit(db, current_user, "LIST_COLLECTIONS", "collections")
-        return {"collections": [col.dict() for col in collections]}
+        collections = await collection_cache.list()
+        await run_in_threadpool(audit, db, current_user, "LIST_COLLECTIONS", "collections")
+        return {"collections": [asdict(col) for col in collections]}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch collections: {str(e)}")
 
 @router.post("")
-def create_collection(
+async def create_collection(
     data: CollectionCreateIn,
-    current_user: User = Depends(require_role("ADMIN")),
+    current_user: Principal = Depends(require_role("ADMIN")),
     db: Session = Depends(get_db)
 ):
-    """Create a new Qdrant collection."""
+    """
+    Create a new Qdrant collection. Optional HNSW, quantization, on-disk storage and
+    optimizer settings trade recall, latency and memory; unset ones keep Qdrant's defaults.
+    """
     try:
         distance_map = {
             "Cosine": Distance.COSINE,
@@ -40,28 +49,140 @@ def create_collection(
             "Manhattan": Distance.MANHATTAN
         }
         
-        client.create_collection(
+        await get_client().create_collection(
             collection_name=data.name,
             vectors_config=VectorParams(
                 size=data.vector_size,
-                distance=distance_map[data.distance]
-            )
+                distance=distance_map[data.distance],
+                on_disk=data.on_disk,
+            ),
+            on_disk_payload=data.on_disk_payload,
+            hnsw_config=hnsw_config(data.hnsw),
+            quantization_config=quantization_config(data.quantization),
+            optimizers_config=optimizers_config(data.optimizers),
         )
-        audit(db, current_user, "CREATE_COLLECTION", data.name)
+        replicas.drop(data.name)
+        collection_cache.invalidate()
+        await run_in_threadpool(audit, db, current_user, "CREATE_COLLECTION", data.name)
         return {"status": "success", "message": f"Collection '{data.name}' created"}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Failed to create collection: {str(e)}")
 
 @router.delete("/{name}")
-def delete_collection(
+async def delete_collection(
     name: str,
-    current_user: User = Depends(require_role("ADMIN")),
+    current_user: Principal = Depends(require_role("ADMIN")),
     db: Session = Depends(get_db)
 ):
     """Delete a Qdrant collection."""
     try:
-        client.delete_collection(name)
-        audit(db, current_user, "DELETE_COLLECTION", name)
+        await get_client().delete_collection(name)
+        replicas.drop(name)
+        search_cache.invalidate(name)
+        collection_cache.invalidate()
+        await run_in_threadpool(audit, db, current_user, "DELETE_COLLECTION", name)
         return {"status": "success", "message": f"Collection '{name}' deleted"}
+    except HTTPException:
+        raise
     except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Failed to delete collection: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=400, detail=f"Failed to delete collection: {str(e)}")
+
+@router.patch("/{name}")
+async def update_collection(
+    name: str,
+    data: CollectionUpdateIn,
+    current_user: Principal = Depends(require_role("ADMIN")),
+    db: Session = Depends(get_db)
+):
+    """
+    Change tuning settings of an existing collection (admin only). Only the fields sent
+    are changed; Qdrant rebuilds indexes and quantized data in the background.
+    """
+    await check_collection(name)
+    try:
+        await get_client().update_collection(
+            collection_name=name,
+            vectors_config={"": VectorParamsDiff(on_disk=data.on_disk)} if data.on_disk is not None else None,
+            collection_params=(
+                CollectionParamsDiff(on_disk_payload=data.on_disk_payload) if data.on_disk_payload is not None else None
+            ),
+            hnsw_config=hnsw_config(data.hnsw),
+            quantization_config=quantization_config(data.quantization),
+            optimizers_config=optimizers_config(data.optimizers),
+        )
+        await run_in_threadpool(audit, db, current_user, "UPDATE_COLLECTION", name, data.model_dump(mode="json", exclude_none=True))
+        return {"status": "success", "message": f"Collection '{name}' updated"}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Failed to update collection: {str(e)}")
+
+@router.get("/{name}/indexes")
+async def list_payload_indexes(
+    name: str,
+    current_user: Principal = Depends(require_role("ADMIN")),
+    db: Session = Depends(get_db)
+):
+    """List the payload field indexes of a collection (admin only)."""
+    await check_collection(name)
+    try:
+        info = await get_client().get_collection(name)
+        await run_in_threadpool(audit, db, current_user, "LIST_PAYLOAD_INDEXES", name)
+        return {"indexes": [
+            {"field_name": field, "field_schema": schema.data_type.value, "points": schema.points}
+            for field, schema in sorted((info.payload_schema or {}).items())
+        ]}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Failed to list payload indexes: {str(e)}")
+
+@router.post("/{name}/indexes")
+async def create_payload_index(
+    name: str,
+    data: PayloadIndexIn,
+    wait: bool = True,
+    current_user: Principal = Depends(require_role("ADMIN")),
+    db: Session = Depends(get_db)
+):
+    """
+    Index a payload field (admin only) so filters on it stay fast on large collections.
+    Nested fields are named like "country.name" or "diet[].food".
+    """
+    await check_collection(name)
+    try:
+        await get_client().create_payload_index(
+            collection_name=name,
+            field_name=data.field_name,
+            field_schema=PayloadSchemaType(data.field_schema.value),
+            wait=wait,
+        )
+        collection_cache.invalidate()
+        await run_in_threadpool(audit, db, current_user, "CREATE_PAYLOAD_INDEX", name, data.model_dump(mode="json"))
+        return {"status": "success", "message": f"Index on '{data.field_name}' created in '{name}'"}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Failed to create payload index: {str(e)}")
+
+@router.delete("/{name}/indexes/{field_name}")
+async def delete_payload_index(
+    name: str,
+    field_name: str,
+    wait: bool = True,
+    current_user: Principal = Depends(require_role("ADMIN")),
+    db: Session = Depends(get_db)
+):
+    """Drop a payload field index (admin only)."""
+    await check_collection(name)
+    try:
+        await get_client().delete_payload_index(collection_name=name, field_name=field_name, wait=wait)
+        collection_cache.invalidate()
+        await run_in_threadpool(audit, db, current_user, "DELETE_PAYLOAD_INDEX", name, {"field_name": field_name})
+        return {"status": "success", "message": f"Index on '{field_name}' dropped from '{name}'"}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Failed to drop payload index: {str(e)}")
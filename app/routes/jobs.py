@@ -0,0 +1,148 @@
+from datetime import datetime
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+from ..schemas import JobDeleteIn, JobMigrateIn
+from ..enums import JobStatusEnum, JobTypeEnum
+from ..deps import get_current_user, require_role
+from ..principals import Principal
+from ..models import Job
+from ..audit import audit
+from ..db import get_db
+from ..collection_cache import check_collection
+from ..qdrant import get_client
+from ..jobs import ACTIVE, RESUMABLE, create_job, job_dict
+
+router = APIRouter(prefix="/jobs", tags=["jobs"])
+
+def _visible_job(db: Session, job_id: int, user: Principal) -> Job:
+    job = db.get(Job, job_id)
+    # Non-admins only see their own jobs; others look the same as missing ones
+    if job is None or (user.role != "ADMIN" and job.created_by != user.id):
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@router.post("/migrate", status_code=202)
+async def submit_migrate_job(
+    data: JobMigrateIn,
+    current_user: Principal = Depends(require_role("ADMIN")),
+    db: Session = Depends(get_db)
+):
+    """
+    Copy a collection into `target` in the background (admin only), creating `target`
+    with the given distance, on-disk, HNSW, quantization and optimizer settings if it
+    does not exist yet. An existing `target` is refused (409) unless `overwrite` is set;
+    the job then checks that its vector size and distance match. Poll GET /jobs/{id}
+    for progress.
+    """
+    await check_collection(data.source)
+    if not data.overwrite and await get_client().collection_exists(data.target):
+        raise HTTPException(status_code=409, detail=f"Collection '{data.target}' already exists; set overwrite to copy into it")
+    params = data.model_dump(mode="json", exclude_none=True)
+    job = await run_in_threadpool(create_job, current_user, JobTypeEnum.MIGRATE, data.source, params)
+    await run_in_threadpool(audit, db, current_user, "SUBMIT_JOB", data.source, {"job_id": job["id"], "type": job["type"], "target": data.target})
+    return job
+
+@router.post("/delete", status_code=202)
+async def submit_delete_job(
+    data: JobDeleteIn,
+    current_user: Principal = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Delete a large set of point ids in the background, chunk by chunk."""
+    await check_collection(data.collection)
+    params = data.model_dump(mode="json", exclude_none=True)
+    job = await run_in_threadpool(create_job, current_user, JobTypeEnum.DELETE, data.collection, params)
+    await run_in_threadpool(audit, db, current_user, "SUBMIT_JOB", data.collection, {"job_id": job["id"], "type": job["type"], "ids": len(data.ids)})
+    return job
+
+@router.get("")
+def list_jobs(
+    status: Optional[JobStatusEnum] = None,
+    type: Optional[JobTypeEnum] = None,
+    limit: int = Query(50, ge=1, le=500),
+    before: Optional[int] = Query(None, ge=1),
+    current_user: Principal = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    List jobs newest first (admins see every job, other users their own). Pass the
+    returned `next_before` as `before` for the next page.
+    """
+    query = db.query(Job)
+    if current_user.role != "ADMIN":
+        query = query.filter(Job.created_by == current_user.id)
+    if status:
+        query = query.filter(Job.status == status.value)
+    if type:
+        query = query.filter(Job.type == type.value)
+    if before:
+        query = query.filter(Job.id < before)
+    jobs = query.order_by(Job.id.desc()).limit(limit + 1).all()
+    next_before = jobs[limit - 1].id if len(jobs) > limit else None
+    return {"jobs": [job_dict(job) for job in jobs[:limit]], "next_before": next_before}
+
+@router.get("/{job_id}")
+def get_job(
+    job_id: int,
+    current_user: Principal = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Status and progress of one job."""
+    return job_dict(_visible_job(db, job_id, current_user))
+
+@router.post("/{job_id}/cancel")
+def cancel_job(
+    job_id: int,
+    current_user: Principal = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Cancel a job. A queued job is cancelled at once; a running one moves to
+    "cancelling" and stops after its in-flight chunks, keeping its checkpoint.
+    """
+    job = _visible_job(db, job_id, current_user)
+    # Conditional updates, so a job finishing at the same moment is never overwritten
+    result = db.execute(
+        update(Job)
+        .where(Job.id == job_id, Job.status == JobStatusEnum.QUEUED.value)
+        .values(status=JobStatusEnum.CANCELLED.value, finished_at=datetime.utcnow())
+    )
+    if result.rowcount == 0:
+        result = db.execute(
+            update(Job)
+            .where(Job.id == job_id, Job.status == JobStatusEnum.RUNNING.value)
+            .values(status=JobStatusEnum.CANCELLING.value)
+        )
+    db.commit()
+    if result.rowcount == 0:
+        db.refresh(job)
+        if job.status not in ACTIVE:
+            raise HTTPException(status_code=409, detail=f"Job is already {job.status}")
+    db.refresh(job)
+    audit(db, current_user, "CANCEL_JOB", job.collection, {"job_id": job_id})
+    return job_dict(job)
+
+@router.post("/{job_id}/resume")
+def resume_job(
+    job_id: int,
+    current_user: Principal = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Queue a failed or cancelled job again; it continues from its last checkpoint."""
+    job = _visible_job(db, job_id, current_user)
+    if job.type == JobTypeEnum.MIGRATE and current_user.role != "ADMIN":
+        raise HTTPException(status_code=403, detail="Forbidden")
+    result = db.execute(
+        update(Job)
+        .where(Job.id == job_id, Job.status.in_(RESUMABLE))
+        .values(status=JobStatusEnum.QUEUED.value, error=None, finished_at=None)
+    )
+    db.commit()
+    db.refresh(job)
+    if result.rowcount == 0:
+        raise HTTPException(status_code=409, detail=f"Only failed or cancelled jobs can be resumed (job is {job.status})")
+    audit(db, current_user, "RESUME_JOB", job.collection, {"job_id": job_id})
+    return job_dict(job)
@@ -1,63 +1,300 @@
-from fastapi import APIRouter, HTTPException, Depends
+import json
+from typing import Any, AsyncIterator, List, Optional
+from fastapi import APIRouter, HTTPException, Depends, Header, Path, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from qdrant_client import QdrantClient
-from qdrant_client.models import PointStruct
+from qdrant_client.models import FilterSelector, PointStruct, PointIdsList
 from ..config import settings
-from ..schemas import PointUpsertIn, PointsDeleteIn
+from ..schemas import PointIn, PointUpsertIn, PointsDeleteIn
+from ..ingest import iter_rows, ingest
 from ..deps import get_current_user
 from ..audit import audit
 from ..db import get_db
-from ..models import User  # Add this import
+from ..qdrant import get_client
+from ..collection_cache import check_collection
+from ..vectors import decode_float32, encode_record, RECORD_FORMAT
+from ..cursors import encode_cursor, decode_cursor
+from ..principals import Principal
+from ..search_cache import search_cache
+from ..replica import replicas
+from ..coalescer import upsert_coalescer
+from ..filters import parse_filter, unindexed_fields
+from ..serialization import dumps, encode_points, json_response, point_dict, wants_base64_vectors
 
 router = APIRouter(prefix="/points", tags=["points"])
-client = QdrantClient(url=settings.QDRANT_URL, prefer_grpc=False)
 
 @router.post("")
-def upsert_point(
+async def upsert_point(
     data: PointUpsertIn,
-    current_user: User = Depends(get_current_user),
+    wait: Optional[bool] = None,
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Upsert a point into a Qdrant collection."""
+    """
+    Upsert a point into a Qdrant collection. With UPSERT_COALESCE_ENABLED concurrent
+    upserts are merged into one Qdrant call; `wait=false` acknowledges once the write
+    is accepted rather than applied (default from UPSERT_COALESCE_ACK).
+    """
+    await check_collection(data.collection, len(data.vector))
     try:
-        client.upsert(
-            collection_name=data.collection,
-            points=[PointStruct(id=data.id, vector=data.vector, payload=data.payload)]
-        )
-        audit(db, current_user, "UPSERT_POINT", data.collection, {"point_id": data.id})
+        await upsert_coalescer.upsert(data.collection, PointStruct(id=data.id, vector=data.vector, payload=data.payload), wait)
+        await run_in_threadpool(audit, db, current_user, "UPSERT_POINT", data.collection, {"point_id": data.id})
         return {"status": "success", "message": f"Point {data.id} upserted into '{data.collection}'"}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Failed to upsert point: {str(e)}")
 
+@router.post("/{collection}/raw")
+async def upsert_point_raw(
+    request: Request,
+    collection: str = Path(max_length=255, pattern=r"^[a-zA-Z0-9_-]+$"),
+    x_point_id: int = Header(ge=1),
+    x_payload: Optional[str] = Header(None),
+    wait: Optional[bool] = None,
+    current_user: Principal = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Upsert one point whose vector is sent as a raw little-endian float32 body
+    (Content-Type: application/octet-stream). The id goes in X-Point-Id and an
+    optional JSON payload in X-Payload.
+    """
+    try:
+        vector = decode_float32(await request.body())
+        payload = json.loads(x_payload) if x_payload else {}
+        if not isinstance(payload, dict) or len(str(payload)) > 10_000:
+            raise ValueError("X-Payload must be a JSON object within the payload size limit")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    await check_collection(collection, vector.size)
+    try:
+        await upsert_coalescer.upsert(collection, PointStruct(id=x_point_id, vector=vector.tolist(), payload=payload), wait)
+        await run_in_threadpool(audit, db, current_user, "UPSERT_POINT", collection, {"point_id": x_point_id})
+        return {"status": "success", "message": f"Point {x_point_id} upserted into '{collection}'"}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Failed to upsert point: {str(e)}")
+
+@router.post("/{collection}/batch")
+async def upsert_points_batch(
+    request: Request,
+    collection: str = Path(max_length=255, pattern=r"^[a-zA-Z0-9_-]+$"),
+    chunk_size: Optional[int] = Query(None, ge=1),
+    wait: bool = True,
+    current_user: Principal = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Bulk upsert points from a JSON array or a streamed NDJSON body
+    (Content-Type: application/x-ndjson). Rows are validated as they arrive,
+    grouped into chunks and several chunks are sent to Qdrant concurrently.
+    """
+    info = await check_collection(collection)
+    size = min(chunk_size or settings.INGEST_CHUNK_SIZE, settings.INGEST_MAX_CHUNK_SIZE)
+
+    async def upsert_chunk(points: List[PointIn]) -> None:
+        structs = [PointStruct(id=p.id, vector=p.vector, payload=p.payload) for p in points]
+        try:
+            await get_client().upsert(collection_name=collection, points=structs, wait=wait)
+        except BaseException:
+            # Part of the chunk may have been applied (also when it is cancelled mid-call)
+            replicas.invalidate(collection)
+            search_cache.invalidate(collection)
+            raise
+        replicas.upsert(collection, structs)
+
+    summary = await ingest(
+        iter_rows(request),
+        upsert_chunk,
+        chunk_size=size,
+        parallelism=max(1, settings.INGEST_PARALLELISM),
+        max_errors=settings.INGEST_MAX_ERRORS,
+        dimension=info.vector_size if info else None,
+    )
+    if summary["upserted"] or summary["failed"]:
+        search_cache.invalidate(collection)
+    await run_in_threadpool(audit, db, current_user, "UPSERT_POINTS_BATCH", collection, {
+        "received": summary["received"],
+        "upserted": summary["upserted"],
+        "failed": summary["failed"],
+        "invalid": summary["invalid"],
+        "chunks": len(summary["chunks"]),
+        "chunk_size": size,
+    })
+    if summary["failed"] == 0 and summary["invalid"] == 0:
+        status = "success"
+    elif summary["upserted"] > 0:
+        status = "partial"
+    else:
+        status = "failed"
+    return {"status": status, "collection": collection, **summary}
+
+@router.get("/{collection}/export")
+async def export_points(
+    collection: str,
+    format: str = Query("ndjson", pattern="^(ndjson|binary)$"),
+    with_vectors: bool = True,
+    with_payload: bool = True,
+    page_size: Optional[int] = Query(None, ge=1),
+    filter: Optional[str] = None,
+    current_user: Principal = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Stream every point of a collection (or those matching a JSON payload `filter`) page
+    by page, so memory stays flat whatever the collection size. `ndjson` writes one
+    point per line; `binary` writes fixed-layout records (see X-Record-Format) with
+    vectors only and needs integer ids.
+
+    A Qdrant failure after the response has started aborts the chunked transfer, so
+    clients see an incomplete body rather than a short export that looks whole;
+    `ndjson` exports first write a final `{"error": ...}` line.
+    """
+    query_filter = parse_filter(filter)
+    binary = format == "binary"
+    if binary:
+        with_vectors, with_payload = True, False
+    size = page_size or settings.EXPORT_PAGE_SIZE
+    client = get_client()
+
+    async def scroll_page(offset: Any):
+        return await client.scroll(
+            collection_name=collection,
+            limit=size,
+            offset=offset,
+            with_vectors=with_vectors,
+            with_payload=with_payload,
+            scroll_filter=query_filter,
+        )
+
+    # Fetch the first page before answering so a bad collection still gets a 400
+    try:
+        first_page = await scroll_page(None)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Failed to export points: {str(e)}")
+    await run_in_threadpool(audit, db, current_user, "EXPORT_POINTS", collection, {
+        "format": format,
+        "with_vectors": with_vectors,
+        "with_payload": with_payload,
+        "filtered": query_filter is not None,
+    })
+    await unindexed_fields(collection, query_filter)
+
+    async def stream() -> AsyncIterator[bytes]:
+        points, offset = first_page
+        while True:
+            try:
+                if binary:
+                    chunk = b"".join(encode_record(p.id, p.vector) for p in points)
+                else:
+                    chunk = b"".join(dumps(point_dict(p)) + b"\n" for p in points)
+                yield chunk
+                if offset is None:
+                    return
+                points, offset = await scroll_page(offset)
+            except Exception as e:
+                # Headers are already sent: mark the failure in-band and abort the transfer
+                print("Warning: export of", collection, "aborted:", e)
+                if not binary:
+                    yield dumps({"error": f"Export aborted: {str(e)}"}) + b"\n"
+                raise
+
+    if binary:
+        return StreamingResponse(
+            stream(), media_type="application/octet-stream", headers={"X-Record-Format": RECORD_FORMAT}
+        )
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
 @router.get("/{collection}")
-def get_points(
+async def get_points(
     collection: str,
     limit: int = 10,
-    current_user: User = Depends(get_current_user),
+    cursor: Optional[str] = None,
+    with_vectors: bool = False,
+    with_payload: bool = True,
+    filter: Optional[str] = None,
+    accept: Optional[str] = Header(None),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Retrieve points from a Qdrant collection."""
+    """
+    Retrieve a page of points from a Qdrant collection, optionally only those matching
+    a JSON payload `filter`. Pass the returned `next_cursor` back as `cursor` (with the
+    same filter) to fetch the next page; it is null on the last page.
+    Send `Accept: application/json; vectors=base64` to get vectors as base64 float32.
+    """
+    try:
+        offset = decode_cursor(cursor) if cursor else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    query_filter = parse_filter(filter)
     try:
-        result = client.scroll(collection_name=collection, limit=limit)
-        points = [point.dict() for point in result[0]]
-        audit(db, current_user, "GET_POINTS", collection, {"limit": limit})
-        return {"points": points, "count": len(points)}
+        points, next_offset = await get_client().scroll(
+            collection_name=collection,
+            limit=limit,
+            offset=offset,
+            with_vectors=with_vectors,
+            with_payload=with_payload,
+            scroll_filter=query_filter,
+        )
+        base64 = wants_base64_vectors(accept)
+        points = encode_points([point_dict(point) for point in points], base64)
+        await run_in_threadpool(audit, db, current_user, "GET_POINTS", collection, {"limit": limit})
+        content = {
+            "points": points,
+            "count": len(points),
+            "next_cursor": encode_cursor(next_offset) if next_offset is not None else None,
+        }
+        missing = await unindexed_fields(collection, query_filter)
+        if missing:
+            content["unindexed_fields"] = missing
+        return json_response(content, base64)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Failed to fetch points: {str(e)}")
 
 @router.delete("")
-def delete_points(
+async def delete_points(
     data: PointsDeleteIn,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Delete points from a Qdrant collection."""
+    """Delete points from a Qdrant collection, by `ids` or by payload `filter`."""
     try:
-        client.delete(
+        if data.filter is not None:
+            await get_client().delete(
+                collection_name=data.collection,
+                points_selector=FilterSelector(filter=data.filter)
+            )
+            # Which points matched is not known here, so replicas resync
+            replicas.invalidate(data.collection)
+            search_cache.invalidate(data.collection)
+            await run_in_threadpool(audit, db, current_user, "DELETE_POINTS", data.collection, {
+                "filter": data.filter.model_dump(mode="json", exclude_none=True),
+            })
+            content = {"status": "success", "message": f"Deleted points matching the filter from '{data.collection}'"}
+            missing = await unindexed_fields(data.collection, data.filter)
+            if missing:
+                content["unindexed_fields"] = missing
+            return content
+        await get_client().delete(
             collection_name=data.collection,
-            points_selector={"points": data.ids}
+            points_selector=PointIdsList(points=data.ids)
         )
-        audit(db, current_user, "DELETE_POINTS", data.collection, {"point_ids": data.ids})
+        replicas.delete(data.collection, data.ids)
+        search_cache.invalidate(data.collection)
+        await run_in_threadpool(audit, db, current_user, "DELETE_POINTS", data.collection, {"point_ids": data.ids})
         return {"status": "success", "message": f"Deleted points {data.ids} from '{data.collection}'"}
+    except HTTPException:
+        raise
     except Exception as e:
+        # Qdrant may have applied the delete before the error reached us
+        replicas.invalidate(data.collection)
+        search_cache.invalidate(data.collection)
         raise HTTPException(status_code=400, detail=f"Failed to delete points: {str(e)}")
\ No newline at end of file
@@ -1,32 +1,253 @@
-from fastapi import APIRouter, HTTPException, Depends
+import asyncio
+from typing import Any, Dict, List, Optional
+from fastapi import APIRouter, HTTPException, Depends, Header, Path, Request
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-from qdrant_client import QdrantClient
-from ..config import settings
-from ..schemas import VectorSearchIn
-from ..deps import get_current_user
+from qdrant_client.models import Filter, SearchParams, SearchRequest
+from ..schemas import VectorSearchIn, VectorSearchBatchIn
+from ..deps import get_current_user, require_role
 from ..audit import audit
 from ..db import get_db
-from ..models import User  # Add this import
+from ..qdrant import get_client
+from ..collection_cache import check_collection
+from ..vectors import decode_float32
+from ..principals import Principal
+from ..search_cache import search_cache
+from ..replica import replicas
+from ..tuning import search_params
+from ..filters import filter_key, parse_filter, unindexed_fields
+from ..singleflight import search_flight
+from ..serialization import encode_points, json_response, point_dict, wants_base64_vectors
 
 router = APIRouter(prefix="/search", tags=["search"])
-client = QdrantClient(url=settings.QDRANT_URL, prefer_grpc=False)
+
+def _params(query: VectorSearchIn) -> Optional[SearchParams]:
+    return search_params(query.hnsw_ef, query.exact, query.rescore, query.oversampling)
+
+def _params_key(query: VectorSearchIn) -> Optional[str]:
+    params = _params(query)
+    return params.model_dump_json(exclude_none=True) if params is not None else None
+
+def _with_unindexed(content: Dict[str, Any], fields: List[str]) -> Dict[str, Any]:
+    if fields:
+        content["unindexed_fields"] = fields
+    return content
+
+async def _search(
+    collection: str, vector, limit: int, with_payload: bool, score_threshold: Optional[float], with_vectors: bool = False,
+    params: Optional[SearchParams] = None, query_filter: Optional[Filter] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Search one collection, going through the result cache when it is enabled. Identical
+    concurrent searches share one Qdrant call; unfiltered searches on collections with a
+    fresh local replica are answered in-process instead.
+    """
+    params_key = params.model_dump_json(exclude_none=True) if params is not None else None
+    extra = (params_key, filter_key(query_filter))
+    flight_key = search_cache.key(
+        collection, vector, limit, with_payload, score_threshold, with_vectors, *extra, exact=True
+    )
+    cache_key = None
+    if search_cache.enabled:
+        cache_key = flight_key if search_cache.quantize is None else search_cache.key(
+            collection, vector, limit, with_payload, score_threshold, with_vectors, *extra
+        )
+        results = search_cache.get(cache_key)
+        if results is not None:
+            return results
+
+    async def _query() -> List[Dict[str, Any]]:
+        results = None
+        if query_filter is None:
+            results = await replicas.search(collection, vector, limit, with_payload, score_threshold, with_vectors)
+        if results is not None:
+            if cache_key is not None:
+                search_cache.put(cache_key, results)
+            return results
+        result = await get_client().search(
+            collection_name=collection,
+            query_vector=vector,
+            limit=limit,
+            with_payload=with_payload,
+            with_vectors=with_vectors,
+            score_threshold=score_threshold,
+            search_params=params,
+            query_filter=query_filter,
+        )
+        results = [point_dict(hit) for hit in result]
+        if cache_key is not None:
+            search_cache.put(cache_key, results)
+        return results
+
+    return await search_flight.do(flight_key, _query)
 
 @router.post("")
-def vector_search(
+async def vector_search(
     data: VectorSearchIn,
-    current_user: User = Depends(get_current_user),
+    accept: Optional[str] = Header(None),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Perform vector search in a Qdrant collection."""
+    """
+    Perform vector search in a Qdrant collection, optionally restricted by a Qdrant
+    payload `filter`; filtered fields without a payload index are listed in
+    `unindexed_fields`. `hnsw_ef`, `exact`, `rescore` and `oversampling` trade latency
+    for recall. Send `Accept: application/json; vectors=base64` to get vectors as
+    base64 float32.
+    """
+    await check_collection(data.collection, len(data.vector))
     try:
-        result = client.search(
-            collection_name=data.collection,
-            query_vector=data.vector,
-            limit=data.limit,
-            with_payload=data.with_payload,
-            score_threshold=data.score_threshold
+        results = await _search(
+            data.collection, data.vector, data.limit, data.with_payload, data.score_threshold, data.with_vectors,
+            _params(data), data.filter,
+        )
+        await run_in_threadpool(audit, db, current_user, "VECTOR_SEARCH", data.collection, {"limit": data.limit})
+        base64 = wants_base64_vectors(accept)
+        return json_response(
+            _with_unindexed({"results": encode_points(results, base64)}, await unindexed_fields(data.collection, data.filter)),
+            base64,
         )
-        audit(db, current_user, "VECTOR_SEARCH", data.collection, {"limit": data.limit})
-        return {"results": [hit.dict() for hit in result]}
+    except HTTPException:
+        raise
     except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Search failed: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=400, detail=f"Search failed: {str(e)}")
+
+@router.post("/{collection}/raw")
+async def vector_search_raw(
+    request: Request,
+    collection: str = Path(max_length=255, pattern=r"^[a-zA-Z0-9_-]+$"),
+    x_limit: int = Header(10, ge=1, le=100),
+    x_with_payload: bool = Header(True),
+    x_score_threshold: Optional[float] = Header(None, ge=0.0, le=1.0),
+    x_with_vectors: bool = Header(False),
+    x_hnsw_ef: Optional[int] = Header(None, ge=1, le=4096),
+    x_exact: bool = Header(False),
+    x_filter: Optional[str] = Header(None),
+    accept: Optional[str] = Header(None),
+    current_user: Principal = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Vector search with the query sent as a raw little-endian float32 body
+    (Content-Type: application/octet-stream). Search options go in the X-Limit,
+    X-With-Payload, X-With-Vectors, X-Score-Threshold, X-Hnsw-Ef and X-Exact headers,
+    and an optional JSON payload filter in X-Filter.
+    """
+    try:
+        vector = decode_float32(await request.body())
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    query_filter = parse_filter(x_filter)
+    await check_collection(collection, vector.size)
+    try:
+        results = await _search(
+            collection, vector.tolist(), x_limit, x_with_payload, x_score_threshold, x_with_vectors,
+            search_params(hnsw_ef=x_hnsw_ef, exact=x_exact), query_filter,
+        )
+        await run_in_threadpool(audit, db, current_user, "VECTOR_SEARCH", collection, {"limit": x_limit})
+        base64 = wants_base64_vectors(accept)
+        return json_response(
+            _with_unindexed({"results": encode_points(results, base64)}, await unindexed_fields(collection, query_filter)),
+            base64,
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Search failed: {str(e)}")
+
+@router.post("/batch")
+async def vector_search_batch(
+    data: VectorSearchBatchIn,
+    accept: Optional[str] = Header(None),
+    current_user: Principal = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Run many vector searches in one request. Queries against the same collection are
+    sent as one Qdrant batch search; different collections are queried concurrently.
+    Results are returned in input order.
+    """
+    results: List[Any] = [None] * len(data.queries)
+    cache_keys: Dict[int, Any] = {}
+    by_collection: Dict[str, List[int]] = {}
+    for i, query in enumerate(data.queries):
+        try:
+            await check_collection(query.collection, len(query.vector))
+        except HTTPException as e:
+            results[i] = {"error": e.detail}
+            continue
+        if search_cache.enabled:
+            cache_keys[i] = search_cache.key(
+                query.collection, query.vector, query.limit, query.with_payload, query.score_threshold,
+                query.with_vectors, _params_key(query), filter_key(query.filter),
+            )
+            cached = search_cache.get(cache_keys[i])
+            if cached is not None:
+                results[i] = {"results": cached}
+                continue
+        hits = None
+        if query.filter is None:
+            hits = await replicas.search(
+                query.collection, query.vector, query.limit, query.with_payload, query.score_threshold,
+                query.with_vectors,
+            )
+        if hits is not None:
+            if i in cache_keys:
+                search_cache.put(cache_keys[i], hits)
+            results[i] = {"results": hits}
+            continue
+        by_collection.setdefault(query.collection, []).append(i)
+
+    async def _search_collection(collection: str, indices: List[int]) -> None:
+        try:
+            batches = await get_client().search_batch(
+                collection_name=collection,
+                requests=[
+                    SearchRequest(
+                        vector=data.queries[i].vector,
+                        limit=data.queries[i].limit,
+                        with_payload=data.queries[i].with_payload,
+                        with_vector=data.queries[i].with_vectors,
+                        score_threshold=data.queries[i].score_threshold,
+                        params=_params(data.queries[i]),
+                        filter=data.queries[i].filter,
+                    )
+                    for i in indices
+                ],
+            )
+        except Exception as e:
+            for i in indices:
+                results[i] = {"error": f"Search failed: {str(e)}"}
+            return
+        for i, hits in zip(indices, batches):
+            hits = [point_dict(hit) for hit in hits]
+            if i in cache_keys:
+                search_cache.put(cache_keys[i], hits)
+            results[i] = {"results": hits}
+
+    await asyncio.gather(*(_search_collection(c, idx) for c, idx in by_collection.items()))
+    for i, query in enumerate(data.queries):
+        if query.filter is not None and "results" in results[i]:
+            _with_unindexed(results[i], await unindexed_fields(query.collection, query.filter))
+
+    counts: Dict[str, int] = {}
+    for query in data.queries:
+        counts[query.collection] = counts.get(query.collection, 0) + 1
+    await run_in_threadpool(audit, db, current_user, "VECTOR_SEARCH_BATCH", ",".join(sorted(counts))[:255], {
+        "queries": len(data.queries),
+        "collections": counts,
+    })
+    base64 = wants_base64_vectors(accept)
+    if base64:
+        results = [{**r, "results": encode_points(r["results"], True)} if "results" in r else r for r in results]
+    return json_response({"results": results}, base64)
+
+@router.get("/cache")
+async def search_cache_stats(current_user: Principal = Depends(require_role("ADMIN"))):
+    """Search result cache and in-flight coalescing counters (hits, misses, evictions, size)."""
+    return {**search_cache.stats(), "singleflight": search_flight.stats()}
+
+@router.get("/replicas")
+async def search_replica_stats(current_user: Principal = Depends(require_role("ADMIN"))):
+    """Local replicas: freshness, point count and age of the last sync."""
+    return {"replicas": replicas.stats()}
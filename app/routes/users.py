@@ -1,42 +1,46 @@
 from fastapi import APIRouter, HTTPException, Depends
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from ..schemas import UserCreateIn, UserOut
-from ..deps import get_current_user, require_role
+from ..deps import find_user, get_current_user, require_role
 from ..models import User
-from ..security import hash_password
+from ..principals import Principal, principal_cache
+from ..password_pool import password_pool
 from ..db import get_db
 
 router = APIRouter(prefix="/users", tags=["users"])
 
+def _save_user(db: Session, user: User) -> User:
+    db.add(user)
+    db.commit()
+    db.refresh(user)
+    return user
+
 @router.post("", response_model=UserOut)
-def create_user(
+async def create_user(
     data: UserCreateIn,
-    current_user: User = Depends(require_role("ADMIN")),
+    current_user: Principal = Depends(require_role("ADMIN")),
     db: Session = Depends(get_db)
 ):
     """Create a new user (admin only)."""
     # Check if user already exists
-    existing_user = db.query(User).filter(User.email == data.email).first()
+    existing_user = await run_in_threadpool(find_user, db, data.email)
     if existing_user:
         raise HTTPException(status_code=400, detail="User already exists")
     
-    # Create new user
-    hashed_password = hash_password(data.password)
+    # Create new user; bcrypt runs in the bounded password pool
+    hashed_password = await password_pool.hash(data.password)
     user = User(
         email=data.email,
         hashed_password=hashed_password,
         role=data.role.value
     )
     
-    db.add(user)
-    db.commit()
-    db.refresh(user)
-    
-    return user
+    return await run_in_threadpool(_save_user, db, user)
 
 @router.get("", response_model=list[UserOut])
 def list_users(
-    current_user: User = Depends(require_role("ADMIN")),
+    current_user: Principal = Depends(require_role("ADMIN")),
     db: Session = Depends(get_db)
 ):
     """List all users (admin only)."""
@@ -46,7 +50,7 @@ def list_users(
 @router.delete("/{user_id}")
 def delete_user(
     user_id: int,
-    current_user: User = Depends(require_role("ADMIN")),
+    current_user: Principal = Depends(require_role("ADMIN")),
     db: Session = Depends(get_db)
 ):
     """Delete a user (admin only)."""
@@ -60,5 +64,6 @@ def delete_user(
     
     db.delete(user)
     db.commit()
+    principal_cache.invalidate(user.email)
     
     return {"status": "success", "message": f"User {user_id} deleted"}
\ No newline at end of file
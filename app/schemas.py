@@ -1,9 +1,22 @@
-from pydantic import BaseModel, EmailStr, Field, validator
+from pydantic import BaseModel, EmailStr, Field, validator, model_validator
 from typing import List, Optional, Any, Dict
-from .enums import RoleEnum, DistanceEnum
+from qdrant_client.models import Filter
+from .enums import RoleEnum, DistanceEnum, QuantizationEnum, CompressionEnum, PayloadSchemaEnum
+from .config import settings
+from .vectors import check_vector, decode_base64
 from datetime import datetime
+import numpy as np
 import re
 
+def _resolve_vector(model):
+    """Require exactly one of `vector` / `vector_b64` and decode the base64 form."""
+    if (model.vector is None) == (model.vector_b64 is None):
+        raise ValueError("Provide exactly one of vector or vector_b64")
+    if model.vector_b64 is not None:
+        model.vector = decode_base64(model.vector_b64).tolist()
+        model.vector_b64 = None
+    return model
+
 class LoginIn(BaseModel):
     """Input schema for user login."""
     email: EmailStr
@@ -49,46 +62,177 @@ class UserOut(BaseModel):
     class Config:
         from_attributes = True
 
+class HnswConfigIn(BaseModel):
+    """HNSW index build parameters; unset fields keep Qdrant's defaults."""
+    m: Optional[int] = Field(None, ge=0, le=128)  # 0 disables the HNSW graph
+    ef_construct: Optional[int] = Field(None, ge=4, le=4096)
+    full_scan_threshold: Optional[int] = Field(None, ge=0)  # KB of vectors below which search is exact
+    on_disk: Optional[bool] = None
+
+class QuantizationIn(BaseModel):
+    """Vector quantization: scalar (int8) or product quantization."""
+    type: QuantizationEnum
+    quantile: Optional[float] = Field(None, ge=0.5, le=1.0)  # scalar only
+    compression: Optional[CompressionEnum] = None  # product only, required there
+    always_ram: Optional[bool] = None
+
+    @model_validator(mode="after")
+    def check_type_options(self):
+        if self.type == QuantizationEnum.PRODUCT and self.compression is None:
+            raise ValueError("Product quantization requires compression")
+        if self.type != QuantizationEnum.SCALAR and self.quantile is not None:
+            raise ValueError("quantile only applies to scalar quantization")
+        if self.type != QuantizationEnum.PRODUCT and self.compression is not None:
+            raise ValueError("compression only applies to product quantization")
+        return self
+
+class OptimizersConfigIn(BaseModel):
+    """Optimizer and segment settings; unset fields keep Qdrant's defaults."""
+    indexing_threshold: Optional[int] = Field(None, ge=0)  # KB
+    memmap_threshold: Optional[int] = Field(None, ge=0)  # KB
+    default_segment_number: Optional[int] = Field(None, ge=0)
+    max_segment_size: Optional[int] = Field(None, ge=0)  # KB
+    deleted_threshold: Optional[float] = Field(None, ge=0.0, le=1.0)
+    vacuum_min_vector_number: Optional[int] = Field(None, ge=100)
+    flush_interval_sec: Optional[int] = Field(None, ge=0)
+
 class CollectionCreateIn(BaseModel):
     """Input schema for creating a Qdrant collection."""
     name: str = Field(max_length=255, pattern=r"^[a-zA-Z0-9_-]+$")  # FIXED: regex -> pattern
     vector_size: int = Field(ge=1)
     distance: DistanceEnum = DistanceEnum.COSINE
+    on_disk: Optional[bool] = None  # keep original vectors on disk (memmap)
+    on_disk_payload: Optional[bool] = None
+    hnsw: Optional[HnswConfigIn] = None
+    quantization: Optional[QuantizationIn] = None
+    optimizers: Optional[OptimizersConfigIn] = None
 
-class PointUpsertIn(BaseModel):
-    """Input schema for upserting a Qdrant point."""
-    collection: str = Field(max_length=255, pattern=r"^[a-zA-Z0-9_-]+$")  # FIXED: regex -> pattern
+    @validator("quantization")
+    def validate_quantization(cls, v):
+        if v is not None and v.type == QuantizationEnum.DISABLED:
+            raise ValueError("Omit quantization instead of disabling it at creation")
+        return v
+
+class CollectionUpdateIn(BaseModel):
+    """Input schema for changing tuning settings of an existing collection."""
+    on_disk: Optional[bool] = None
+    on_disk_payload: Optional[bool] = None
+    hnsw: Optional[HnswConfigIn] = None
+    quantization: Optional[QuantizationIn] = None  # type "disabled" removes quantization
+    optimizers: Optional[OptimizersConfigIn] = None
+
+    @model_validator(mode="after")
+    def check_not_empty(self):
+        if not self.model_fields_set:
+            raise ValueError("Nothing to update")
+        return self
+
+class PointIn(BaseModel):
+    """Input schema for a single Qdrant point (used by batch ingestion)."""
     id: int = Field(ge=1)
-    vector: List[float]
+    vector: Optional[List[float]] = None
+    vector_b64: Optional[str] = None  # base64 little-endian float32, alternative to `vector`
     payload: Dict[str, Any] = {}
 
     @validator("vector")
     def validate_vector(cls, v):
-        if not all(isinstance(x, (int, float)) and -1e9 <= x <= 1e9 for x in v):
-            raise ValueError("Vector elements must be numbers within reasonable bounds")
+        if v is not None:
+            check_vector(np.asarray(v, dtype=np.float64))
         return v
 
+    @model_validator(mode="after")
+    def decode_vector(self):
+        return _resolve_vector(self)
+
     @validator("payload")
     def validate_payload(cls, v):
         if len(str(v)) > 10_000:
             raise ValueError("Payload size exceeds maximum limit")
         return v
 
+class PointUpsertIn(PointIn):
+    """Input schema for upserting a Qdrant point."""
+    collection: str = Field(max_length=255, pattern=r"^[a-zA-Z0-9_-]+$")  # FIXED: regex -> pattern
+
 class PointsDeleteIn(BaseModel):
-    """Input schema for deleting Qdrant points."""
+    """Input schema for deleting Qdrant points, by id or by payload filter."""
     collection: str = Field(max_length=255, pattern=r"^[a-zA-Z0-9_-]+$")  # FIXED: regex -> pattern
-    ids: List[int] = Field(min_items=1)
+    ids: Optional[List[int]] = Field(None, min_items=1)
+    filter: Optional[Filter] = None
+
+    @model_validator(mode="after")
+    def check_selector(self):
+        if (self.ids is None) == (self.filter is None):
+            raise ValueError("Provide exactly one of ids or filter")
+        if self.filter is not None:
+            # An empty filter matches every point; deleting a whole collection is DELETE /collections/{name}
+            min_should = self.filter.min_should.conditions if self.filter.min_should else None
+            if not any((self.filter.must, self.filter.should, self.filter.must_not, min_should)):
+                raise ValueError("filter must contain at least one condition")
+        return self
+
+class PayloadIndexIn(BaseModel):
+    """Input schema for creating a payload field index."""
+    field_name: str = Field(min_length=1, max_length=255)  # nested fields as "a.b" or "a[].b"
+    field_schema: PayloadSchemaEnum
+
+class JobLimitsIn(BaseModel):
+    """Per-job throughput settings; unset ones use the JOB_* defaults, all are capped by the JOB_MAX_* settings."""
+    batch_size: Optional[int] = Field(None, ge=1)  # points per chunk
+    parallelism: Optional[int] = Field(None, ge=1)  # chunks in flight
+    max_points_per_second: Optional[int] = Field(None, ge=1)
+
+class JobMigrateIn(JobLimitsIn):
+    """Input schema for copying a collection into a new one with different vector settings."""
+    source: str = Field(max_length=255, pattern=r"^[a-zA-Z0-9_-]+$")
+    target: str = Field(max_length=255, pattern=r"^[a-zA-Z0-9_-]+$")
+    distance: Optional[DistanceEnum] = None  # defaults to the source's
+    on_disk: Optional[bool] = None
+    on_disk_payload: Optional[bool] = None
+    hnsw: Optional[HnswConfigIn] = None
+    quantization: Optional[QuantizationIn] = None
+    optimizers: Optional[OptimizersConfigIn] = None
+    # Copy into an existing target with the same vector size and distance; its other settings stay as they are
+    overwrite: bool = False
+
+    @model_validator(mode="after")
+    def check_target(self):
+        if self.source == self.target:
+            raise ValueError("target must differ from source")
+        if self.quantization is not None and self.quantization.type == QuantizationEnum.DISABLED:
+            raise ValueError("Omit quantization instead of disabling it")
+        return self
+
+class JobDeleteIn(JobLimitsIn):
+    """Input schema for deleting a large set of point ids in the background."""
+    collection: str = Field(max_length=255, pattern=r"^[a-zA-Z0-9_-]+$")
+    ids: List[int] = Field(min_items=1, max_items=settings.JOB_MAX_DELETE_IDS)
 
 class VectorSearchIn(BaseModel):
     """Input schema for Qdrant vector search."""
     collection: str = Field(max_length=255, pattern=r"^[a-zA-Z0-9_-]+$")  # FIXED: regex -> pattern
-    vector: List[float]
+    vector: Optional[List[float]] = None
+    vector_b64: Optional[str] = None  # base64 little-endian float32, alternative to `vector`
     limit: int = Field(ge=1, le=100, default=10)
     with_payload: bool = True
+    with_vectors: bool = False
     score_threshold: Optional[float] = Field(None, ge=0.0, le=1.0)
+    hnsw_ef: Optional[int] = Field(None, ge=1, le=4096)  # larger = better recall, slower
+    exact: bool = False  # brute force, bypassing the index
+    rescore: Optional[bool] = None  # re-rank quantized candidates with original vectors
+    oversampling: Optional[float] = Field(None, ge=1.0, le=16.0)  # quantized candidates fetched per result
+    filter: Optional[Filter] = None  # Qdrant payload filter (match, range, geo, nested, ...)
 
     @validator("vector")
     def validate_vector(cls, v):
-        if not all(isinstance(x, (int, float)) and -1e9 <= x <= 1e9 for x in v):
-            raise ValueError("Vector elements must be numbers within reasonable bounds")
-        return v
\ No newline at end of file
+        if v is not None:
+            check_vector(np.asarray(v, dtype=np.float64))
+        return v
+
+    @model_validator(mode="after")
+    def decode_vector(self):
+        return _resolve_vector(self)
+
+class VectorSearchBatchIn(BaseModel):
+    """Input schema for running many vector searches in one request."""
+    queries: List[VectorSearchIn] = Field(min_items=1, max_items=settings.SEARCH_BATCH_MAX_QUERIES)
@@ -0,0 +1,164 @@
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Set, Tuple
+import numpy as np
+from .config import settings
+from .invalidation import SharedVersion
+from .singleflight import search_flight
+from .metrics import SEARCH_CACHE_EVENTS
+from .serialization import dumps
+
+def parse_ttls(spec: str) -> Dict[str, int]:
+    """Parse "collection:seconds,other:seconds" into a dict."""
+    ttls: Dict[str, int] = {}
+    for item in filter(None, (p.strip() for p in spec.split(","))):
+        name, _, seconds = item.partition(":")
+        try:
+            ttls[name.strip()] = int(seconds)
+        except ValueError:
+            print("Warning: ignoring invalid search cache TTL:", item)
+    return ttls
+
+class SearchCache:
+    """
+    Per-worker LRU cache of search results, bounded by the approximate total size of
+    the cached responses.
+
+    Every key embeds the collection's generation: a local counter plus a version token
+    shared by all workers. Writes to a collection bump both, so older entries can never
+    be served again and are dropped eagerly. The shared token also moves with the cache
+    disabled while singleflight is on, since flight keys embed it as well.
+
+    The cache is only touched from the event loop, so it needs no locking.
+    """
+
+    def __init__(self, enabled: bool, max_bytes: int, default_ttl: int, ttls: Dict[str, int], quantize: Optional[int] = None):
+        self.enabled = enabled
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self.ttls = ttls
+        self.quantize = quantize
+        self._entries: "OrderedDict[Hashable, Tuple[float, int, Any]]" = OrderedDict()
+        self._by_collection: Dict[str, Set[Hashable]] = {}
+        self._generations: Dict[str, int] = {}
+        self._versions: Dict[str, SharedVersion] = {}
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def ttl(self, collection: str) -> int:
+        return self.ttls.get(collection, self.default_ttl)
+
+    def _version(self, collection: str) -> SharedVersion:
+        version = self._versions.get(collection)
+        if version is None:
+            version = self._versions[collection] = SharedVersion(f"collection-{collection}")
+        return version
+
+    def vector_hash(self, vector, exact: bool = False) -> bytes:
+        arr = np.asarray(vector, dtype=np.float32)
+        if self.quantize is not None and not exact:
+            arr = np.round(arr, self.quantize)
+        return hashlib.blake2b(arr.tobytes(), digest_size=16).digest()
+
+    def key(
+        self, collection: str, vector, limit: int, with_payload: bool, score_threshold: Optional[float], *extra: Hashable,
+        exact: bool = False,
+    ) -> Hashable:
+        """Cache key for a search; `exact` skips vector quantization (used for singleflight keys)."""
+        return (
+            collection,
+            self._generations.get(collection, 0),
+            self._version(collection).current(),
+            self.vector_hash(vector, exact),
+            limit,
+            with_payload,
+            score_threshold,
+            *extra,
+        )
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            SEARCH_CACHE_EVENTS.labels("miss").inc()
+            return None
+        expires, _, value = entry
+        if expires < time.monotonic():
+            self._remove(key)
+            self.expirations += 1
+            self.misses += 1
+            SEARCH_CACHE_EVENTS.labels("miss").inc()
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        SEARCH_CACHE_EVENTS.labels("hit").inc()
+        return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        collection = key[0]
+        ttl = self.ttl(collection)
+        if ttl <= 0:
+            return
+        size = len(dumps(value))
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (time.monotonic() + ttl, size, value)
+        self._by_collection.setdefault(collection, set()).add(key)
+        self.bytes += size
+        while self.bytes > self.max_bytes and self._entries:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+            SEARCH_CACHE_EVENTS.labels("eviction").inc()
+
+    def invalidate(self, collection: str) -> None:
+        """Start a new generation for `collection` here and in every other worker."""
+        # Singleflight keys embed the generation too, so it moves even with the cache disabled:
+        # otherwise a read after a write on another worker could join a search started before it
+        self._generations[collection] = self._generations.get(collection, 0) + 1
+        if self.enabled or search_flight.enabled:
+            self._version(collection).bump()
+        if not self.enabled:
+            return
+        for key in self._by_collection.pop(collection, set()):
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self.bytes -= entry[1]
+        self.invalidations += 1
+
+    def _remove(self, key: Hashable) -> None:
+        _, size, _ = self._entries.pop(key)
+        self.bytes -= size
+        keys = self._by_collection.get(key[0])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_collection[key[0]]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._entries),
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+        }
+
+search_cache = SearchCache(
+    enabled=settings.SEARCH_CACHE_ENABLED,
+    max_bytes=settings.SEARCH_CACHE_MAX_BYTES,
+    default_ttl=settings.SEARCH_CACHE_TTL,
+    ttls=parse_ttls(settings.SEARCH_CACHE_TTLS),
+    quantize=settings.SEARCH_CACHE_QUANTIZE if settings.SEARCH_CACHE_QUANTIZE >= 0 else None,
+)
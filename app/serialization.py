@@ -0,0 +1,64 @@
+from typing import Any, Dict, List, Optional
+import orjson
+from fastapi import Response
+from .vectors import encode_base64
+
+JSON = "application/json"
+# Clients opt into compact vectors with `Accept: application/json; vectors=base64`
+JSON_BASE64_VECTORS = "application/json; vectors=base64"
+
+def wants_base64_vectors(accept: Optional[str]) -> bool:
+    """True when the Accept header asks for base64 float32 vectors."""
+    if not accept:
+        return False
+    for media_range in accept.split(","):
+        media_type, *params = [part.strip().lower() for part in media_range.split(";")]
+        if media_type in (JSON, "application/*", "*/*") and "vectors=base64" in params:
+            return True
+    return False
+
+def _vector(vector: Any, base64: bool) -> Any:
+    if not base64 or vector is None:
+        return vector
+    if isinstance(vector, dict):
+        return {name: _vector(v, base64) for name, v in vector.items()}
+    if isinstance(vector, list) and vector and isinstance(vector[0], float):
+        return encode_base64(vector)
+    # Multi-vectors and sparse vectors keep their JSON form
+    return vector
+
+def point_dict(point: Any) -> Dict[str, Any]:
+    """
+    Plain dict of a ScoredPoint or Record, built from its attributes instead of
+    through pydantic; keys match `point.dict()`.
+    """
+    data = {"id": point.id}
+    if hasattr(point, "score"):
+        data["version"] = point.version
+        data["score"] = point.score
+    data["payload"] = point.payload
+    data["vector"] = point.vector
+    data["shard_key"] = point.shard_key
+    data["order_value"] = point.order_value
+    return data
+
+def _default(obj: Any) -> Any:
+    if hasattr(obj, "model_dump"):
+        return obj.model_dump()
+    return str(obj)
+
+def dumps(content: Any) -> bytes:
+    return orjson.dumps(content, default=_default, option=orjson.OPT_SERIALIZE_NUMPY)
+
+def encode_points(points: List[Dict[str, Any]], base64: bool) -> List[Dict[str, Any]]:
+    """Replace dense vectors with base64 float32 strings when `base64` is set."""
+    if not base64:
+        return points
+    return [{**p, "vector": _vector(p.get("vector"), True)} if p.get("vector") is not None else p for p in points]
+
+def json_response(content: Any, base64: bool = False) -> Response:
+    """
+    Encode `content` straight to JSON bytes with orjson, bypassing FastAPI's
+    jsonable_encoder pass over the (already plain) result dicts.
+    """
+    return Response(dumps(content), media_type=JSON_BASE64_VECTORS if base64 else JSON)
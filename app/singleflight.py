@@ -0,0 +1,54 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+from .config import settings
+from .metrics import SINGLEFLIGHT_EVENTS
+
+class SingleFlight:
+    """
+    Per-worker in-flight call coalescing: while a call for a key is running, further
+    callers with the same key await that call instead of starting their own, and all
+    of them get its result (or its exception). Nothing is kept once the call finishes,
+    so results are never served after the fact.
+
+    The shared call is shielded, so a leader whose client disconnects does not cancel
+    it for the others. Keys for searches embed the collection's write generation, so a
+    caller arriving after a write never joins a search that started before it.
+    """
+
+    def __init__(self, enabled: bool):
+        self.enabled = enabled
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+        self.leaders = 0
+        self.followers = 0
+
+    def _done(self, key: Hashable, task: asyncio.Future) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        # Mark the exception as retrieved even if every caller went away
+        if not task.cancelled():
+            task.exception()
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        if not self.enabled:
+            return await fn()
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda t: self._done(key, t))
+            self.leaders += 1
+            SINGLEFLIGHT_EVENTS.labels("leader").inc()
+        else:
+            self.followers += 1
+            SINGLEFLIGHT_EVENTS.labels("shared").inc()
+        return await asyncio.shield(task)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "in_flight": len(self._calls),
+            "leaders": self.leaders,
+            "followers": self.followers,
+        }
+
+search_flight = SingleFlight(enabled=settings.SEARCH_SINGLEFLIGHT_ENABLED)
@@ -0,0 +1,55 @@
+from typing import Optional, Union
+from qdrant_client.models import (
+    CompressionRatio,
+    Disabled,
+    HnswConfigDiff,
+    OptimizersConfigDiff,
+    ProductQuantization,
+    ProductQuantizationConfig,
+    QuantizationSearchParams,
+    ScalarQuantization,
+    ScalarQuantizationConfig,
+    ScalarType,
+    SearchParams,
+)
+from .enums import QuantizationEnum
+from .schemas import HnswConfigIn, OptimizersConfigIn, QuantizationIn
+
+def hnsw_config(data: Optional[HnswConfigIn]) -> Optional[HnswConfigDiff]:
+    if data is None:
+        return None
+    return HnswConfigDiff(**data.model_dump(exclude_none=True))
+
+def optimizers_config(data: Optional[OptimizersConfigIn]) -> Optional[OptimizersConfigDiff]:
+    if data is None:
+        return None
+    return OptimizersConfigDiff(**data.model_dump(exclude_none=True))
+
+def quantization_config(
+    data: Optional[QuantizationIn],
+) -> Optional[Union[ScalarQuantization, ProductQuantization, Disabled]]:
+    if data is None:
+        return None
+    if data.type == QuantizationEnum.DISABLED:
+        return Disabled.DISABLED
+    if data.type == QuantizationEnum.PRODUCT:
+        return ProductQuantization(product=ProductQuantizationConfig(
+            compression=CompressionRatio(data.compression.value), always_ram=data.always_ram,
+        ))
+    return ScalarQuantization(scalar=ScalarQuantizationConfig(
+        type=ScalarType.INT8, quantile=data.quantile, always_ram=data.always_ram,
+    ))
+
+def search_params(
+    hnsw_ef: Optional[int] = None,
+    exact: bool = False,
+    rescore: Optional[bool] = None,
+    oversampling: Optional[float] = None,
+) -> Optional[SearchParams]:
+    """Search-time recall/latency knobs, or None to leave Qdrant's defaults."""
+    if hnsw_ef is None and not exact and rescore is None and oversampling is None:
+        return None
+    quantization = None
+    if rescore is not None or oversampling is not None:
+        quantization = QuantizationSearchParams(rescore=rescore, oversampling=oversampling)
+    return SearchParams(hnsw_ef=hnsw_ef, exact=exact, quantization=quantization)
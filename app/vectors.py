@@ -0,0 +1,45 @@
+import base64
+import binascii
+import struct
+from typing import Any, Iterable, Union
+import numpy as np
+
+VECTOR_BOUND = 1e9
+FLOAT32_LE = np.dtype("<f4")
+# Binary export record: u64 point id, u32 dimension, then `dimension` float32 values
+RECORD_HEADER = struct.Struct("<QI")
+RECORD_FORMAT = "u64 id, u32 dim, float32[dim], little-endian"
+
+def check_vector(arr: np.ndarray) -> np.ndarray:
+    """Vectorized bounds and finiteness check, replacing the per-element Python loop."""
+    if arr.ndim != 1 or arr.size == 0:
+        raise ValueError("Vector must be a non-empty 1-D array")
+    if not np.isfinite(arr).all() or np.abs(arr).max() > VECTOR_BOUND:
+        raise ValueError("Vector elements must be numbers within reasonable bounds")
+    return arr
+
+def decode_float32(buf: Union[bytes, bytearray, memoryview]) -> np.ndarray:
+    """View a raw little-endian float32 buffer as a NumPy array without copying."""
+    if len(buf) == 0 or len(buf) % FLOAT32_LE.itemsize:
+        raise ValueError("Binary vector length must be a positive multiple of 4 bytes")
+    return check_vector(np.frombuffer(buf, dtype=FLOAT32_LE))
+
+def decode_base64(data: str) -> np.ndarray:
+    """Decode base64 little-endian float32 and view it as a NumPy array."""
+    try:
+        raw = base64.b64decode(data, validate=True)
+    except (binascii.Error, ValueError):
+        raise ValueError("vector_b64 is not valid base64")
+    return decode_float32(raw)
+
+def encode_base64(vector: Iterable[float]) -> str:
+    return base64.b64encode(np.asarray(vector, dtype=FLOAT32_LE).tobytes()).decode("ascii")
+
+def encode_record(point_id: Any, vector: Iterable[float]) -> bytes:
+    """Encode one point in the binary export format. Only unsigned integer ids fit."""
+    if not isinstance(point_id, int) or point_id < 0:
+        raise ValueError(f"Binary export needs unsigned integer ids, got {point_id!r}")
+    if not isinstance(vector, (list, np.ndarray)):
+        raise ValueError("Binary export needs a single unnamed dense vector per point")
+    arr = np.asarray(vector, dtype=FLOAT32_LE)
+    return RECORD_HEADER.pack(point_id, arr.size) + arr.tobytes()
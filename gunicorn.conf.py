@@ -0,0 +1,17 @@
+import os
+import shutil
+
+# Picked up automatically by gunicorn from the working directory.
+# Prometheus multiprocess mode: every worker writes metric files into this directory
+# and /metrics aggregates them, so a scrape sees the whole server, not one worker.
+multiproc_dir = os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", "/tmp/qdrant-manager-metrics")
+
+def on_starting(server):
+    # Start from a clean directory so samples of a previous run are not merged in
+    shutil.rmtree(multiproc_dir, ignore_errors=True)
+    os.makedirs(multiproc_dir, exist_ok=True)
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
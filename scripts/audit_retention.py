@@ -0,0 +1,86 @@
+"""
+Delete audit log rows older than the retention period, in small chunks.
+
+Each chunk selects the oldest expired ids through the (created_at, id) index and
+deletes them by primary key in its own short transaction, pausing between chunks, so
+no statement holds locks on a large range of the table while the API keeps writing.
+The per-hour counts in audit_hourly_counts are kept (optionally with their own,
+longer retention), so dashboards still cover the deleted period.
+
+    python -m scripts.audit_retention --days 90 --chunk-size 1000 --pause 0.05
+"""
+import argparse
+import json
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+from sqlalchemy import delete, select
+from app.db import SessionLocal
+from app.models import AuditHourlyCount, AuditLog
+
+def purge_logs(cutoff: datetime, chunk_size: int, pause: float, max_chunks: Optional[int] = None) -> int:
+    deleted = 0
+    chunks = 0
+    while max_chunks is None or chunks < max_chunks:
+        db = SessionLocal()
+        try:
+            ids = db.execute(
+                select(AuditLog.id)
+                .where(AuditLog.created_at < cutoff)
+                .order_by(AuditLog.created_at, AuditLog.id)
+                .limit(chunk_size)
+            ).scalars().all()
+            if not ids:
+                break
+            db.execute(delete(AuditLog).where(AuditLog.id.in_(ids)))
+            db.commit()
+        finally:
+            db.close()
+        deleted += len(ids)
+        chunks += 1
+        if len(ids) < chunk_size:
+            break
+        time.sleep(pause)
+    return deleted
+
+def purge_counts(cutoff: datetime, chunk_size: int, pause: float) -> int:
+    deleted = 0
+    while True:
+        db = SessionLocal()
+        try:
+            ids = db.execute(
+                select(AuditHourlyCount.id).where(AuditHourlyCount.hour < cutoff).limit(chunk_size)
+            ).scalars().all()
+            if not ids:
+                break
+            db.execute(delete(AuditHourlyCount).where(AuditHourlyCount.id.in_(ids)))
+            db.commit()
+        finally:
+            db.close()
+        deleted += len(ids)
+        if len(ids) < chunk_size:
+            break
+        time.sleep(pause)
+    return deleted
+
+def main(args: argparse.Namespace) -> Dict[str, Any]:
+    started = time.monotonic()
+    now = datetime.utcnow()
+    summary: Dict[str, Any] = {
+        "cutoff": (now - timedelta(days=args.days)).isoformat(),
+        "logs_deleted": purge_logs(now - timedelta(days=args.days), args.chunk_size, args.pause, args.max_chunks),
+    }
+    if args.counts_days:
+        summary["counts_deleted"] = purge_counts(now - timedelta(days=args.counts_days), args.chunk_size, args.pause)
+    summary["seconds"] = round(time.monotonic() - started, 3)
+    print(json.dumps(summary))
+    return summary
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--days", type=int, default=90, help="keep audit log rows this many days")
+    parser.add_argument("--counts-days", type=int, help="also purge hourly counts older than this (default: keep)")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="rows deleted per transaction")
+    parser.add_argument("--pause", type=float, default=0.05, help="seconds to sleep between chunks")
+    parser.add_argument("--max-chunks", type=int, help="stop after this many chunks (spread work over several runs)")
+    main(parser.parse_args())
@@ -0,0 +1,174 @@
+"""
+Reproducible end-to-end benchmark of the API, run fully in-process.
+
+The FastAPI app is driven through httpx's ASGI transport (httpx is a benchmark-only
+dependency). qdrant-client's local in-memory mode stands in for the Qdrant server and a
+temporary SQLite file for MySQL, so no external services are needed. A synthetic
+collection is generated, then login, search, upsert, scroll and delete are each driven
+with concurrent load. Results are printed (and optionally written) as JSON with
+throughput and p50/p95/p99 latency so runs can be compared across commits:
+
+    python -m scripts.bench_e2e --points 5000 --dim 128 --requests 500 --concurrency 16 --output bench.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import tempfile
+import time
+from typing import Any, Callable, Dict, List
+
+def _configure_environment(workdir: str) -> None:
+    # Must run before anything under `app` is imported: settings are read at import time
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    os.environ["QDRANT_URL"] = ":memory:"
+    os.environ["SHARED_STATE_DIR"] = os.path.join(workdir, "state")
+    os.environ["AUDIT_SPILL_PATH"] = os.path.join(workdir, "audit_spill.jsonl")
+    os.environ.pop("PROMETHEUS_MULTIPROC_DIR", None)
+
+def _percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+def _summary(latencies: List[float], errors: int, elapsed: float) -> Dict[str, Any]:
+    latencies = sorted(latencies)
+
+    def ms(seconds: float) -> float:
+        return round(seconds * 1000, 3)
+
+    return {
+        "requests": len(latencies) + errors,
+        "errors": errors,
+        "seconds": round(elapsed, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "mean_ms": ms(sum(latencies) / len(latencies)) if latencies else 0.0,
+        "p50_ms": ms(_percentile(latencies, 0.50)),
+        "p95_ms": ms(_percentile(latencies, 0.95)),
+        "p99_ms": ms(_percentile(latencies, 0.99)),
+    }
+
+async def _drive(requests: int, concurrency: int, make_request: Callable[[int], Any]) -> Dict[str, Any]:
+    """Issue `requests` calls from `concurrency` workers; each call returns an httpx response."""
+    latencies: List[float] = []
+    errors = 0
+    counter = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        for i in counter:
+            start = time.perf_counter()
+            try:
+                response = await make_request(i)
+                ok = response.status_code < 400
+            except Exception:
+                ok = False
+            if ok:
+                latencies.append(time.perf_counter() - start)
+            else:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return _summary(latencies, errors, time.perf_counter() - start)
+
+def _git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], text=True, stderr=subprocess.DEVNULL).strip()
+    except Exception:
+        return "unknown"
+
+async def run(points: int, dim: int, requests: int, concurrency: int, login_requests: int, seed: int) -> Dict[str, Any]:
+    import httpx
+    from app.db import SessionLocal, engine
+    from app.main import app
+    from app.migrations import migrate
+    from app.models import User
+    from app.security import hash_password
+
+    rng = random.Random(seed)
+
+    def vector() -> List[float]:
+        return [rng.random() for _ in range(dim)]
+
+    email, password = "bench@example.com", "BenchPassw0rd"
+
+    migrate(engine)
+    db = SessionLocal()
+    db.add(User(email=email, hashed_password=hash_password(password), role="ADMIN"))
+    db.commit()
+    db.close()
+
+    await app.router.startup()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+        token = (await client.post("/auth/login", json={"email": email, "password": password})).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        collection = "bench"
+
+        setup_start = time.perf_counter()
+        await client.post("/collections", json={"name": collection, "vector_size": dim}, headers=headers)
+        body = "\n".join(json.dumps({"id": i + 1, "vector": vector(), "payload": {"n": i}}) for i in range(points))
+        response = await client.post(
+            f"/points/{collection}/batch",
+            content=body,
+            headers={**headers, "content-type": "application/x-ndjson"},
+        )
+        if response.status_code != 200 or response.json()["upserted"] != points:
+            raise SystemExit(f"Collection setup failed: {response.text[:500]}")
+        setup_seconds = time.perf_counter() - setup_start
+
+        results = {
+            "login": await _drive(login_requests, concurrency, lambda i: client.post(
+                "/auth/login", json={"email": email, "password": password})),
+            "search": await _drive(requests, concurrency, lambda i: client.post(
+                "/search", json={"collection": collection, "vector": vector(), "limit": 10}, headers=headers)),
+            "upsert": await _drive(requests, concurrency, lambda i: client.post(
+                "/points", json={"collection": collection, "id": points + i + 1, "vector": vector()}, headers=headers)),
+            "scroll": await _drive(requests, concurrency, lambda i: client.get(
+                f"/points/{collection}", params={"limit": 100}, headers=headers)),
+            "delete": await _drive(requests, concurrency, lambda i: client.request(
+                "DELETE", "/points", json={"collection": collection, "ids": [points + i + 1]}, headers=headers)),
+        }
+    await app.router.shutdown()
+
+    return {
+        "meta": {
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "points": points,
+            "dim": dim,
+            "requests": requests,
+            "login_requests": login_requests,
+            "concurrency": concurrency,
+            "seed": seed,
+            "setup_seconds": round(setup_seconds, 3),
+        },
+        "results": results,
+    }
+
+def main(args: argparse.Namespace) -> Dict[str, Any]:
+    with tempfile.TemporaryDirectory(prefix="qdrant-manager-bench-") as workdir:
+        _configure_environment(workdir)
+        report = asyncio.run(run(args.points, args.dim, args.requests, args.concurrency, args.login_requests, args.seed))
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    print(text)
+    return report
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--points", type=int, default=2000, help="size of the synthetic collection")
+    parser.add_argument("--dim", type=int, default=128)
+    parser.add_argument("--requests", type=int, default=300, help="requests per search/upsert/scroll/delete run")
+    parser.add_argument("--login-requests", type=int, default=20, help="bcrypt makes logins slow; keep this small")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="also write the JSON report to this file")
+    main(parser.parse_args())
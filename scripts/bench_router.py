@@ -0,0 +1,119 @@
+"""
+Exercise the multi-node Qdrant router against local stand-in nodes.
+
+Each stand-in node fronts one shared qdrant-client local in-memory instance (so every
+node sees the same data, like replicas of one cluster) and adds its own latency,
+jitter and failure rate; a node can also be taken down part-way through the run.
+Searches are driven through QdrantRouter with concurrent load and the report shows
+how requests spread over the nodes, how many were hedged, which nodes were ejected
+and the latency the caller saw:
+
+    python -m scripts.bench_router --nodes "5:0,10:0,60:0.2" --requests 2000 --down-at 0.5:0
+
+Each node is "latency_ms:failure_rate"; --down-at FRACTION:NODE stops node NODE after
+that fraction of the requests.
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from typing import Any, Dict, List
+from qdrant_client import AsyncQdrantClient
+from qdrant_client.models import Distance, PointStruct, VectorParams
+from app.qdrant_router import Node, QdrantRouter
+
+class StandInNode:
+    """Async client stand-in: forwards to a shared local client after a delay, or fails."""
+
+    def __init__(self, backend: AsyncQdrantClient, latency: float, failure_rate: float, rng: random.Random):
+        self.backend = backend
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.rng = rng
+        self.down = False
+
+    def __getattr__(self, name: str):
+        method = getattr(self.backend, name)
+
+        async def call(*args, **kwargs):
+            # Exponential jitter gives the long tail that hedging is meant to cut
+            await asyncio.sleep(self.latency * (0.5 + self.rng.expovariate(2.0)))
+            if self.down or self.rng.random() < self.failure_rate:
+                raise ConnectionError("stand-in node unavailable")
+            return await method(*args, **kwargs)
+
+        return call
+
+    async def close(self) -> None:
+        pass
+
+def _percentile(values: List[float], q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] if values else 0.0
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    rng = random.Random(args.seed)
+    backend = AsyncQdrantClient(location=":memory:")
+    await backend.create_collection("bench", vectors_config=VectorParams(size=args.dim, distance=Distance.COSINE))
+    await backend.upsert("bench", points=[
+        PointStruct(id=i + 1, vector=[rng.random() for _ in range(args.dim)]) for i in range(args.points)
+    ])
+
+    stand_ins = []
+    for spec in args.nodes.split(","):
+        latency_ms, failure_rate = spec.split(":")
+        stand_ins.append(StandInNode(backend, float(latency_ms) / 1000, float(failure_rate), rng))
+    router = QdrantRouter(
+        [Node(f"node{i}", s) for i, s in enumerate(stand_ins)],
+        eject_after=args.eject_after,
+        eject_seconds=args.eject_seconds,
+        hedge_after=args.hedge_after_ms / 1000,
+    )
+    down_after, down_node = None, None
+    if args.down_at:
+        fraction, node = args.down_at.split(":")
+        down_after, down_node = int(float(fraction) * args.requests), int(node)
+
+    latencies: List[float] = []
+    errors = 0
+    counter = iter(range(args.requests))
+
+    async def worker():
+        nonlocal errors
+        for i in counter:
+            if i == down_after:
+                stand_ins[down_node].down = True
+            start = time.perf_counter()
+            try:
+                await router.search("bench", query_vector=[rng.random() for _ in range(args.dim)], limit=10)
+                latencies.append(time.perf_counter() - start)
+            except Exception:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+    elapsed = time.perf_counter() - start
+    await backend.close()
+    return {
+        "requests": args.requests,
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(_percentile(latencies, 0.50) * 1000, 3),
+        "p99_ms": round(_percentile(latencies, 0.99) * 1000, 3),
+        "nodes": router.stats(),
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--nodes", default="5:0,10:0,60:0.2", help="comma-separated latency_ms:failure_rate per node")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--points", type=int, default=1000)
+    parser.add_argument("--dim", type=int, default=32)
+    parser.add_argument("--hedge-after-ms", type=int, default=30, help="0 disables hedging")
+    parser.add_argument("--eject-after", type=int, default=3)
+    parser.add_argument("--eject-seconds", type=float, default=5.0)
+    parser.add_argument("--down-at", help="FRACTION:NODE, e.g. 0.5:0 takes node0 down half-way")
+    parser.add_argument("--seed", type=int, default=0)
+    print(json.dumps(asyncio.run(run(parser.parse_args())), indent=2))
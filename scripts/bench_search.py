@@ -0,0 +1,109 @@
+"""
+Compare /search throughput of the Qdrant call path: sync vs async client, REST vs gRPC.
+
+Runs the same search workload that `app/routes/search.py` issues against a live Qdrant,
+using the connection settings from `app.qdrant`. Example:
+
+    python -m scripts.bench_search --collection bench --dim 768 --setup 20000 --requests 5000 --concurrency 64
+"""
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+from qdrant_client import AsyncQdrantClient
+from qdrant_client.models import Distance, PointStruct, VectorParams
+from app.qdrant import client_kwargs, get_sync_client
+
+def _random_vector(dim: int) -> List[float]:
+    return [random.random() for _ in range(dim)]
+
+def setup_collection(name: str, dim: int, count: int) -> None:
+    client = get_sync_client(prefer_grpc=False)
+    if client.collection_exists(name):
+        client.delete_collection(name)
+    client.create_collection(name, vectors_config=VectorParams(size=dim, distance=Distance.COSINE))
+    for start in range(0, count, 512):
+        batch = range(start, min(start + 512, count))
+        client.upsert(name, points=[PointStruct(id=i + 1, vector=_random_vector(dim)) for i in batch])
+    print(f"Loaded {count} points into '{name}'")
+
+def _summary(mode: str, latencies: List[float], elapsed: float) -> Dict[str, float]:
+    latencies.sort()
+
+    def pick(q: float) -> float:
+        return latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000
+
+    return {
+        "mode": mode,
+        "requests": len(latencies),
+        "throughput_rps": round(len(latencies) / elapsed, 1),
+        "mean_ms": round(statistics.mean(latencies) * 1000, 3),
+        "p50_ms": round(pick(0.50), 3),
+        "p99_ms": round(pick(0.99), 3),
+    }
+
+def run_sync(grpc: bool, collection: str, queries: List[List[float]], concurrency: int, limit: int):
+    client = get_sync_client(prefer_grpc=grpc)
+
+    def one(vector):
+        start = time.perf_counter()
+        client.search(collection_name=collection, query_vector=vector, limit=limit, with_payload=True)
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = list(pool.map(one, queries))
+    elapsed = time.perf_counter() - start
+    client.close()
+    return _summary(f"sync-{'grpc' if grpc else 'rest'}", latencies, elapsed)
+
+async def run_async(grpc: bool, collection: str, queries: List[List[float]], concurrency: int, limit: int):
+    client = AsyncQdrantClient(**client_kwargs(prefer_grpc=grpc))
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(vector):
+        async with semaphore:
+            start = time.perf_counter()
+            await client.search(collection_name=collection, query_vector=vector, limit=limit, with_payload=True)
+            return time.perf_counter() - start
+
+    start = time.perf_counter()
+    latencies = list(await asyncio.gather(*(one(v) for v in queries)))
+    elapsed = time.perf_counter() - start
+    await client.close()
+    return _summary(f"async-{'grpc' if grpc else 'rest'}", latencies, elapsed)
+
+def main(collection: str, dim: int, setup: int, requests: int, concurrency: int, limit: int, modes: List[str]):
+    if setup:
+        setup_collection(collection, dim, setup)
+    queries = [_random_vector(dim) for _ in range(requests)]
+    results = []
+    for mode in modes:
+        flavour, transport = mode.split("-")
+        grpc = transport == "grpc"
+        # Warm up connections before measuring
+        warmup = queries[: min(len(queries), concurrency)]
+        if flavour == "sync":
+            run_sync(grpc, collection, warmup, concurrency, limit)
+            results.append(run_sync(grpc, collection, queries, concurrency, limit))
+        else:
+            asyncio.run(run_async(grpc, collection, warmup, concurrency, limit))
+            results.append(asyncio.run(run_async(grpc, collection, queries, concurrency, limit)))
+        print(json.dumps(results[-1]))
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--collection", default="bench_search")
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--setup", type=int, default=0, help="(re)create the collection with this many random points")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--modes", default="sync-rest,async-rest,sync-grpc,async-grpc")
+    args = parser.parse_args()
+    main(args.collection, args.dim, args.setup, args.requests, args.concurrency, args.limit, args.modes.split(","))
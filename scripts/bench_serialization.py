@@ -0,0 +1,65 @@
+"""
+Micro-benchmark of per-request CPU spent turning Qdrant search hits into response bytes.
+
+Compares the original path (`hit.dict()` per hit, then FastAPI's jsonable_encoder and
+JSONResponse) with the orjson path used by the search and scroll routes now, with
+vectors as JSON floats and as base64 float32.
+
+    python -m scripts.bench_serialization --limit 100 --dim 768 --iterations 500
+"""
+import argparse
+import time
+import numpy as np
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from qdrant_client.models import ScoredPoint
+from app.serialization import encode_points, json_response, point_dict
+
+def _cpu_us(fn, iterations: int) -> float:
+    fn()
+    start = time.process_time()
+    for _ in range(iterations):
+        fn()
+    return (time.process_time() - start) / iterations * 1e6
+
+def _hits(limit: int, dim: int):
+    rng = np.random.default_rng(0)
+    return [
+        ScoredPoint(
+            id=i + 1,
+            version=1,
+            score=float(rng.random()),
+            payload={"title": f"document {i}", "tags": ["a", "b", "c"], "year": 2000 + i % 25, "price": i * 1.5},
+            vector=rng.standard_normal(dim).astype(np.float32).tolist(),
+        )
+        for i in range(limit)
+    ]
+
+def main(limit: int, dim: int, iterations: int):
+    hits = _hits(limit, dim)
+
+    def legacy():
+        return JSONResponse(jsonable_encoder({"results": [hit.dict() for hit in hits]})).body
+
+    def fast(base64: bool):
+        return json_response({"results": encode_points([point_dict(hit) for hit in hits], base64)}, base64).body
+
+    cases = {
+        "dict_jsonable_encoder": legacy,
+        "orjson_float_vectors": lambda: fast(False),
+        "orjson_base64_vectors": lambda: fast(True),
+    }
+    print(f"limit={limit} dim={dim} response bytes: " + " ".join(f"{n}={len(fn())}" for n, fn in cases.items()))
+    baseline = None
+    for name, fn in cases.items():
+        cpu = _cpu_us(fn, iterations)
+        baseline = baseline or cpu
+        print(f"{name:24s} {cpu:10.1f} us/request  ({baseline / cpu:5.1f}x vs dict_jsonable_encoder)")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--limit", type=int, default=100, help="hits per response")
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--iterations", type=int, default=500)
+    args = parser.parse_args()
+    main(args.limit, args.dim, args.iterations)
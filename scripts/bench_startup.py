@@ -0,0 +1,159 @@
+"""
+Startup-time benchmark: how long `import app.main` takes, and how long a freshly
+started server needs to answer its first request (/health) and to report ready (/ready:
+database pool and Qdrant connections warmed).
+
+Every run starts a new interpreter, so nothing is cached between runs except the OS page
+cache. By default a temporary SQLite file and qdrant-client's in-memory mode stand in
+for MySQL and Qdrant (the schema is created once with scripts.migrate, as in a deploy);
+pass --use-env to measure against the services configured in the environment instead.
+Results are printed (and optionally written) as JSON with the median, min and max of
+each measurement, plus the packages that take longest to import (`python -X importtime`):
+
+    python -m scripts.bench_startup --runs 5 --output startup.json
+    python -m scripts.bench_startup --runs 3 --workers 4   # gunicorn, as deployed
+"""
+import argparse
+import json
+import os
+import platform
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List
+import httpx
+
+def _environment(workdir: str, use_env: bool) -> Dict[str, str]:
+    env = dict(os.environ)
+    env.pop("PROMETHEUS_MULTIPROC_DIR", None)
+    env["AUDIT_SPILL_PATH"] = os.path.join(workdir, "audit_spill.jsonl")
+    env["SHARED_STATE_DIR"] = os.path.join(workdir, "state")
+    if not use_env:
+        env["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+        env["QDRANT_URL"] = ":memory:"
+        env.pop("QDRANT_URLS", None)
+    return env
+
+def _stats(values: List[float]) -> Dict[str, float]:
+    return {
+        "median_ms": round(statistics.median(values) * 1000, 1),
+        "min_ms": round(min(values) * 1000, 1),
+        "max_ms": round(max(values) * 1000, 1),
+    }
+
+def _time_command(command: List[str], env: Dict[str, str]) -> float:
+    start = time.perf_counter()
+    subprocess.run(command, env=env, check=True, stdout=subprocess.DEVNULL)
+    return time.perf_counter() - start
+
+def slowest_imports(env: Dict[str, str], top: int) -> List[Dict[str, Any]]:
+    """Packages by total import time of their own modules (`-X importtime` self times)."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        env=env, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True,
+    )
+    packages: Dict[str, int] = {}
+    for line in result.stderr.splitlines():
+        # "import time: self [us] | cumulative | imported package"
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        own, _, name = line[len("import time:"):].split("|", 2)
+        if not own.strip().isdigit():
+            continue
+        package = name.strip().split(".")[0]
+        packages[package] = packages.get(package, 0) + int(own)
+    ranked = sorted(packages.items(), key=lambda item: item[1], reverse=True)[:top]
+    return [{"package": name, "ms": round(us / 1000, 1)} for name, us in ranked]
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def _server_command(port: int, workers: int) -> List[str]:
+    if workers > 1:
+        return [
+            sys.executable, "-m", "gunicorn", "app.main:app", "--workers", str(workers),
+            "--worker-class", "uvicorn.workers.UvicornWorker", "--bind", f"127.0.0.1:{port}",
+            "--log-level", "warning",
+        ]
+    return [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"]
+
+def _wait_for(client: httpx.Client, url: str, process: subprocess.Popen, deadline: float) -> float:
+    """Poll `url` until it answers 200; returns the time it first did."""
+    while time.perf_counter() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"server exited with code {process.returncode} before {url} answered")
+        try:
+            if client.get(url).status_code == 200:
+                return time.perf_counter()
+        except httpx.TransportError:
+            pass
+        time.sleep(0.01)
+    raise TimeoutError(f"{url} did not answer 200 in time")
+
+def time_server(env: Dict[str, str], workers: int, timeout: float) -> Dict[str, float]:
+    """Seconds from spawning the server until the first /health and the first ready /ready."""
+    port = _free_port()
+    base = f"http://127.0.0.1:{port}"
+    start = time.perf_counter()
+    process = subprocess.Popen(_server_command(port, workers), env=env)
+    try:
+        with httpx.Client(timeout=1.0) as client:
+            first = _wait_for(client, f"{base}/health", process, start + timeout)
+            ready = _wait_for(client, f"{base}/ready", process, start + timeout)
+    finally:
+        process.terminate()
+        try:
+            process.wait(10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+    return {"first_request": first - start, "ready": ready - start}
+
+def main(args: argparse.Namespace) -> Dict[str, Any]:
+    with tempfile.TemporaryDirectory(prefix="qdrant-manager-startup-") as workdir:
+        env = _environment(workdir, args.use_env)
+        subprocess.run([sys.executable, "-m", "scripts.migrate"], env=env, check=True, stdout=subprocess.DEVNULL)
+        interpreter, imports, first_request, ready = [], [], [], []
+        for _ in range(args.runs):
+            interpreter.append(_time_command([sys.executable, "-c", "pass"], env))
+            imports.append(_time_command([sys.executable, "-c", "import app.main"], env))
+            server = time_server(env, args.workers, args.timeout)
+            first_request.append(server["first_request"])
+            ready.append(server["ready"])
+        report = {
+            "meta": {
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "runs": args.runs,
+                "workers": args.workers,
+                "services": "environment" if args.use_env else "sqlite + in-memory qdrant",
+            },
+            "results": {
+                "interpreter": _stats(interpreter),
+                "import_app": _stats(imports),
+                "import_app_net": _stats([i - p for i, p in zip(imports, interpreter)]),
+                "time_to_first_request": _stats(first_request),
+                "time_to_ready": _stats(ready),
+            },
+            "slowest_imports": slowest_imports(env, args.top),
+        }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    print(text)
+    return report
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--workers", type=int, default=1, help="more than 1 runs gunicorn with uvicorn workers")
+    parser.add_argument("--timeout", type=float, default=60.0, help="seconds to wait for a server to become ready")
+    parser.add_argument("--top", type=int, default=10, help="number of slowest packages to list")
+    parser.add_argument("--use-env", action="store_true", help="use DATABASE_URL/QDRANT_URL from the environment")
+    parser.add_argument("--output", help="also write the JSON report to this file")
+    main(parser.parse_args())
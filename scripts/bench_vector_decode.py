@@ -0,0 +1,53 @@
+"""
+Micro-benchmark of per-request CPU spent decoding and validating a query vector.
+
+Compares the original path (JSON list + per-element Python check) with the JSON list +
+vectorized check used by the schemas now, base64 float32 in JSON, and a raw float32 body.
+
+    python -m scripts.bench_vector_decode --dim 1536 --iterations 2000
+"""
+import argparse
+import base64
+import json
+import time
+import numpy as np
+from app.schemas import VectorSearchIn
+from app.vectors import decode_float32
+
+def _legacy_check(v):
+    if not all(isinstance(x, (int, float)) and -1e9 <= x <= 1e9 for x in v):
+        raise ValueError("Vector elements must be numbers within reasonable bounds")
+    return v
+
+def _cpu_us(fn, iterations: int) -> float:
+    fn()
+    start = time.process_time()
+    for _ in range(iterations):
+        fn()
+    return (time.process_time() - start) / iterations * 1e6
+
+def main(dim: int, iterations: int):
+    vector = np.random.default_rng(0).standard_normal(dim).astype("<f4")
+    as_json = json.dumps({"collection": "bench", "vector": vector.tolist(), "limit": 10})
+    as_b64 = json.dumps({"collection": "bench", "vector_b64": base64.b64encode(vector.tobytes()).decode(), "limit": 10})
+    as_raw = vector.tobytes()
+
+    cases = {
+        "json_list_python_loop": lambda: _legacy_check(json.loads(as_json)["vector"]),
+        "json_list_schema": lambda: VectorSearchIn.model_validate_json(as_json),
+        "json_base64_schema": lambda: VectorSearchIn.model_validate_json(as_b64),
+        "raw_float32_body": lambda: decode_float32(as_raw),
+    }
+    print(f"dim={dim} body bytes: json={len(as_json)} base64={len(as_b64)} raw={len(as_raw)}")
+    baseline = None
+    for name, fn in cases.items():
+        cpu = _cpu_us(fn, iterations)
+        baseline = baseline or cpu
+        print(f"{name:24s} {cpu:10.1f} us/request  ({baseline / cpu:5.1f}x vs json_list_python_loop)")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+    main(args.dim, args.iterations)
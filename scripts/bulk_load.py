@@ -0,0 +1,275 @@
+"""
+Offline bulk loader for embedding matrices produced by batch jobs.
+
+The .npy matrix is opened memory-mapped and sliced into batches without copying; ids
+come from an optional .npy sidecar (default: sequential from --id-start) and payloads
+from an optional JSON-lines sidecar aligned with the matrix rows. Batches are uploaded
+by a pool of parallel workers, each batch Qdrant has applied is checkpointed so a
+crashed run can resume, and one BULK_LOAD entry is written to the audit log at the end.
+
+    python -m scripts.bulk_load --collection docs --vectors emb.npy --payloads meta.jsonl \\
+        --actor admin@example.com --workers 8 --batch-size 512
+
+Use --qdrant-url :memory: to run against qdrant-client's local in-memory mode.
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import nullcontext
+from typing import Any, Dict, List, Optional, Set
+import numpy as np
+from qdrant_client import QdrantClient
+from qdrant_client.models import Batch, Distance, VectorParams
+from app.invalidation import SharedVersion
+from app.qdrant import get_sync_client
+
+class PayloadIndex:
+    """Random access to the rows of a JSON-lines sidecar through a byte-offset index."""
+
+    def __init__(self, path: str):
+        self.path = path
+        offsets = [0]
+        with open(path, "rb") as f:
+            for line in f:
+                offsets.append(offsets[-1] + len(line))
+        self.offsets = np.asarray(offsets[:-1], dtype=np.int64)
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    def read(self, start: int, end: int) -> List[Dict[str, Any]]:
+        with open(self.path, "rb") as f:
+            f.seek(int(self.offsets[start]))
+            return [json.loads(f.readline() or b"{}") for _ in range(start, end)]
+
+class Checkpoint:
+    """Set of finished batch numbers, persisted atomically and at most every `interval` seconds."""
+
+    def __init__(self, path: str, meta: Dict[str, Any], interval: float = 1.0):
+        self.path = path
+        self.meta = meta
+        self.interval = interval
+        self.done: Set[int] = set()
+        self._lock = threading.Lock()
+        self._last_write = 0.0
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                state = json.load(f)
+            if state.get("meta") != meta:
+                raise SystemExit(f"Checkpoint {path} was written for a different run: {state.get('meta')}")
+            self.done = set(state.get("done", []))
+
+    def mark(self, batch: int) -> None:
+        with self._lock:
+            self.done.add(batch)
+            if time.monotonic() - self._last_write >= self.interval:
+                self._write()
+
+    def flush(self) -> None:
+        with self._lock:
+            self._write()
+
+    def _write(self) -> None:
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"meta": self.meta, "done": sorted(self.done)}, f)
+        os.replace(tmp, self.path)
+        self._last_write = time.monotonic()
+
+class Progress:
+    def __init__(self, total_rows: int, already_done: int, interval: float = 2.0):
+        self.total = total_rows
+        self.done = already_done
+        self.start_done = already_done
+        self.start = time.monotonic()
+        self.interval = interval
+        self._last = 0.0
+        self._lock = threading.Lock()
+
+    def add(self, rows: int, force: bool = False) -> None:
+        with self._lock:
+            self.done += rows
+            now = time.monotonic()
+            if not force and now - self._last < self.interval:
+                return
+            self._last = now
+            elapsed = max(now - self.start, 1e-9)
+            rate = (self.done - self.start_done) / elapsed
+            eta = (self.total - self.done) / rate if rate > 0 else float("inf")
+            print(
+                f"\r{self.done}/{self.total} rows ({self.done / max(self.total, 1):.1%}) "
+                f"{rate:,.0f} rows/s ETA {eta:,.0f}s",
+                end="",
+                file=sys.stderr,
+                flush=True,
+            )
+
+def write_audit(actor_email: str, collection: str, payload: Dict[str, Any]) -> None:
+    """Record the run through the existing AuditLog model."""
+    from datetime import datetime
+    from sqlalchemy import insert
+    from app.audit import record_hourly_counts
+    from app.db import SessionLocal
+    from app.models import AuditLog, User
+
+    db = SessionLocal()
+    try:
+        actor = db.query(User).filter(User.email == actor_email).first()
+        if not actor:
+            print("Warning: audit actor not found, skipping audit entry:", actor_email)
+            return
+        row = {"user_id": actor.id, "action": "BULK_LOAD", "resource": collection, "payload": payload,
+               "created_at": datetime.utcnow()}
+        db.execute(insert(AuditLog), [row])
+        record_hourly_counts(db, [row])
+        db.commit()
+    finally:
+        db.close()
+
+def load(
+    client: QdrantClient,
+    collection: str,
+    vectors_path: str,
+    ids_path: Optional[str] = None,
+    payloads_path: Optional[str] = None,
+    id_start: int = 1,
+    batch_size: int = 512,
+    workers: int = 4,
+    retries: int = 3,
+    checkpoint_path: Optional[str] = None,
+    create: Optional[str] = None,
+    wait: bool = True,
+) -> Dict[str, Any]:
+    """
+    Upload a memory-mapped matrix into `collection` and return a run summary. Batches
+    are only checkpointed once Qdrant has applied them (`wait`); without it nothing is
+    checkpointed and a rerun starts over.
+    """
+    matrix = np.load(vectors_path, mmap_mode="r")
+    if matrix.ndim != 2:
+        raise SystemExit(f"{vectors_path} must be a 2-D matrix, got shape {matrix.shape}")
+    rows, dim = matrix.shape
+    ids = np.load(ids_path, mmap_mode="r") if ids_path else None
+    if ids is not None and len(ids) != rows:
+        raise SystemExit(f"{ids_path} has {len(ids)} ids for {rows} vectors")
+    payloads = PayloadIndex(payloads_path) if payloads_path else None
+    if payloads is not None and len(payloads) != rows:
+        raise SystemExit(f"{payloads_path} has {len(payloads)} rows for {rows} vectors")
+
+    if create and not client.collection_exists(collection):
+        client.create_collection(collection, vectors_config=VectorParams(size=dim, distance=Distance(create)))
+        # Let API workers on this host pick the new collection up without waiting for a refresh
+        SharedVersion("collections").bump()
+
+    batches = (rows + batch_size - 1) // batch_size
+    checkpoint = Checkpoint(
+        checkpoint_path or f"{vectors_path}.{collection}.checkpoint.json",
+        meta={"collection": collection, "vectors": os.path.abspath(vectors_path), "rows": rows, "batch_size": batch_size},
+    )
+    pending = [b for b in range(batches) if b not in checkpoint.done]
+    if not wait:
+        print("Warning: --no-wait does not checkpoint batches; an interrupted run starts over", file=sys.stderr)
+    # qdrant-client's local mode is not thread-safe; only the remote client runs uploads in parallel
+    local = client.init_options.get("location") == ":memory:" or client.init_options.get("path")
+    upsert_lock = threading.Lock() if local else nullcontext()
+    progress = Progress(rows, sum(min(batch_size, rows - b * batch_size) for b in checkpoint.done))
+
+    def upload(batch: int) -> int:
+        start, end = batch * batch_size, min((batch + 1) * batch_size, rows)
+        # Slicing the memmap is a view; rows are only materialised for the request body
+        block = np.asarray(matrix[start:end], dtype=np.float32)
+        batch_ids = ids[start:end].tolist() if ids is not None else list(range(id_start + start, id_start + end))
+        points = Batch(
+            ids=batch_ids,
+            vectors=block.tolist(),
+            payloads=payloads.read(start, end) if payloads is not None else None,
+        )
+        for attempt in range(retries + 1):
+            try:
+                with upsert_lock:
+                    client.upsert(collection_name=collection, points=points, wait=wait)
+                break
+            except Exception:
+                if attempt == retries:
+                    raise
+                time.sleep(min(2 ** attempt, 30))
+        # An accepted but unapplied batch can still be lost if Qdrant crashes
+        if wait:
+            checkpoint.mark(batch)
+        progress.add(end - start)
+        return end - start
+
+    started = time.monotonic()
+    failed: List[int] = []
+    loaded = 0
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(upload, b): b for b in pending}
+        for future in as_completed(futures):
+            try:
+                loaded += future.result()
+            except Exception as e:
+                failed.append(futures[future])
+                print(f"\nWarning: batch {futures[future]} failed: {e}", file=sys.stderr)
+    checkpoint.flush()
+    progress.add(0, force=True)
+    print(file=sys.stderr)
+
+    elapsed = time.monotonic() - started
+    return {
+        "source": os.path.basename(vectors_path),
+        "rows": rows,
+        "dimension": dim,
+        "loaded": loaded,
+        "skipped_from_checkpoint": batches - len(pending),
+        "failed_batches": sorted(failed),
+        "batch_size": batch_size,
+        "workers": workers,
+        "seconds": round(elapsed, 3),
+        "rows_per_second": round(loaded / elapsed, 1) if elapsed else None,
+    }
+
+def main(args: argparse.Namespace) -> int:
+    client = get_sync_client(prefer_grpc=args.grpc, url=args.qdrant_url)
+    summary = load(
+        client,
+        collection=args.collection,
+        vectors_path=args.vectors,
+        ids_path=args.ids,
+        payloads_path=args.payloads,
+        id_start=args.id_start,
+        batch_size=args.batch_size,
+        workers=args.workers,
+        retries=args.retries,
+        checkpoint_path=args.checkpoint,
+        create=args.create,
+        wait=args.wait,
+    )
+    print(json.dumps(summary))
+    if args.actor:
+        write_audit(args.actor, args.collection, summary)
+    return 1 if summary["failed_batches"] else 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--collection", required=True)
+    parser.add_argument("--vectors", required=True, help=".npy matrix of shape (rows, dim)")
+    parser.add_argument("--ids", help=".npy array of integer ids aligned with the rows")
+    parser.add_argument("--payloads", help="JSON-lines file with one payload object per row")
+    parser.add_argument("--id-start", type=int, default=1, help="first id when --ids is not given")
+    parser.add_argument("--batch-size", type=int, default=512)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--retries", type=int, default=3)
+    parser.add_argument("--checkpoint", help="checkpoint file (default: next to the matrix)")
+    parser.add_argument("--create", choices=[d.value for d in Distance], help="create the collection with this distance")
+    parser.add_argument(
+        "--no-wait", dest="wait", action="store_false",
+        help="do not wait for batches to be applied (faster, but disables the checkpoint)",
+    )
+    parser.add_argument("--qdrant-url", help="override QDRANT_URL; ':memory:' for local mode")
+    parser.add_argument("--grpc", action="store_true", default=None, help="upload over gRPC")
+    parser.add_argument("--actor", help="email of the user the BULK_LOAD audit entry is recorded for")
+    sys.exit(main(parser.parse_args()))
@@ -1,11 +1,12 @@
 import argparse
 from sqlalchemy.orm import Session
-from app.db import SessionLocal, Base, engine
+from app.db import SessionLocal, engine
+from app.migrations import migrate
 from app.models import User
 from app.security import hash_password
 
 def main(email: str, password: str):
-    Base.metadata.create_all(bind=engine)
+    migrate(engine)
     db: Session = SessionLocal()
     try:
         if db.query(User).filter(User.email == email).first():
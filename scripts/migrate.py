@@ -0,0 +1,31 @@
+"""
+Create or upgrade the database schema: every missing table and index. Idempotent, so
+it runs once per deploy before the workers start (see render.yaml) instead of in each
+worker's startup.
+
+    python -m scripts.migrate
+    python -m scripts.migrate --check   # only report what is missing; exit 1 if anything is
+"""
+import argparse
+import json
+import sys
+import time
+from app.db import engine
+from app.migrations import migrate, pending
+
+def main(args: argparse.Namespace) -> int:
+    started = time.monotonic()
+    missing = pending(engine)
+    summary = {"pending": missing}
+    if not args.check and (missing["tables"] or missing["indexes"]):
+        migrate(engine)
+        summary["pending"] = pending(engine)
+        summary["created"] = missing
+    summary["seconds"] = round(time.monotonic() - started, 3)
+    print(json.dumps(summary))
+    return 1 if summary["pending"]["tables"] or summary["pending"]["indexes"] else 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--check", action="store_true", help="report missing tables and indexes without creating them")
+    sys.exit(main(parser.parse_args()))
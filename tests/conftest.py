@@ -0,0 +1,13 @@
+import os
+import tempfile
+
+# Settings are read when `app` is first imported: point everything at throwaway local state
+_workdir = tempfile.mkdtemp(prefix="qdrant-manager-tests-")
+os.environ.update(
+    DATABASE_URL=f"sqlite:///{os.path.join(_workdir, 'test.db')}",
+    QDRANT_URL=":memory:",
+    SHARED_STATE_DIR=os.path.join(_workdir, "state"),
+    AUDIT_SPILL_PATH=os.path.join(_workdir, "audit_spill.jsonl"),
+)
+os.environ.pop("QDRANT_URLS", None)
+os.environ.pop("PROMETHEUS_MULTIPROC_DIR", None)
@@ -0,0 +1,164 @@
+import asyncio
+import time
+from fastapi import HTTPException
+from app.admission import BULK, INTERACTIVE, AdmissionController, priority_class
+from app.principals import Principal, current_principal
+
+def _controller(limit=2, bulk_limit=1, user_limit=10, interactive_timeout=1.0, bulk_timeout=1.0):
+    return AdmissionController(
+        enabled=True, collection_limit=limit, bulk_limit=bulk_limit, user_limit=user_limit,
+        interactive_timeout=interactive_timeout, bulk_timeout=bulk_timeout,
+    )
+
+class Holder:
+    """Runs a call through admission and keeps its slot until released."""
+
+    def __init__(self, controller, method="search", collection="docs", log=None, name=None):
+        self.release = asyncio.Event()
+        self.admitted = asyncio.Event()
+
+        async def call():
+            async with controller.admit(method, collection):
+                if log is not None:
+                    log.append(name or method)
+                self.admitted.set()
+                await self.release.wait()
+
+        self.task = asyncio.ensure_future(call())
+
+def _as_user(user_id):
+    current_principal.set(Principal(id=user_id, email=f"u{user_id}@x.io", role="USER", created_at=None, updated_at=None))
+
+def test_methods_are_split_into_interactive_and_bulk():
+    assert [priority_class(m) for m in ("search", "query_points", "count", "upsert", "scroll", "delete")] == [
+        INTERACTIVE, INTERACTIVE, INTERACTIVE, BULK, BULK, BULK,
+    ]
+
+def test_bulk_calls_cannot_take_the_interactive_slots():
+    controller = _controller(limit=3, bulk_limit=1)
+
+    async def run():
+        bulk = [Holder(controller, "upsert") for _ in range(2)]
+        searches = [Holder(controller, "search") for _ in range(2)]
+        await asyncio.sleep(0.01)
+        state = [h.admitted.is_set() for h in bulk + searches]
+        for h in bulk + searches:
+            h.release.set()
+        await asyncio.gather(*(h.task for h in bulk + searches))
+        return state
+
+    # One bulk call runs, the second waits although a slot is free; both searches run
+    assert asyncio.run(run()) == [True, False, True, True]
+
+def test_freed_slot_goes_to_queued_interactive_calls_first():
+    controller = _controller(limit=1, bulk_limit=1)
+    order = []
+
+    async def run():
+        first = Holder(controller, "search", log=order, name="first")
+        await first.admitted.wait()
+        bulk = Holder(controller, "upsert", log=order, name="bulk")
+        await asyncio.sleep(0.01)
+        search = Holder(controller, "search", log=order, name="search")
+        await asyncio.sleep(0.01)
+        first.release.set()
+        await search.admitted.wait()
+        search.release.set()
+        bulk.release.set()
+        await asyncio.gather(first.task, bulk.task, search.task)
+
+    asyncio.run(run())
+    assert order == ["first", "search", "bulk"]
+
+def _rejection(coro):
+    async def run():
+        try:
+            await coro
+        except HTTPException as e:
+            return e
+    return run()
+
+def test_unmeetable_deadline_is_rejected_at_once():
+    controller = _controller(limit=1, interactive_timeout=0.5)
+
+    async def run():
+        holder = Holder(controller)
+        await holder.admitted.wait()
+        # Calls on this collection have been taking a second each
+        controller._gates["docs"].service_time[INTERACTIVE] = 1.0
+        start = time.monotonic()
+        error = await _rejection(Holder(controller).task)
+        elapsed = time.monotonic() - start
+        holder.release.set()
+        await holder.task
+        return error, elapsed
+
+    error, elapsed = asyncio.run(run())
+    assert (error.status_code, error.headers["Retry-After"]) == (503, "1")
+    assert "overloaded" in error.detail
+    assert elapsed < 0.1
+    assert controller._gates == {}
+
+def test_queued_call_is_rejected_when_its_deadline_passes():
+    controller = _controller(limit=1, interactive_timeout=0.05)
+
+    async def run():
+        holder = Holder(controller)
+        await holder.admitted.wait()
+        start = time.monotonic()
+        error = await _rejection(Holder(controller).task)
+        elapsed = time.monotonic() - start
+        holder.release.set()
+        await holder.task
+        return error, elapsed
+
+    error, elapsed = asyncio.run(run())
+    assert (error.status_code, error.headers["Retry-After"]) == (503, "1")
+    assert "Timed out" in error.detail
+    assert 0.05 <= elapsed < 0.5
+    assert controller._gates == {}
+
+def test_user_over_their_limit_gets_429():
+    controller = _controller(limit=10, user_limit=2)
+
+    async def run():
+        _as_user(1)
+        holders = [Holder(controller) for _ in range(2)]
+        await asyncio.gather(*(h.admitted.wait() for h in holders))
+        error = await _rejection(Holder(controller).task)
+        # Another user is not affected
+        _as_user(2)
+        other = Holder(controller)
+        await other.admitted.wait()
+        for h in holders + [other]:
+            h.release.set()
+        await asyncio.gather(*(h.task for h in holders + [other]))
+        return error
+
+    error = asyncio.run(run())
+    assert (error.status_code, error.headers["Retry-After"]) == (429, "1")
+    assert controller._users == {}
+    assert controller._gates == {}
+
+def test_calls_without_a_collection_are_not_gated():
+    controller = _controller(limit=1)
+
+    async def run():
+        async with controller.admit("search", "docs"):
+            async with controller.admit("get_collections", None):
+                return dict(controller._gates)
+
+    assert list(asyncio.run(run())) == ["docs"]
+
+def test_gates_are_dropped_when_idle():
+    controller = _controller()
+
+    async def call(collection: str) -> None:
+        async with controller.admit("search", collection):
+            await asyncio.sleep(0.01)
+
+    async def run():
+        await asyncio.gather(*(call(f"made-up-{i}") for i in range(100)), *(call("docs") for _ in range(5)))
+
+    asyncio.run(run())
+    assert controller._gates == {}
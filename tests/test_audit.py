@@ -0,0 +1,81 @@
+import json
+import os
+import subprocess
+import sys
+import time
+from datetime import datetime
+import pytest
+from app.audit import AuditSink
+from app.db import SessionLocal, engine
+from app.migrations import migrate
+from app.models import AuditLog
+
+def _event(i):
+    return {"user_id": 1, "action": "TEST_AUDIT", "resource": f"r{i}", "payload": {"i": i}, "created_at": datetime.utcnow()}
+
+def _resources():
+    db = SessionLocal()
+    try:
+        return sorted(r for (r,) in db.query(AuditLog.resource).filter(AuditLog.action == "TEST_AUDIT"))
+    finally:
+        db.close()
+
+@pytest.fixture
+def clean_db():
+    migrate(engine)
+    db = SessionLocal()
+    db.query(AuditLog).filter(AuditLog.action == "TEST_AUDIT").delete()
+    db.commit()
+    db.close()
+
+def test_full_queue_blocks_then_drops():
+    sink = AuditSink(max_size=1, batch_size=10, flush_interval=0.01, overflow="block", block_timeout=0.05)
+    sink.submit(_event(0))
+    start = time.monotonic()
+    sink.submit(_event(1))
+    assert time.monotonic() - start >= 0.05
+    assert (sink.enqueued, sink.dropped) == (1, 1)
+
+def test_full_queue_drops_without_waiting():
+    sink = AuditSink(max_size=1, batch_size=10, flush_interval=0.01, overflow="drop", block_timeout=5)
+    start = time.monotonic()
+    for i in range(3):
+        sink.submit(_event(i))
+    assert time.monotonic() - start < 1
+    assert (sink.enqueued, sink.dropped) == (1, 2)
+
+def test_full_queue_spills_to_file(tmp_path):
+    spill = str(tmp_path / "spill.jsonl")
+    sink = AuditSink(max_size=1, batch_size=10, flush_interval=0.01, overflow="spill", spill_path=spill)
+    for i in range(3):
+        sink.submit(_event(i))
+    with open(spill, encoding="utf-8") as f:
+        rows = [json.loads(line) for line in f]
+    assert [row["resource"] for row in rows] == ["r1", "r2"]
+    assert (sink.enqueued, sink.spilled, sink.dropped) == (1, 2, 0)
+
+def _dead_pid():
+    process = subprocess.Popen([sys.executable, "-c", "pass"])
+    process.wait()
+    return process.pid
+
+def test_replay_skips_corrupt_lines_and_picks_up_leftovers(tmp_path, clean_db):
+    spill = str(tmp_path / "spill.jsonl")
+    with open(spill, "w", encoding="utf-8") as f:
+        for i in range(3):
+            f.write(json.dumps(_event(i), default=str) + "\n")
+        f.write('{"user_id": 1, "action": "TEST_AUD')  # cut short by a crash
+    # Left behind by a worker that died while replaying
+    with open(f"{spill}.{_dead_pid()}.replay", "w", encoding="utf-8") as f:
+        f.write(json.dumps(_event(10), default=str) + "\nnot json\n" + json.dumps(_event(11), default=str) + "\n")
+    # Being replayed right now by a live worker: left alone
+    live = f"{spill}.{os.getppid()}.replay"
+    with open(live, "w", encoding="utf-8") as f:
+        f.write(json.dumps(_event(20), default=str) + "\n")
+
+    sink = AuditSink(max_size=10, batch_size=2, flush_interval=0.01, overflow="spill", spill_path=spill)
+    sink._replay_spill()
+
+    assert _resources() == ["r0", "r1", "r10", "r11", "r2"]
+    assert sink.corrupt_spill_lines == 2
+    assert sorted(os.listdir(tmp_path)) == [os.path.basename(live)]
@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+from qdrant_client import QdrantClient
+from scripts.bulk_load import load
+
+class CrashingClient(QdrantClient):
+    """In-memory client whose upserts start failing after `fail_after` batches, like a dying server."""
+
+    def __init__(self, fail_after: int):
+        super().__init__(location=":memory:")
+        self.fail_after = fail_after
+        self.upserts = 0
+
+    def upsert(self, *args, **kwargs):
+        self.upserts += 1
+        if self.upserts > self.fail_after:
+            raise ConnectionError("connection reset by peer")
+        return super().upsert(*args, **kwargs)
+
+@pytest.fixture
+def matrix(tmp_path):
+    path = tmp_path / "vectors.npy"
+    np.save(path, np.random.default_rng(0).random((1000, 8), dtype=np.float32))
+    return str(path)
+
+def test_interrupted_load_resumes_from_checkpoint(matrix, tmp_path):
+    checkpoint = str(tmp_path / "checkpoint.json")
+    client = CrashingClient(fail_after=4)
+
+    first = load(client, "docs", matrix, batch_size=100, workers=1, retries=0, checkpoint_path=checkpoint, create="Cosine")
+    assert first["loaded"] == 400
+    assert len(first["failed_batches"]) == 6
+
+    client.fail_after = float("inf")
+    second = load(client, "docs", matrix, batch_size=100, workers=1, retries=0, checkpoint_path=checkpoint)
+    assert second["skipped_from_checkpoint"] == 4
+    assert second["loaded"] == 600
+    assert second["failed_batches"] == []
+    assert client.count("docs", exact=True).count == 1000
+
+def test_no_wait_does_not_checkpoint(matrix, tmp_path):
+    checkpoint = str(tmp_path / "checkpoint.json")
+    client = CrashingClient(fail_after=4)
+
+    load(client, "docs", matrix, batch_size=100, workers=1, retries=0, checkpoint_path=checkpoint, create="Cosine", wait=False)
+    client.fail_after = float("inf")
+    resumed = load(client, "docs", matrix, batch_size=100, workers=1, retries=0, checkpoint_path=checkpoint, wait=False)
+    assert resumed["skipped_from_checkpoint"] == 0
+    assert resumed["loaded"] == 1000
+    assert client.count("docs", exact=True).count == 1000
@@ -0,0 +1,92 @@
+import asyncio
+import pytest
+from qdrant_client.models import PointStruct
+from app import coalescer as coalescer_module
+from app.coalescer import UpsertCoalescer
+
+class FakeClient:
+    """Records upsert calls; batched calls and the ids in `bad` can be made to fail."""
+
+    def __init__(self, fail_batches=False, bad=(), delay=0.0):
+        self.fail_batches = fail_batches
+        self.bad = set(bad)
+        self.delay = delay
+        self.calls = []
+        self.active = 0
+        self.peak = 0
+
+    async def upsert(self, collection_name, points, wait):
+        self.calls.append((collection_name, [p.id for p in points], wait))
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            await asyncio.sleep(self.delay)
+            if len(points) > 1 and self.fail_batches:
+                raise RuntimeError("batch rejected")
+            if any(p.id in self.bad for p in points):
+                raise ValueError(f"bad point {points[0].id}")
+        finally:
+            self.active -= 1
+
+@pytest.fixture
+def client(monkeypatch):
+    def install(**kwargs):
+        fake = FakeClient(**kwargs)
+        monkeypatch.setattr(coalescer_module, "get_client", lambda: fake)
+        return fake
+    return install
+
+def _point(i):
+    return PointStruct(id=i, vector=[float(i), 1.0])
+
+def test_points_within_the_window_are_sent_together(client):
+    fake = client()
+    coalescer = UpsertCoalescer(enabled=True, window_ms=20, max_batch=100, wait=True)
+
+    async def run():
+        await asyncio.gather(*(coalescer.upsert("c", _point(i)) for i in range(5)))
+        await coalescer.upsert("c", _point(5), wait=False)
+
+    asyncio.run(run())
+    assert fake.calls == [("c", [0, 1, 2, 3, 4], True), ("c", [5], False)]
+
+def test_a_full_batch_is_sent_before_the_window_ends(client):
+    fake = client()
+    coalescer = UpsertCoalescer(enabled=True, window_ms=10_000, max_batch=3, wait=True)
+
+    async def run():
+        started = asyncio.get_running_loop().time()
+        await asyncio.gather(*(coalescer.upsert("c", _point(i)) for i in range(6)))
+        return asyncio.get_running_loop().time() - started
+
+    elapsed = asyncio.run(run())
+    assert fake.calls == [("c", [0, 1, 2], True), ("c", [3, 4, 5], True)]
+    assert elapsed < 1
+
+def test_failed_batch_is_retried_per_point_with_bounded_concurrency(client):
+    fake = client(fail_batches=True, bad={3}, delay=0.01)
+    coalescer = UpsertCoalescer(enabled=True, window_ms=20, max_batch=100, wait=True, fallback_concurrency=2)
+
+    async def run():
+        return await asyncio.gather(*(coalescer.upsert("c", _point(i)) for i in range(8)), return_exceptions=True)
+
+    results = asyncio.run(run())
+    # Only the point Qdrant rejects on its own raises, with its own error
+    assert [type(r).__name__ if r else None for r in results] == [None] * 3 + ["ValueError"] + [None] * 4
+    assert str(results[3]) == "bad point 3"
+    assert sorted(ids[0] for _, ids, _ in fake.calls[1:]) == list(range(8))
+    assert fake.peak == 2
+
+def test_drain_flushes_open_batches(client):
+    fake = client()
+    coalescer = UpsertCoalescer(enabled=True, window_ms=60_000, max_batch=100, wait=True)
+
+    async def run():
+        pending = [asyncio.create_task(coalescer.upsert("c", _point(i))) for i in range(3)]
+        await asyncio.sleep(0)
+        assert fake.calls == []
+        await coalescer.drain()
+        await asyncio.gather(*pending)
+
+    asyncio.run(run())
+    assert fake.calls == [("c", [0, 1, 2], True)]
@@ -0,0 +1,101 @@
+import asyncio
+import pytest
+from fastapi import HTTPException
+from qdrant_client.models import Distance, VectorParams
+from app import collection_cache as collection_cache_module
+from app.collection_cache import CollectionCache
+from app.qdrant import get_client
+
+def test_collection_created_after_refresh_is_found():
+    async def run():
+        cache = CollectionCache(refresh_interval=30)
+        await cache.refresh()
+        # Created behind the cache's back (a script, a job, a worker on another host)
+        await get_client().create_collection("late", vectors_config=VectorParams(size=4, distance=Distance.COSINE))
+        try:
+            info = await cache.get("late")
+            with pytest.raises(HTTPException) as missing:
+                await cache.get("never-created")
+            return info, missing.value.status_code
+        finally:
+            await get_client().delete_collection("late")
+
+    info, status = asyncio.run(run())
+    assert (info.name, info.vector_size, info.distance) == ("late", 4, "Cosine")
+    assert status == 404
+
+class CountingClient:
+    """Forwards to the real client and counts calls by method name."""
+
+    def __init__(self, client):
+        self.client = client
+        self.calls = {}
+
+    def __getattr__(self, name):
+        method = getattr(self.client, name)
+
+        async def call(*args, **kwargs):
+            self.calls[name] = self.calls.get(name, 0) + 1
+            return await method(*args, **kwargs)
+
+        return call
+
+def test_list_reads_the_snapshot_and_refresh_describes(monkeypatch):
+    client = CountingClient(get_client())
+    monkeypatch.setattr(collection_cache_module, "get_client", lambda: client)
+
+    async def run():
+        await client.create_collection("listed", vectors_config=VectorParams(size=3, distance=Distance.DOT))
+        try:
+            cache = CollectionCache(refresh_interval=30)
+            await cache.refresh()
+            described = client.calls.get("get_collection", 0)
+            first = await cache.list()
+            second = await cache.list()
+            return described, first, second, dict(client.calls)
+        finally:
+            await client.delete_collection("listed")
+
+    described, first, second, calls = asyncio.run(run())
+    assert described == 1
+    # Listing twice made no further Qdrant calls of any kind
+    assert calls == {"create_collection": 1, "get_collections": 1, "get_collection": 1}
+    assert [(i.name, i.vector_size, i.distance) for i in first] == [("listed", 3, "Dot")]
+    assert first == second
+
+def test_missing_collection_is_remembered_until_invalidated(monkeypatch):
+    client = CountingClient(get_client())
+    monkeypatch.setattr(collection_cache_module, "get_client", lambda: client)
+
+    async def run():
+        cache = CollectionCache(refresh_interval=30, miss_ttl=60)
+        await cache.refresh()
+        for _ in range(5):
+            with pytest.raises(HTTPException) as missing:
+                await cache.get("typo")
+            assert missing.value.status_code == 404
+        checks = client.calls.get("collection_exists", 0)
+        await client.create_collection("typo", vectors_config=VectorParams(size=2, distance=Distance.COSINE))
+        try:
+            cache.invalidate()
+            info = await cache.get("typo")
+        finally:
+            await client.delete_collection("typo")
+        return checks, info
+
+    checks, info = asyncio.run(run())
+    assert checks == 1
+    assert (info.name, info.vector_size) == ("typo", 2)
+
+def test_remembered_misses_are_bounded(monkeypatch):
+    monkeypatch.setattr(CollectionCache, "MAX_MISSES", 3)
+
+    async def run():
+        cache = CollectionCache(refresh_interval=30, miss_ttl=60)
+        await cache.refresh()
+        for i in range(10):
+            with pytest.raises(HTTPException):
+                await cache.get(f"missing{i}")
+        return list(cache._misses)
+
+    assert asyncio.run(run()) == ["missing7", "missing8", "missing9"]
@@ -0,0 +1,34 @@
+import asyncio
+from qdrant_client.models import Distance, FieldCondition, Filter, MatchValue, VectorParams
+from app import filters
+from app.collection_cache import collection_cache
+from app.metrics import FILTER_UNINDEXED
+from app.qdrant import get_client
+
+def _on(*fields):
+    return Filter(must=[FieldCondition(key=field, match=MatchValue(value=1)) for field in fields])
+
+def test_unindexed_fields_keep_metric_and_warnings_bounded(monkeypatch):
+    monkeypatch.setattr(filters, "_WARNED_MAX", 4)
+    monkeypatch.setattr(filters, "_warned", filters.OrderedDict())
+
+    async def run():
+        await get_client().create_collection("unindexed", vectors_config=VectorParams(size=4, distance=Distance.DOT))
+        collection_cache.invalidate()
+        try:
+            found = [await filters.unindexed_fields("unindexed", _on(f"field{i}")) for i in range(20)]
+            # A collection that does not exist is neither reported nor counted
+            found.append(await filters.unindexed_fields("no-such-collection", _on("anything")))
+            return found
+        finally:
+            await get_client().delete_collection("unindexed")
+            collection_cache.invalidate()
+
+    found = asyncio.run(run())
+    assert found[:20] == [[f"field{i}"] for i in range(20)]
+    assert found[20] == []
+    assert list(filters._warned) == [("unindexed", f"field{i}") for i in range(16, 20)]
+    samples = [s for m in FILTER_UNINDEXED.collect() for s in m.samples if s.name.endswith("_total")]
+    assert {s.labels["collection"] for s in samples} == {"unindexed"}
+    assert all(set(s.labels) == {"collection"} for s in samples)
+    assert samples[0].value == 20
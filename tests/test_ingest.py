@@ -0,0 +1,105 @@
+import asyncio
+import json
+import pytest
+from fastapi import HTTPException
+from starlette.requests import ClientDisconnect, Request
+from app.ingest import ingest, iter_rows
+
+def _request(chunks, content_type):
+    """A request whose body arrives in `chunks`; an exception in the list is raised instead."""
+    messages = [{"type": "http.request", "body": c, "more_body": True} for c in chunks] + [
+        {"type": "http.request", "body": b"", "more_body": False}
+    ]
+
+    async def receive():
+        message = messages.pop(0)
+        if isinstance(message["body"], Exception):
+            await asyncio.sleep(0.01)  # let the chunks already flushed start
+            raise message["body"]
+        return message
+
+    headers = [(b"content-type", content_type.encode())]
+    return Request({"type": "http", "method": "POST", "path": "/", "headers": headers}, receive)
+
+async def _rows(request):
+    return [row async for row in iter_rows(request)]
+
+def _point(i, dim=2):
+    return {"id": i, "vector": [float(i)] * dim}
+
+def test_ndjson_rows_split_across_chunks():
+    body = "\n".join(json.dumps(_point(i)) for i in range(1, 4)).encode()
+    rows = asyncio.run(_rows(_request([body[:10], body[10:25], body[25:]], "application/x-ndjson; charset=utf-8")))
+    assert [(row, obj["id"]) for row, obj in rows] == [(0, 1), (1, 2), (2, 3)]
+
+def test_ndjson_bad_line_is_yielded_as_error():
+    body = b'{"id": 1, "vector": [1, 2]}\n\n{"id": 2,\n{"id": 3, "vector": [3, 4]}'
+    rows = asyncio.run(_rows(_request([body], "application/x-ndjson")))
+    assert rows[0] == (0, {"id": 1, "vector": [1, 2]})
+    assert rows[1][0] == 1 and isinstance(rows[1][1], ValueError)
+    assert rows[2] == (2, {"id": 3, "vector": [3, 4]})
+
+def test_json_array_body():
+    body = json.dumps([_point(1), _point(2)]).encode()
+    rows = asyncio.run(_rows(_request([body], "application/json")))
+    assert [(row, obj["id"]) for row, obj in rows] == [(0, 1), (1, 2)]
+
+@pytest.mark.parametrize("body", [b'{"id": 1}', b"[{"])
+def test_json_body_must_be_an_array(body):
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(_rows(_request([body], "application/json")))
+    assert error.value.status_code == 400
+
+async def _from(objs):
+    for row, obj in enumerate(objs):
+        yield row, obj
+
+def test_invalid_rows_are_reported_and_skipped():
+    objs = [_point(1), {"id": 0, "vector": [1, 2]}, ValueError("Expecting value"), _point(2, dim=3), _point(3)]
+    sent = []
+
+    async def upsert_chunk(points):
+        sent.append([p.id for p in points])
+
+    summary = asyncio.run(ingest(_from(objs), upsert_chunk, chunk_size=10, parallelism=2, max_errors=2, dimension=2))
+    assert sent == [[1, 3]]
+    assert (summary["received"], summary["upserted"], summary["invalid"], summary["failed"]) == (5, 2, 3, 0)
+    # Only the first max_errors are listed, by row number
+    assert [e["row"] for e in summary["errors"]] == [1, 2]
+    assert "Invalid JSON" in summary["errors"][1]["error"]
+
+def test_failed_chunks_are_summarised_per_chunk():
+    async def upsert_chunk(points):
+        if points[0].id == 3:
+            raise RuntimeError("qdrant said no")
+
+    summary = asyncio.run(ingest(_from([_point(i) for i in range(1, 6)]), upsert_chunk, 2, 2, 10))
+    assert summary["chunks"] == [
+        {"index": 0, "first_row": 0, "count": 2, "status": "success"},
+        {"index": 1, "first_row": 2, "count": 2, "status": "failed", "error": "qdrant said no"},
+        {"index": 2, "first_row": 4, "count": 1, "status": "success"},
+    ]
+    assert (summary["upserted"], summary["failed"]) == (3, 2)
+
+def test_chunks_in_flight_are_cancelled_when_the_body_breaks_off():
+    started, cancelled = [], []
+
+    async def upsert_chunk(points):
+        started.append(points[0].id)
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(points[0].id)
+            raise
+
+    body = "".join(json.dumps(_point(i)) + "\n" for i in range(1, 5)).encode()
+    request = _request([body, ClientDisconnect()], "application/x-ndjson")
+
+    async def run():
+        with pytest.raises(ClientDisconnect):
+            await ingest(iter_rows(request), upsert_chunk, chunk_size=2, parallelism=4, max_errors=10)
+        # Nothing is left running once ingest() has returned
+        return [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+
+    assert asyncio.run(run()) == []
+    assert started == cancelled == [1, 3]
@@ -0,0 +1,97 @@
+import asyncio
+import pytest
+from qdrant_client.models import Distance, VectorParams
+from sqlalchemy import update
+from app import jobs
+from app.db import SessionLocal, engine
+from app.enums import JobStatusEnum, JobTypeEnum
+from app.jobs import JobContext, JobRunner, _claim, create_job, run_migrate
+from app.migrations import migrate
+from app.models import Job
+from app.principals import Principal
+from app.qdrant import get_client
+
+ACTOR = Principal(id=1, email="jobs@example.com", role="ADMIN", created_at=None, updated_at=None)
+
+def _set_status(job_id, status):
+    db = SessionLocal()
+    try:
+        db.execute(update(Job).where(Job.id == job_id).values(status=status.value))
+        db.commit()
+        return db.get(Job, job_id)
+    finally:
+        db.close()
+
+def _job(job_id):
+    db = SessionLocal()
+    try:
+        return db.get(Job, job_id)
+    finally:
+        db.close()
+
+def test_cancel_finishes_in_flight_chunks_and_resume_continues_from_the_checkpoint(monkeypatch):
+    migrate(engine)
+    monkeypatch.setattr(jobs, "SAVE_INTERVAL", 0)
+    items = list(range(40))
+    started, applied = [], []
+    job_id = create_job(ACTOR, JobTypeEnum.DELETE, "anything", {"batch_size": 4, "parallelism": 3})["id"]
+
+    async def handler(ctx):
+        ctx.total = len(items)
+
+        async def chunks():
+            for i in range((ctx.checkpoint or {}).get("index", 0), len(items), 4):
+                yield {"index": i + 4}, items[i:i + 4]
+
+        async def apply(chunk):
+            started.append(chunk[0])
+            await asyncio.sleep(0.02)
+            applied.extend(chunk)
+            if len(applied) == 12:
+                _set_status(job_id, JobStatusEnum.CANCELLING)
+
+        await ctx.run_chunks(chunks(), apply)
+
+    monkeypatch.setitem(jobs.HANDLERS, JobTypeEnum.DELETE.value, handler)
+    runner = JobRunner(enabled=True, concurrency=1, poll_interval=1, lease_seconds=60)
+    runner.owner = "tests:1"
+
+    asyncio.run(runner._run(_claim(runner.owner, 60)))
+    job = _job(job_id)
+    assert job.status == JobStatusEnum.CANCELLED.value
+    # Chunks in flight when the cancel was noticed were finished and checkpointed
+    assert sorted(applied) == items[:len(applied)] and len(applied) > 12
+    assert (job.done, job.checkpoint) == (len(applied), {"index": len(applied)})
+
+    _set_status(job_id, JobStatusEnum.QUEUED)
+    asyncio.run(runner._run(_claim(runner.owner, 60)))
+    job = _job(job_id)
+    assert job.status == JobStatusEnum.SUCCEEDED.value
+    # Nothing was applied (or even started) twice
+    assert sorted(applied) == items
+    assert sorted(started) == items[::4]
+    assert job.done == len(items)
+
+def _context(params):
+    job = {"id": 0, "type": JobTypeEnum.MIGRATE.value, "collection": params["source"], "params": params,
+           "checkpoint": None, "total": None, "done": 0}
+    return JobContext("tests:1", job)
+
+@pytest.mark.parametrize("params, error", [
+    ({}, "already exists"),
+    ({"overwrite": True, "distance": "Dot"}, "different vector settings"),
+])
+def test_migrate_refuses_an_existing_target(params, error):
+    async def run():
+        client = get_client()
+        await client.create_collection("mig-src", vectors_config=VectorParams(size=4, distance=Distance.COSINE))
+        await client.create_collection("mig-dst", vectors_config=VectorParams(size=4, distance=Distance.COSINE))
+        try:
+            with pytest.raises(ValueError, match=error):
+                await run_migrate(_context({"source": "mig-src", "target": "mig-dst", **params}))
+            return (await client.get_collection("mig-dst")).points_count
+        finally:
+            await client.delete_collection("mig-src")
+            await client.delete_collection("mig-dst")
+
+    assert asyncio.run(run()) == 0
@@ -0,0 +1,21 @@
+import asyncio
+import os
+from app.password_pool import PasswordPool
+
+def test_pool_recovers_from_a_dead_process():
+    async def run():
+        pool = PasswordPool(workers=1, max_pending=8)
+        try:
+            hashed = await pool.hash("correct horse")
+            broken = pool._executor
+            for pid in list(broken._processes):
+                os.kill(pid, 9)
+            await asyncio.sleep(0.5)
+            results = await asyncio.gather(*(pool.verify("correct horse", hashed) for _ in range(3)))
+            return results, pool._executor is not broken
+        finally:
+            pool.shutdown()
+
+    results, replaced = asyncio.run(run())
+    assert results == [True, True, True]
+    assert replaced
@@ -0,0 +1,84 @@
+import asyncio
+import httpx
+import pytest
+from app import principals
+from app.db import SessionLocal, engine
+from app.migrations import migrate
+from app.models import User
+from app.principals import Principal, PrincipalCache, principal_cache
+from app.security import create_access_token
+
+def _principal(email, role="USER"):
+    return Principal(id=1, email=email, role=role, created_at=None, updated_at=None)
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(principals.time, "monotonic", lambda: now[0])
+    return now
+
+def test_entries_expire_after_ttl(clock):
+    cache = PrincipalCache(max_size=10, ttl=60)
+    cache.put(_principal("a@x.io"))
+    clock[0] += 59
+    assert cache.get("a@x.io") == _principal("a@x.io")
+    clock[0] += 2
+    assert cache.get("a@x.io") is None
+
+def test_least_recently_used_entry_is_evicted(clock):
+    cache = PrincipalCache(max_size=2, ttl=60)
+    cache.put(_principal("a@x.io"))
+    cache.put(_principal("b@x.io"))
+    assert cache.get("a@x.io") is not None
+    cache.put(_principal("c@x.io"))
+    assert [cache.get(e) is not None for e in ("a@x.io", "b@x.io", "c@x.io")] == [True, False, True]
+
+def test_invalidation_reaches_every_worker():
+    # Two caches over the same SHARED_STATE_DIR stand in for two worker processes
+    here, elsewhere = PrincipalCache(max_size=10, ttl=60), PrincipalCache(max_size=10, ttl=60)
+    for cache in (here, elsewhere):
+        cache.put(_principal("a@x.io"))
+        cache.put(_principal("b@x.io"))
+    here.invalidate("a@x.io")
+    assert here.get("a@x.io") is None
+    assert elsewhere.get("a@x.io") is None
+    # The whole cache goes, not just the changed user
+    assert elsewhere.get("b@x.io") is None
+
+def test_disabled_cache_keeps_nothing():
+    cache = PrincipalCache(max_size=0, ttl=60)
+    cache.put(_principal("a@x.io"))
+    assert cache.get("a@x.io") is None
+
+def _add_user(email, role):
+    db = SessionLocal()
+    try:
+        db.query(User).filter(User.email == email).delete()
+        user = User(email=email, hashed_password="unused", role=role)
+        db.add(user)
+        db.commit()
+        return user.id
+    finally:
+        db.close()
+
+def test_deleted_user_loses_access_on_the_next_request():
+    from app.main import app
+    migrate(engine)
+    _add_user("admin@principals.io", "ADMIN")
+    victim = _add_user("victim@principals.io", "USER")
+    # Another worker that has already served the victim
+    elsewhere = PrincipalCache(max_size=10, ttl=600)
+    admin = {"Authorization": "Bearer " + create_access_token("admin@principals.io", "ADMIN")}
+    user = {"Authorization": "Bearer " + create_access_token("victim@principals.io", "USER")}
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            before = await client.get("/auth/me", headers=user)
+            elsewhere.put(principal_cache.get("victim@principals.io"))
+            deleted = await client.delete(f"/users/{victim}", headers=admin)
+            after = await client.get("/auth/me", headers=user)
+            return before.status_code, deleted.status_code, after.status_code
+
+    assert asyncio.run(run()) == (200, 200, 401)
+    assert elsewhere.get("victim@principals.io") is None
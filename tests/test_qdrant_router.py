@@ -0,0 +1,113 @@
+import asyncio
+import inspect
+import time
+from qdrant_client import AsyncQdrantClient
+from qdrant_client.models import Distance, PointStruct, VectorParams
+from app.qdrant_router import Node, QdrantRouter
+
+class FaultInjector:
+    """Forwards to a real in-memory client after `delay` seconds, or fails while `down`."""
+
+    def __init__(self, client: AsyncQdrantClient, delay: float = 0.0):
+        self.client = client
+        self.delay = delay
+        self.down = False
+
+    def __getattr__(self, name: str):
+        method = getattr(self.client, name)
+        if not inspect.iscoroutinefunction(method):
+            return method
+
+        async def call(*args, **kwargs):
+            if self.delay:
+                await asyncio.sleep(self.delay)
+            if self.down:
+                raise ConnectionError(f"{name}: connection refused")
+            return await method(*args, **kwargs)
+
+        return call
+
+async def replica() -> AsyncQdrantClient:
+    """One in-memory endpoint holding the same small collection as every other replica."""
+    client = AsyncQdrantClient(location=":memory:")
+    await client.create_collection("docs", vectors_config=VectorParams(size=2, distance=Distance.COSINE))
+    await client.upsert("docs", points=[PointStruct(id=i, vector=[1.0, float(i)]) for i in range(1, 21)])
+    return client
+
+# A few milliseconds, like a network round trip; unmeasured nodes look faster than that
+RTT = 0.005
+
+async def cluster(*delays: float, **options) -> QdrantRouter:
+    nodes = [Node(f"node{i}", FaultInjector(await replica(), delay)) for i, delay in enumerate(delays)]
+    return QdrantRouter(nodes, **options)
+
+def test_read_fails_over_and_faulty_node_is_ejected():
+    async def run():
+        router = await cluster(RTT, RTT, RTT, eject_after=2, eject_seconds=30, hedge_after=0)
+        broken = router.nodes[0]
+        broken.client.down = True
+        counts = [(await router.count("docs")).count for _ in range(10)]
+        return router, broken, counts
+
+    router, broken, counts = asyncio.run(run())
+    assert counts == [20] * 10
+    assert broken.ejections == 1
+    assert not broken.available(time.monotonic())
+    # Ejected after two failures, then skipped
+    assert broken.requests == 2
+
+def test_ejected_node_returns_after_its_ejection():
+    async def run():
+        router = await cluster(RTT, RTT, eject_after=1, eject_seconds=0.2, hedge_after=0)
+        flaky = router.nodes[0]
+        flaky.client.down = True
+        await router.count("docs")
+        assert not flaky.available(time.monotonic())
+        flaky.client.down = False
+        await asyncio.sleep(0.25)
+        before = flaky.requests
+        for _ in range(5):
+            await router.count("docs")
+        return flaky.requests - before
+
+    assert asyncio.run(run()) > 0
+
+def test_slow_search_is_hedged_on_another_node():
+    async def run():
+        router = await cluster(0.5, RTT, hedge_after=0.05)
+        expected = await router.nodes[1].client.client.search("docs", query_vector=[1.0, 3.0], limit=3)
+        start = time.perf_counter()
+        hits = await router.search("docs", query_vector=[1.0, 3.0], limit=3)
+        return hits, expected, time.perf_counter() - start, router
+
+    hits, expected, elapsed, router = asyncio.run(run())
+    assert [hit.id for hit in hits] == [hit.id for hit in expected]
+    assert elapsed < 0.4
+    assert router.nodes[0].requests == 1 and router.nodes[1].requests == 1
+
+def test_last_available_node_is_never_ejected():
+    async def run():
+        router = await cluster(0.0, 0.0, eject_after=1, eject_seconds=30, hedge_after=0)
+        for node in router.nodes:
+            node.client.down = True
+        errors = 0
+        for _ in range(4):
+            try:
+                await router.count("docs")
+            except ConnectionError:
+                errors += 1
+        return router, errors
+
+    router, errors = asyncio.run(run())
+    assert errors == 4
+    assert sum(node.available(time.monotonic()) for node in router.nodes) == 1
+
+def test_writes_go_to_the_primary_only():
+    async def run():
+        router = await cluster(0.0, 0.0, hedge_after=0)
+        await router.upsert("docs", points=[PointStruct(id=99, vector=[0.5, 0.5])])
+        primary = await router.nodes[0].client.client.count("docs")
+        secondary = await router.nodes[1].client.client.count("docs")
+        return primary.count, secondary.count
+
+    assert asyncio.run(run()) == (21, 20)
@@ -0,0 +1,36 @@
+import asyncio
+import time
+from app.db import engine, probe_engine
+from app.migrations import migrate
+from app.readiness import ReadinessProbe
+
+def _hold(target, count):
+    return [target.connect() for _ in range(count)]
+
+def test_busy_request_pool_does_not_fail_the_probe():
+    migrate(engine)
+    # Every request connection (pool_size + max_overflow) is checked out, as under load
+    held = _hold(engine, engine.pool.size() + engine.pool._max_overflow)
+    try:
+        start = time.perf_counter()
+        result = asyncio.run(ReadinessProbe(ttl=0, timeout=2).check())
+        elapsed = time.perf_counter() - start
+    finally:
+        for connection in held:
+            connection.close()
+    assert result["database"]["status"] == "ok"
+    assert result["database"]["pool_checked_out"] == len(held)
+    assert elapsed < 1
+
+def test_stuck_probe_connection_fails_fast():
+    # A previous probe still holds the single probe connection (e.g. on a hung server)
+    held = _hold(probe_engine, 1)
+    try:
+        start = time.perf_counter()
+        result = asyncio.run(ReadinessProbe(ttl=0, timeout=2).check())
+        elapsed = time.perf_counter() - start
+    finally:
+        held[0].close()
+    assert result["status"] == "not_ready"
+    assert result["database"]["status"] == "error"
+    assert elapsed < 1
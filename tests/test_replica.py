@@ -0,0 +1,94 @@
+import asyncio
+import uuid
+import numpy as np
+import pytest
+from qdrant_client import QdrantClient
+from qdrant_client.models import Distance, PointStruct, VectorParams
+from app.enums import DistanceEnum
+from app.qdrant import get_client
+from app import replica as replica_module
+from app.replica import LocalReplica, ReplicaManager, top_k
+
+@pytest.mark.parametrize("distance", list(DistanceEnum))
+def test_top_k_matches_qdrant(distance):
+    rng = np.random.default_rng(7)
+    vectors = rng.normal(size=(300, 16)).astype(np.float32)
+    client = QdrantClient(location=":memory:")
+    client.create_collection("c", vectors_config=VectorParams(size=16, distance=Distance(distance.value)))
+    client.upsert("c", points=[PointStruct(id=i, vector=v.tolist()) for i, v in enumerate(vectors)])
+
+    # The replica keeps Cosine rows normalized, like Qdrant does
+    matrix = vectors
+    if distance == DistanceEnum.COSINE:
+        matrix = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    sq_norms = np.einsum("ij,ij->i", matrix, matrix)
+    for query in rng.normal(size=(5, 16)).astype(np.float32):
+        rows, scores = top_k(distance, matrix, sq_norms, query, 10)
+        hits = client.query_points("c", query=query.tolist(), limit=10).points
+        assert rows.tolist() == [hit.id for hit in hits]
+        np.testing.assert_allclose(scores, [hit.score for hit in hits], rtol=1e-4, atol=1e-4)
+
+def test_uuid_ids_in_any_format_update_the_same_row():
+    point = str(uuid.uuid4())
+
+    async def run():
+        client = get_client()
+        await client.create_collection("uuids", vectors_config=VectorParams(size=2, distance=Distance.DOT))
+        try:
+            await client.upsert("uuids", points=[PointStruct(id=point, vector=[1.0, 0.0])])
+            replica = LocalReplica("uuids", max_points=100, max_age=60, shared=False)
+            await replica.resync()
+            replica.upsert([PointStruct(id=point.upper(), vector=[0.0, 1.0])])
+            hits = await replica.search([0.0, 1.0], 10, False, None, False)
+            replica.delete([point.replace("-", "")])
+            return hits, replica.count
+        finally:
+            await client.delete_collection("uuids")
+
+    hits, remaining = asyncio.run(run())
+    assert [(hit["id"], hit["score"]) for hit in hits] == [(point, 1.0)]
+    assert remaining == 0
+
+class CountingReplica(LocalReplica):
+    """Resyncs without Qdrant: adopts the current write token and counts the scrolls."""
+
+    def __init__(self, name, clock):
+        super().__init__(name, max_points=100, max_age=180, shared=False)
+        self.clock = clock
+        self.resyncs = []
+
+    async def resync(self):
+        self.last_attempt = self.clock[0]
+        self.resyncs.append(self.clock[0])
+        self._install("Dot", np.zeros((1, 2), dtype=np.float32), [1], [{}], self._writes.current())
+
+def test_stale_resyncs_back_off_under_steady_writes(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(replica_module.time, "monotonic", lambda: clock[0])
+    manager = ReplicaManager([], max_points=100, resync_interval=60, shared=False, min_gap=1.0)
+    replica = manager.replicas["busy"] = CountingReplica("busy", clock)
+
+    async def run():
+        await manager._maintain(replica)
+        # Another worker writes every half second for two minutes
+        for _ in range(240):
+            clock[0] += 0.5
+            replica._writes.bump()
+            await manager._maintain(replica)
+        first = len(replica.resyncs)
+        # Writes stop: one catch-up, then the gap is back to min_gap
+        for _ in range(4):
+            clock[0] += 1.0
+            await manager._maintain(replica)
+        replica._writes.bump()
+        clock[0] += 1.0
+        await manager._maintain(replica)
+        return first
+
+    first = asyncio.run(run())
+    # 1, 2, 4, ... seconds apart, capped at the resync interval, instead of once a second
+    assert np.diff(replica.resyncs[:first]).tolist() == [1.0, 2.0, 4.0, 8.0, 16.0, 32.0]
+    # The interval resync catches up; once the replica stayed fresh the next write is
+    # caught up after min_gap again
+    assert replica.resyncs[first:] == [1123.0, 1125.0]
+    assert replica.fresh()
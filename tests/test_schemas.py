@@ -0,0 +1,24 @@
+import pytest
+from pydantic import ValidationError
+from app.schemas import PointsDeleteIn
+
+@pytest.mark.parametrize("filter", [
+    {},
+    {"must": []},
+    {"should": [], "must_not": []},
+    {"min_should": {"conditions": [], "min_count": 1}},
+])
+def test_delete_by_empty_filter_is_rejected(filter):
+    # Each of these would match, and so delete, every point in the collection
+    with pytest.raises(ValidationError, match="at least one condition"):
+        PointsDeleteIn(collection="docs", filter=filter)
+
+def test_delete_by_filter_with_a_condition_is_accepted():
+    data = PointsDeleteIn(collection="docs", filter={"must": [{"key": "tenant", "match": {"value": "a"}}]})
+    assert data.filter.must[0].key == "tenant"
+
+def test_delete_needs_exactly_one_selector():
+    with pytest.raises(ValidationError, match="exactly one"):
+        PointsDeleteIn(collection="docs")
+    with pytest.raises(ValidationError, match="exactly one"):
+        PointsDeleteIn(collection="docs", ids=[1], filter={"must": [{"has_id": [1]}]})